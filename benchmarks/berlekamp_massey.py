@@ -0,0 +1,84 @@
+import sys
+import time
+
+import numpy as np
+from numba import njit
+
+from PyPR.Tools.RegisterSynthesis.lfsrSynthesis import berlekamp_massey, berlekamp_massey_iterator
+
+# Compare the bit-packed Berlekamp-Massey (64 coefficients per word) with the
+# one bit per byte version. Both cost O(N * L) for N bits of a sequence with
+# linear complexity L, so random sequences (L ~ N/2) are only run up to moderate
+# lengths, and the long runs use LFSR sequences with a fixed linear complexity.
+# The per-bit version is skipped where it would take too long.
+#
+# usage: python benchmarks/berlekamp_massey.py [max length] [per-bit limit]
+
+@njit
+def _recurrence(seq, taps):
+    # seq[n] = XOR of seq[n - t] for t in taps
+    for n in range(taps.max(), len(seq)):
+        bit = 0
+        for t in taps:
+            bit ^= seq[n - t]
+        seq[n] = bit
+
+def lfsr_sequence(degree, length, rng):
+    taps = np.concatenate([[degree], rng.choice(np.arange(1, degree), 4, replace = False)])
+    seq = np.zeros(length, dtype = np.uint8)
+    seq[:degree] = rng.integers(0, 2, degree)
+    _recurrence(seq, taps)
+    return seq
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+def run_iterator(seq, packed):
+    for result in berlekamp_massey_iterator(iter(seq.tolist()), yield_rate = 100000, packed = packed):
+        pass
+    return result
+
+if __name__ == "__main__":
+    max_length = int(float(sys.argv[1])) if len(sys.argv) > 1 else 10**7
+    per_bit_limit = int(float(sys.argv[2])) if len(sys.argv) > 2 else 2 * 10**5
+    rng = np.random.default_rng(0)
+
+    # compile both versions
+    warmup = rng.integers(0, 2, 256).astype(np.uint8)
+    berlekamp_massey(warmup)
+    berlekamp_massey(warmup, packed = False)
+
+    cases = [("random", n, None) for n in (10**4, 3 * 10**4, 10**5) if n <= max_length]
+    for degree in (1000, 10000):
+        cases += [("LFSR", n, degree) for n in (10**5, 10**6, 10**7) if n <= max_length and n > 2 * degree]
+
+    print(f"{'sequence':<14}  {'length':>9}  {'LC':>6}  {'per-bit':>9}  {'packed':>9}  {'speedup':>8}")
+    for kind, length, degree in cases:
+        if degree == None:
+            seq = rng.integers(0, 2, length).astype(np.uint8)
+        else:
+            seq = lfsr_sequence(degree, length, rng)
+
+        packed_time, (L, poly) = timed(berlekamp_massey, seq)
+        per_bit, speedup = "", ""
+        if length <= per_bit_limit:
+            per_bit_time, (L_ref, poly_ref) = timed(berlekamp_massey, seq, False)
+            assert L_ref == L and np.array_equal(poly_ref, poly[:len(poly_ref)])
+            per_bit = f"{per_bit_time:.3f}s"
+            speedup = f"{per_bit_time / packed_time:.1f}x"
+
+        name = kind if degree == None else f"{kind} ({degree})"
+        print(f"{name:<14}  {length:>9}  {L:>6}  {per_bit:>9}  {packed_time:>8.3f}s  {speedup:>8}")
+
+    # the iterator (as used by the fast algebraic attack), including the cost of
+    # collecting the bits from a Python iterator
+    length = min(10**6, max_length)
+    seq = lfsr_sequence(1000, length, rng)
+    print()
+    print(f"iterator, LFSR (1000), {length} bits:")
+    for packed in (False, True):
+        if packed or length <= per_bit_limit * 5:
+            elapsed, (L, _) = timed(run_iterator, seq, packed)
+            print(f"  {'packed' if packed else 'per-bit':<8} {elapsed:.3f}s  (LC {L})")
@@ -0,0 +1,87 @@
+import random
+import sys
+import time
+
+from pysat.solvers import Solver
+
+from PyPR.BooleanLogic import XOR, AND, CNFEncoding
+from PyPR.FeedbackFunctions import Fibonacci
+
+# Compare the tseytin encoding with the XOR-aware CNFEncoding on a state recovery
+# instance: a filtered LFSR, where each keystream bit is a long XOR of initial state
+# bits (after merge_redundant) plus a few AND terms. Part of the initial state is
+# given, and the solver has to recover the rest from the keystream.
+#
+# usage: python benchmarks/cnf_encoding.py [size] [rounds] [unknown bits] [seed]
+
+TAPS = (0, 5, 13, 22, 31)
+PRODUCTS = ((9, 21), (2, 30, 17))
+
+def keystream_fns(lfsr, rounds):
+    fns = []
+    for state in lfsr.iterator(rounds):
+        terms = [state[i] for i in TAPS]
+        terms += [AND(*(state[i] for i in product)) for product in PRODUCTS]
+        fns.append(XOR(*terms).merge_redundant())
+    return fns
+
+def instance(size, rounds, unknown, seed):
+    random.seed(seed)
+    lfsr = Fibonacci(size, format(random.getrandbits(size) | 1, "x"))
+    fns = keystream_fns(lfsr, rounds)
+    secret = [random.randrange(2) for _ in range(size)]
+    keystream = [int(fn.eval(secret)) for fn in fns]
+    known = {i: bool(secret[i]) for i in range(unknown, size)}
+    return fns, keystream, known, secret
+
+def solve(clauses, variable_labels, known):
+    assumptions = [v if known[i] else -v for i, v in variable_labels.items() if i in known]
+    start = time.perf_counter()
+    with Solver(name = "cadical195", bootstrap_with = clauses) as solver:
+        assert solver.solve(assumptions = assumptions)
+        model = solver.get_model()
+    return time.perf_counter() - start, {i: model[v-1] > 0 for i, v in variable_labels.items()}
+
+def run_tseytin(fns, keystream, known):
+    start = time.perf_counter()
+    clauses, node_labels, variable_labels = None, None, None
+    for fn in fns:
+        clauses, node_labels, variable_labels = fn.tseytin(clauses, node_labels, variable_labels)
+    clauses += [(node_labels[fn][-1] if bit else -node_labels[fn][-1],) for fn, bit in zip(fns, keystream)]
+    encode_time = time.perf_counter() - start
+    num_vars = max(abs(lit) for clause in clauses for lit in clause)
+    return len(clauses), num_vars, encode_time, *solve(clauses, variable_labels, known)
+
+def run_cnf_encoding(fns, keystream, known, cut_size):
+    start = time.perf_counter()
+    encoding = CNFEncoding(cut_size = cut_size)
+    for fn, bit in zip(fns, keystream):
+        encoding.assert_value(fn, bit)
+    encode_time = time.perf_counter() - start
+    return len(encoding.clauses), encoding.num_vars, encode_time, *solve(encoding.clauses, encoding.variable_labels, known)
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 48
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    unknown = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+    fns, keystream, known, secret = instance(size, rounds, unknown, seed)
+
+    native = CNFEncoding(native_xor = True)
+    for fn, bit in zip(fns, keystream):
+        native.assert_value(fn, bit)
+    lengths = [len(variables) for variables, _ in native.xors]
+    print(f"{size}-bit LFSR, {rounds + 1} keystream bits, {unknown} unknown state bits")
+    print(f"{len(native.xors)} XOR constraints (mean length {sum(lengths) / len(lengths):.1f}, max {max(lengths)})")
+    print()
+
+    runs = [("tseytin", run_tseytin(fns, keystream, known))]
+    for cut_size in (3, 4, 5, 6):
+        runs.append((f"cut size {cut_size}", run_cnf_encoding(fns, keystream, known, cut_size)))
+
+    print(f"{'encoding':<12}  {'clauses':>8}  {'vars':>7}  {'encode':>8}  {'solve':>8}")
+    for name, (num_clauses, num_vars, encode_time, solve_time, model) in runs:
+        assert all(model[i] == bool(secret[i]) for i in model) or all(
+            int(fn.eval([model.get(i, False) for i in range(size)])) == bit for fn, bit in zip(fns, keystream)
+        )
+        print(f"{name:<12}  {num_clauses:>8}  {num_vars:>7}  {encode_time:>7.3f}s  {solve_time:>7.3f}s")
@@ -0,0 +1,97 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from pysat.solvers import Solver
+
+from PyPR.BooleanLogic import XOR, AND, VAR, CNFEncoding, SolverSink, DIMACSWriter, read_cnf
+
+# Compare building a large instance in memory with streaming it: into a solver
+# (SolverSink), or to a DIMACS / binary file (DIMACSWriter) which is read back
+# into a solver. Peak memory is the Python allocations traced by tracemalloc
+# while encoding, so it doesn't include the solver's own clause database (which
+# every method pays for). The functions themselves are built beforehand, and
+# the build times are from separate, untraced runs.
+#
+# The instance is a small NLFSR unrolled as one shared DAG (each round adds a
+# handful of gates), with one filtered keystream bit per round, so multi-million
+# clause instances are quick to build.
+#
+# usage: python benchmarks/cnf_streaming.py [size] [rounds]
+
+def instance(size, rounds):
+    state = [VAR(i) for i in range(size)]
+    fns = []
+    for t in range(rounds):
+        feedback = XOR(state[0], state[size//3], AND(state[size//2], state[size-3]), AND(state[5], state[7], state[size-1]))
+        fns.append(XOR(state[1], state[size//4], AND(state[2], state[size//2 + 1]), state[size-2]))
+        state = state[1:] + [feedback]
+    keystream = [(t * 2654435761 >> 7) & 1 for t in range(rounds)]
+    return fns, keystream
+
+def build_list(fns, keystream, path):
+    encoding = CNFEncoding()
+    for fn, bit in zip(fns, keystream):
+        encoding.assert_value(fn, bit)
+    solver = Solver(name = "cadical195", bootstrap_with = encoding.clauses)
+    return encoding.num_clauses, solver
+
+def build_solver(fns, keystream, path):
+    sink = SolverSink("cadical195")
+    encoding = CNFEncoding(sink = sink)
+    for fn, bit in zip(fns, keystream):
+        encoding.assert_value(fn, bit)
+    return encoding.num_clauses, sink.solver
+
+def build_file(binary):
+    def build(fns, keystream, path):
+        with DIMACSWriter(path, binary = binary) as sink:
+            encoding = CNFEncoding(sink = sink)
+            for fn, bit in zip(fns, keystream):
+                encoding.assert_value(fn, bit)
+            encoding.write_variable_map(path + ".json")
+        return encoding.num_clauses, None
+    return build
+
+def load_file(path):
+    return Solver(name = "cadical195", bootstrap_with = read_cnf(path))
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 128
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    fns, keystream = instance(size, rounds)
+    directory = tempfile.mkdtemp()
+
+    methods = [
+        ("list", build_list, None),
+        ("solver sink", build_solver, None),
+        ("DIMACS file", build_file(False), os.path.join(directory, "instance.cnf")),
+        ("binary file", build_file(True), os.path.join(directory, "instance.bcnf")),
+    ]
+
+    print(f"{size}-bit NLFSR, {rounds} keystream bits")
+    print(f"{'method':<12}  {'clauses':>9}  {'build':>8}  {'peak mem':>10}  {'file':>10}  {'load':>8}")
+    for name, build, path in methods:
+        # tracing slows down allocations a lot, so time an untraced build first
+        start = time.perf_counter()
+        num_clauses, solver = build(fns, keystream, path)
+        build_time = time.perf_counter() - start
+        if solver != None:
+            solver.delete()
+
+        tracemalloc.start()
+        num_clauses, solver = build(fns, keystream, path)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        file_size, load_time = "", ""
+        if path != None:
+            start = time.perf_counter()
+            solver = load_file(path)
+            load_time = f"{time.perf_counter() - start:.3f}s"
+            file_size = f"{os.path.getsize(path) / 2**20:.1f} MiB"
+        solver.delete()
+
+        print(f"{name:<12}  {num_clauses:>9}  {build_time:>7.3f}s  {peak / 2**20:>6.1f} MiB  {file_size:>10}  {load_time:>8}")
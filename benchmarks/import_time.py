@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+# Time common imports in fresh interpreters, and report which of the heavy
+# dependencies they pulled in. `import PyPR` should stay well under a second and
+# load none of them; they should only be loaded by the code which needs them.
+#
+# usage: python benchmarks/import_time.py [repeats]
+
+TARGETS = [
+    "import PyPR",
+    "from PyPR.BooleanLogic import XOR, AND, VAR",
+    "from PyPR.BooleanLogic import BooleanFunction",
+    "from PyPR.FeedbackFunctions import FeedbackFunction",
+    "from PyPR import FeedbackRegister",
+    "from PyPR.FeedbackFunctions import Fibonacci",
+    "from PyPR.FeedbackFunctions import CMPR",
+    "from PyPR.BooleanLogic import satisfiable",
+]
+
+HEAVY = ['numba', 'galois', 'pysat']
+
+SCRIPT = """
+import sys, time
+start = time.perf_counter()
+{target}
+elapsed = time.perf_counter() - start
+print(elapsed, ' '.join(m for m in {heavy} if m in sys.modules))
+"""
+
+def time_import(target, repeats):
+    best = None
+    for _ in range(repeats):
+        result = subprocess.run(
+            [sys.executable, "-c", SCRIPT.format(target = target, heavy = HEAVY)],
+            capture_output = True, text = True, check = True
+        )
+        elapsed, *loaded = result.stdout.split()
+        if best == None or float(elapsed) < best:
+            best = float(elapsed)
+    return best, loaded
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    width = max(len(t) for t in TARGETS)
+    for target in TARGETS:
+        elapsed, loaded = time_import(target, repeats)
+        print(f"{target:<{width}}  {elapsed:7.3f}s  loaded: {', '.join(loaded) or '-'}")
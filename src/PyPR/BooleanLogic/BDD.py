@@ -0,0 +1,688 @@
+# TYPE ANNOTATIONS: TRUE
+# DOCSTRINGS: TRUE
+
+from typing import Any
+
+from PyPR.BooleanLogic.BooleanFunction import BooleanFunction
+from PyPR.BooleanLogic.BooleanANF import BooleanANF
+from PyPR.BooleanLogic.Gates import XOR, AND, OR, XNOR, NAND, NOR, NOT
+from PyPR.BooleanLogic.FunctionInputs import VAR, CONST
+
+import numpy as np
+
+# Edges are ints: (node id << 1) | complement bit. Node 0 is the terminal node
+# for True, so the edge 0 is True and the edge 1 is False. Nodes are stored in
+# parallel lists (variable, low edge, high edge, reference count), and the high
+# edge of a node is never complemented, which makes the representation canonical:
+# two functions are equal if and only if their edges are equal.
+TRUE = 0
+FALSE = 1
+
+# The recursive operations (ite, restrict, counting, export) recurse at most
+# once per variable level, so their depth is bounded by the number of variables.
+
+
+class BDDManager:
+    """A store of reduced ordered binary decision diagrams with complement edges.
+
+    Every function built by the manager shares one node table. Nodes are unique
+    (one per variable and pair of children, found with a per-variable unique table),
+    and the results of `ite` are kept in a computed cache. Nodes are reference
+    counted from their parents and from live `BDD` handles, and `collect` frees the
+    ones which are no longer used. The variable order can be improved with `reorder`,
+    which uses Rudell's sifting algorithm.
+
+    Variables are identified by the indices used in `VAR` nodes, and are added to
+    the bottom of the order when first used.
+    """
+    gc_threshold: int
+    max_growth: float
+
+    def __init__(self,
+        order: list[int] | None = None,
+        gc_threshold: int = 100000,
+        max_growth: float = 1.2
+    ):
+        """Create an empty manager.
+
+        :param order: Variable indices to create first, from the top of the order to
+            the bottom, defaults to None
+        :type order: list[int] | None, optional
+        :param gc_threshold: Collect garbage when the node table grows beyond this many
+            nodes (the threshold doubles if most of the nodes are still alive), defaults to 100000
+        :type gc_threshold: int, optional
+        :param max_growth: While sifting, stop moving a variable in one direction when the
+            table grows by more than this factor, defaults to 1.2
+        :type max_growth: float, optional
+        """
+        # node 0 is the terminal node
+        self._var: list[int] = [-1]
+        self._low: list[int] = [TRUE]
+        self._high: list[int] = [TRUE]
+        self._refs: list[int] = [1]
+        self._free: list[int] = []
+
+        self._unique: dict[int, dict[tuple[int, int], int]] = {}
+        self._level: dict[int, int] = {}
+        self._order: list[int] = []
+        self._cache: dict[tuple[int, int, int], int] = {}
+        self._num_nodes = 0
+
+        self.gc_threshold = gc_threshold
+        self.max_growth = max_growth
+
+        for index in (order or []):
+            self._add_var(index)
+
+    # Variables and order
+    def _add_var(self, index: int) -> None:
+        if index not in self._level:
+            self._level[index] = len(self._order)
+            self._order.append(index)
+            self._unique[index] = {}
+
+    @property
+    def order(self) -> list[int]:
+        """The variable indices, from the top of the order to the bottom."""
+        return list(self._order)
+
+    @property
+    def num_vars(self) -> int:
+        """The number of variables known to the manager."""
+        return len(self._order)
+
+    @property
+    def num_nodes(self) -> int:
+        """The number of (non-terminal) nodes in the node table, including dead ones."""
+        return self._num_nodes
+
+    def var(self, index: int) -> "BDD":
+        """Return the BDD of the variable with the given index.
+
+        :param index: The index of the variable (as in `VAR(index)`).
+        :type index: int
+        :return: The BDD of the variable
+        :rtype: BDD
+        """
+        self._add_var(index)
+        return BDD(self, self._mk(index, FALSE, TRUE))
+
+    def const(self, value: Any) -> "BDD":
+        """Return the BDD of a constant.
+
+        :param value: The constant, interpreted as a truth value.
+        :type value: Any
+        :return: The BDD of the constant
+        :rtype: BDD
+        """
+        return BDD(self, TRUE if value else FALSE)
+
+    # Node table
+    def _node_level(self, node: int) -> int:
+        if node == 0:
+            return len(self._order)
+        return self._level[self._var[node]]
+
+    def _mk(self, var: int, low: int, high: int) -> int:
+        # the edge for the node (var, low, high), keeping the high edge regular
+        if low == high:
+            return low
+        complement = high & 1
+        if complement:
+            low ^= 1
+            high ^= 1
+
+        table = self._unique[var]
+        node = table.get((low, high))
+        if node == None:
+            if self._free:
+                node = self._free.pop()
+                self._var[node] = var
+                self._low[node] = low
+                self._high[node] = high
+                self._refs[node] = 0
+            else:
+                node = len(self._var)
+                self._var.append(var)
+                self._low.append(low)
+                self._high.append(high)
+                self._refs.append(0)
+            self._refs[low >> 1] += 1
+            self._refs[high >> 1] += 1
+            table[(low, high)] = node
+            self._num_nodes += 1
+        return (node << 1) | complement
+
+    def _cofactors(self, edge: int, level: int) -> tuple[int, int]:
+        # the (low, high) cofactors of an edge with respect to the variable at `level`
+        node = edge >> 1
+        if node == 0 or self._level[self._var[node]] != level:
+            return edge, edge
+        complement = edge & 1
+        return self._low[node] ^ complement, self._high[node] ^ complement
+
+    def _ref(self, edge: int) -> None:
+        self._refs[edge >> 1] += 1
+
+    def _deref(self, edge: int) -> None:
+        self._refs[edge >> 1] -= 1
+
+    def _free_dead(self, nodes: list[int]) -> None:
+        # free nodes which have no references, and then any children left without references
+        stack = [node for node in nodes if node != 0 and self._refs[node] == 0]
+        while stack:
+            node = stack.pop()
+            var = self._var[node]
+            if var == -1 or self._refs[node] != 0:
+                continue # already freed, or revived
+
+            low, high = self._low[node], self._high[node]
+            del self._unique[var][(low, high)]
+            self._var[node] = -1
+            self._free.append(node)
+            self._num_nodes -= 1
+
+            for child in (low >> 1, high >> 1):
+                self._refs[child] -= 1
+                if child != 0 and self._refs[child] == 0:
+                    stack.append(child)
+
+    def collect(self) -> int:
+        """Free every node which is not reachable from a live `BDD` handle.
+
+        This is run automatically when the table grows past `gc_threshold`, but it
+        can also be called directly. It also clears the computed cache.
+
+        :return: The number of nodes which were freed.
+        :rtype: int
+        """
+        before = self._num_nodes
+        dead = [
+            node for table in self._unique.values()
+            for node in table.values() if self._refs[node] == 0
+        ]
+        self._free_dead(dead)
+        self._cache.clear()
+        return before - self._num_nodes
+
+    def _maybe_collect(self) -> None:
+        if self._num_nodes > self.gc_threshold:
+            self.collect()
+            if self._num_nodes > self.gc_threshold // 2:
+                self.gc_threshold *= 2
+
+    # Operations
+    def _ite(self, f: int, g: int, h: int) -> int:
+        # terminal cases
+        if f == TRUE: return g
+        if f == FALSE: return h
+        if g == h: return g
+
+        # replace g and h by constants where they equal f (or ~f)
+        if g == f: g = TRUE
+        elif g == f ^ 1: g = FALSE
+        if h == f: h = FALSE
+        elif h == f ^ 1: h = TRUE
+
+        if g == h: return g
+        if g == TRUE and h == FALSE: return f
+        if g == FALSE and h == TRUE: return f ^ 1
+
+        # standard triples: f and g are regular edges
+        if f & 1:
+            f ^= 1
+            g, h = h, g
+        complement = g & 1
+        if complement:
+            g ^= 1
+            h ^= 1
+
+        key = (f, g, h)
+        result = self._cache.get(key)
+        if result != None:
+            return result ^ complement
+
+        level = min(self._node_level(f >> 1), self._node_level(g >> 1), self._node_level(h >> 1))
+        f0, f1 = self._cofactors(f, level)
+        g0, g1 = self._cofactors(g, level)
+        h0, h1 = self._cofactors(h, level)
+
+        high = self._ite(f1, g1, h1)
+        low = self._ite(f0, g0, h0)
+        result = self._mk(self._order[level], low, high)
+
+        self._cache[key] = result
+        return result ^ complement
+
+    def ite(self, f: "BDD", g: "BDD", h: "BDD") -> "BDD":
+        """If-then-else: the BDD of `(f AND g) OR (NOT f AND h)`.
+
+        :param f: The condition
+        :type f: BDD
+        :param g: The function where f is true
+        :type g: BDD
+        :param h: The function where f is false
+        :type h: BDD
+        :return: The BDD of the if-then-else
+        :rtype: BDD
+        """
+        return BDD(self, self._ite(f.edge, g.edge, h.edge))
+
+    def from_BooleanFunction(self,
+        fn: BooleanFunction
+    ) -> "BDD":
+        """Build the BDD of a BooleanFunction.
+
+        The DAG is traversed once, and each node is built from the BDDs of its
+        arguments, so shared subfunctions are only built once.
+
+        :param fn: The function to convert. It may only use the builtin gates, `VAR`,
+            and `CONST` nodes with values 0 and 1.
+        :type fn: BooleanFunction
+        :raises TypeError: If the function contains a node type with no BDD conversion.
+        :return: The BDD of the function.
+        :rtype: BDD
+        """
+        edges: dict[BooleanFunction, int] = {}
+        stack: list[Any] = [fn]
+        last = None
+
+        while stack:
+            curr_node = stack[-1]
+
+            # dont interact with sentinel values
+            if curr_node is False:
+                last = stack.pop()
+                continue
+
+            # hitting a visited node while travelling down:
+            elif curr_node in edges:
+                last = stack.pop()
+                continue
+
+            # hitting a leaf:
+            elif curr_node.is_leaf():
+                if type(curr_node) == VAR:
+                    self._add_var(curr_node.index)
+                    edges[curr_node] = self._mk(curr_node.index, FALSE, TRUE)
+                elif type(curr_node) == CONST and curr_node.value in (0, 1):
+                    edges[curr_node] = TRUE if curr_node.value else FALSE
+                else:
+                    raise TypeError(f"Unable to convert leaf {curr_node} to a BDD")
+                last = stack.pop()
+                continue
+
+            # moving up the tree after finishing children:
+            elif last is False:
+                edges[curr_node] = self._gate(curr_node, [edges[arg] for arg in curr_node.args])
+                last = stack.pop()
+                continue
+
+            # before moving down to children:
+            else:
+                stack.append(False) # sentinel value
+                for child in reversed(curr_node.args):
+                    stack.append(child)
+                continue
+
+        return BDD(self, edges[fn])
+
+    def _gate(self, node: BooleanFunction, args: list[int]) -> int:
+        cls = type(node)
+        if cls == NOT:
+            return args[0] ^ 1
+
+        if cls in (XOR, XNOR):
+            result = FALSE
+            for arg in args:
+                result = self._ite(result, arg ^ 1, arg)
+        elif cls in (AND, NAND):
+            result = TRUE
+            for arg in args:
+                result = self._ite(result, arg, FALSE)
+        elif cls in (OR, NOR):
+            result = FALSE
+            for arg in args:
+                result = self._ite(result, TRUE, arg)
+        else:
+            raise TypeError(f"No BDD conversion for node of type {cls.__name__}")
+
+        if cls in (XNOR, NAND, NOR):
+            result ^= 1
+        return result
+
+    # Reordering
+    def _swap(self, level: int) -> None:
+        # swap the variables at `level` and `level + 1`. Nodes of the upper variable
+        # which depend on the lower one are rewritten in place (so their ids, and
+        # every edge pointing at them, stay valid), the rest just move down a level.
+        x = self._order[level]
+        y = self._order[level + 1]
+
+        for node in list(self._unique[x].values()):
+            low, high = self._low[node], self._high[node]
+            if self._var[low >> 1] != y and self._var[high >> 1] != y:
+                continue
+
+            f00, f01 = self._cofactors(low, level + 1)
+            f10, f11 = self._cofactors(high, level + 1)
+            del self._unique[x][(low, high)]
+
+            # the new children are built at x, which will be the lower level
+            new_low = self._mk(x, f00, f10)
+            new_high = self._mk(x, f01, f11)
+            self._ref(new_low)
+            self._ref(new_high)
+
+            self._var[node] = y
+            self._low[node] = new_low
+            self._high[node] = new_high
+            self._unique[y][(new_low, new_high)] = node
+
+            self._deref(low)
+            self._deref(high)
+            self._free_dead([low >> 1, high >> 1])
+
+        self._order[level], self._order[level + 1] = y, x
+        self._level[x], self._level[y] = level + 1, level
+        self._cache.clear()
+
+    def reorder(self) -> int:
+        """Improve the variable order with sifting.
+
+        Each variable (largest level first) is moved through every position in
+        the order, and then placed where the node table was smallest. Moving in a
+        direction stops early when the table grows by more than `max_growth`.
+        Existing `BDD` handles stay valid.
+
+        :return: The number of live nodes after reordering.
+        :rtype: int
+        """
+        self.collect()
+        num_levels = len(self._order)
+        by_size = sorted(self._order, key = lambda v: len(self._unique[v]), reverse = True)
+
+        for var in by_size:
+            start_size = self._num_nodes
+            best_size = start_size
+            best_level = self._level[var]
+
+            # sift down, then up
+            while self._level[var] < num_levels - 1:
+                self._swap(self._level[var])
+                if self._num_nodes < best_size:
+                    best_size, best_level = self._num_nodes, self._level[var]
+                if self._num_nodes > self.max_growth * start_size:
+                    break
+            while self._level[var] > 0:
+                self._swap(self._level[var] - 1)
+                if self._num_nodes < best_size:
+                    best_size, best_level = self._num_nodes, self._level[var]
+                if self._num_nodes > self.max_growth * start_size:
+                    break
+
+            # move to the best position
+            while self._level[var] < best_level:
+                self._swap(self._level[var])
+            while self._level[var] > best_level:
+                self._swap(self._level[var] - 1)
+
+        return self._num_nodes
+
+
+class BDD:
+    """A handle to a function stored in a `BDDManager`.
+
+    Handles keep their nodes alive while they exist. Equality is checked by
+    comparing edges, so it takes constant time, and handles can be used as
+    dict keys. Handles from different managers can't be combined.
+    """
+    __slots__ = ('manager', 'edge')
+    manager: BDDManager
+    edge: int
+
+    def __init__(self, manager: BDDManager, edge: int):
+        self.manager = manager
+        self.edge = edge
+        manager._ref(edge)
+        manager._maybe_collect()
+
+    def __del__(self):
+        try:
+            self.manager._deref(self.edge)
+        except AttributeError:
+            pass # partially constructed, or interpreter shutdown
+
+    def _check(self, other: "BDD") -> None:
+        if other.manager is not self.manager:
+            raise ValueError("BDDs belong to different managers")
+
+    # Operations
+    def __and__(self, other: "BDD") -> "BDD":
+        self._check(other)
+        return BDD(self.manager, self.manager._ite(self.edge, other.edge, FALSE))
+
+    def __or__(self, other: "BDD") -> "BDD":
+        self._check(other)
+        return BDD(self.manager, self.manager._ite(self.edge, TRUE, other.edge))
+
+    def __xor__(self, other: "BDD") -> "BDD":
+        self._check(other)
+        return BDD(self.manager, self.manager._ite(self.edge, other.edge ^ 1, other.edge))
+
+    def __invert__(self) -> "BDD":
+        return BDD(self.manager, self.edge ^ 1)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, BDD):
+            return NotImplemented
+        return self.manager is other.manager and self.edge == other.edge
+
+    def __hash__(self) -> int:
+        return hash((id(self.manager), self.edge))
+
+    def is_true(self) -> bool:
+        """Returns `True` if the function is constant 1."""
+        return self.edge == TRUE
+
+    def is_false(self) -> bool:
+        """Returns `True` if the function is constant 0."""
+        return self.edge == FALSE
+
+    def ite(self, g: "BDD", h: "BDD") -> "BDD":
+        """If-then-else with this function as the condition (see `BDDManager.ite`)."""
+        return self.manager.ite(self, g, h)
+
+    def restrict(self, index: int, value: Any) -> "BDD":
+        """Fix one variable to a constant.
+
+        :param index: The index of the variable to fix.
+        :type index: int
+        :param value: The value of the variable, interpreted as a truth value.
+        :type value: Any
+        :return: The BDD of the restricted function.
+        :rtype: BDD
+        """
+        manager = self.manager
+        if index not in manager._level:
+            return self
+        level = manager._level[index]
+        cache: dict[int, int] = {}
+
+        def restrict(edge: int) -> int:
+            node = edge >> 1
+            if manager._node_level(node) > level:
+                return edge
+            if edge in cache:
+                return cache[edge]
+            complement = edge & 1
+            low, high = manager._low[node] ^ complement, manager._high[node] ^ complement
+            if manager._var[node] == index:
+                result = high if value else low
+            else:
+                result = manager._mk(manager._var[node], restrict(low), restrict(high))
+            cache[edge] = result
+            return result
+
+        return BDD(manager, restrict(self.edge))
+
+    # Analysis
+    def node_count(self) -> int:
+        """The number of nodes in the BDD (not counting the terminal node)."""
+        visited = set()
+        stack = [self.edge >> 1]
+        while stack:
+            node = stack.pop()
+            if node == 0 or node in visited:
+                continue
+            visited.add(node)
+            stack.append(self.manager._low[node] >> 1)
+            stack.append(self.manager._high[node] >> 1)
+        return len(visited)
+
+    def support(self) -> set[int]:
+        """The set of variable indices which the function depends on."""
+        visited = set()
+        stack = [self.edge >> 1]
+        while stack:
+            node = stack.pop()
+            if node == 0 or node in visited:
+                continue
+            visited.add(node)
+            stack.append(self.manager._low[node] >> 1)
+            stack.append(self.manager._high[node] >> 1)
+        return {self.manager._var[node] for node in visited}
+
+    def sat_count(self, num_vars: int | None = None) -> int:
+        """Count the satisfying assignments of the function.
+
+        :param num_vars: The number of variables to count assignments over. This must
+            be at least the size of the support, and defaults to the number of variables
+            in the manager.
+        :type num_vars: int | None, optional
+        :return: The number of satisfying assignments.
+        :rtype: int
+        """
+        manager = self.manager
+        total = 2 ** manager.num_vars
+        counts: dict[int, int] = {0: total}
+
+        # the count over all manager variables. A node depends on its variable, and
+        # its children don't, so the children's counts are even and halve exactly.
+        def count(edge: int) -> int:
+            node = edge >> 1
+            if node not in counts:
+                counts[node] = (count(manager._low[node]) + count(manager._high[node])) // 2
+            return total - counts[node] if edge & 1 else counts[node]
+
+        result = count(self.edge)
+        if num_vars == None:
+            return result
+        return result * 2 ** num_vars // total
+
+    def weight(self) -> float:
+        """The fraction of inputs on which the function is 1 (0.5 for balanced functions)."""
+        return self.sat_count() / 2 ** self.manager.num_vars
+
+    def is_balanced(self) -> bool:
+        """Returns `True` if the function is 1 on exactly half of its inputs."""
+        return self.sat_count() * 2 == 2 ** self.manager.num_vars
+
+    def satisfiable(self) -> bool:
+        """Returns `True` if some assignment makes the function 1 (in constant time)."""
+        return self.edge != FALSE
+
+    def pick_model(self) -> dict[int, bool] | None:
+        """Find one satisfying assignment.
+
+        :return: A dict mapping variable indices to values, or None if the function is 0.
+            Variables which don't appear in the dict are "don't care".
+        :rtype: dict[int, bool] | None
+        """
+        if self.edge == FALSE:
+            return None
+        manager = self.manager
+        model = {}
+        edge = self.edge
+        while edge >> 1 != 0:
+            node = edge >> 1
+            complement = edge & 1
+            low, high = manager._low[node] ^ complement, manager._high[node] ^ complement
+            value = high != FALSE
+            model[manager._var[node]] = value
+            edge = high if value else low
+        return model
+
+    # Export
+    def truth_table(self, variables: list[int] | None = None) -> np.ndarray:
+        """Compute the truth table of the function.
+
+        Entry `k` of the table is the value of the function when variable
+        `variables[i]` is set to bit `i` of `k`.
+
+        :param variables: The variables of the table, which must include the support.
+            Defaults to the sorted support of the function.
+        :type variables: list[int] | None, optional
+        :return: An array of 0/1 values with length `2**len(variables)`
+        :rtype: np.ndarray
+        """
+        manager = self.manager
+        if variables == None:
+            variables = sorted(self.support())
+        indices = np.arange(2 ** len(variables), dtype = np.int64)
+        bits = {var: ((indices >> i) & 1).astype(bool) for i, var in enumerate(variables)}
+
+        tables: dict[int, np.ndarray] = {0: np.ones(len(indices), dtype = np.uint8)}
+        def table(edge: int) -> np.ndarray:
+            node = edge >> 1
+            if node not in tables:
+                tables[node] = np.where(
+                    bits[manager._var[node]],
+                    table(manager._high[node]),
+                    table(manager._low[node])
+                ).astype(np.uint8)
+            return tables[node] ^ np.uint8(edge & 1)
+
+        return table(self.edge)
+
+    def to_ANF(self) -> BooleanANF:
+        """Compute the algebraic normal form of the function.
+
+        Uses the identity `f = f_0 + x * (f_0 + f_1)` at every node. As with all
+        ANF computations, the result may be too large to compute for some functions.
+
+        :return: The ANF of the function.
+        :rtype: BooleanANF
+        """
+        manager = self.manager
+        one = BooleanANF([True])
+        anfs: dict[int, BooleanANF] = {0: one}
+
+        def anf(edge: int) -> BooleanANF:
+            node = edge >> 1
+            if node not in anfs:
+                low = anf(manager._low[node])
+                high = anf(manager._high[node])
+                anfs[node] = low ^ (BooleanANF([[manager._var[node]]]) & (low ^ high))
+            return anfs[node] ^ one if edge & 1 else anfs[node]
+
+        return anf(self.edge)
+
+    def to_BooleanFunction(self) -> BooleanFunction:
+        """Convert the BDD into a BooleanFunction, with one multiplexer per node.
+
+        :return: A BooleanFunction which shares a node for every shared BDD node.
+        :rtype: BooleanFunction
+        """
+        manager = self.manager
+        fns: dict[int, BooleanFunction] = {0: CONST(1)}
+
+        def to_fn(edge: int) -> BooleanFunction:
+            node = edge >> 1
+            if node not in fns:
+                low = to_fn(manager._low[node])
+                high = to_fn(manager._high[node])
+                fns[node] = XOR(low, AND(VAR(manager._var[node]), XOR(low, high)))
+            return NOT(fns[node]) if edge & 1 else fns[node]
+
+        return to_fn(self.edge)
@@ -0,0 +1,406 @@
+# TYPE ANNOTATIONS: TRUE
+# DOCSTRINGS: TRUE
+
+from typing import Any
+from collections.abc import Iterator
+
+from PyPR.BooleanLogic.BooleanFunction import BooleanFunction
+from PyPR.BooleanLogic.FunctionInputs import VAR, CONST
+
+import numpy as np
+import hashlib
+import json
+import mmap
+
+# Layout of the binary format:
+#   MAGIC
+#   class registry: count, then (kind byte, name) per entry
+#   node count, output count, output node ids
+#   cache key (length prefixed, empty if none)
+#   metadata (length prefixed JSON, empty if none)
+#   padding to 8 bytes, then one little endian uint64 offset per node
+#   node records: registry index, then a payload which depends on the kind
+# All integers are varints (signed ones are zigzag encoded), and child ids are
+# stored relative to the parent id so shared subgraphs are plain references.
+MAGIC = b"PYPRBIN\x01"
+
+# node kinds in the class registry:
+_GATE = 0   # args and arg_limit only
+_VAR = 1    # an index
+_CONST = 2  # an integer value
+_BOOL = 3   # a bool value
+_JSON = 4   # anything else, stored with _generate_JSON_entry
+
+
+def _write_varint(buffer: bytearray, value: int) -> None:
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+def _read_varint(data: Any, pos: int) -> tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+def _zigzag(value: int) -> int:
+    return 2*value if value >= 0 else -2*value - 1
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+def _write_bytes(buffer: bytearray, data: bytes) -> None:
+    _write_varint(buffer, len(data))
+    buffer += data
+
+def _node_kind(node: BooleanFunction) -> int:
+    if type(node) == VAR and type(node.index) == int:
+        return _VAR
+    if type(node) == CONST and type(node.value) == bool:
+        return _BOOL
+    if type(node) == CONST and type(node.value) == int:
+        return _CONST
+    if set(node._fields()) == {'args', 'arg_limit'}:
+        return _GATE
+    return _JSON
+
+def _subclass_registry() -> dict[str, type]:
+    # every (indirect) subclass of BooleanFunction, by name
+    registry = {}
+    stack = [BooleanFunction]
+    while stack:
+        cls = stack.pop()
+        for subcls in cls.__subclasses__():
+            registry[subcls.__name__] = subcls
+            stack.append(subcls)
+    return registry
+
+
+def generate_binary(
+    *fns: BooleanFunction,
+    metadata: dict[str, Any] | None = None,
+    cache_key: str | None = None
+) -> bytes:
+    """Encode a set of functions (which may share nodes) into the binary format.
+
+    This is the binary counterpart of `BooleanFunction.generate_JSON`. Shared nodes
+    are only stored once, and each node has an entry in an offset table, so single
+    functions can later be decoded without reading the rest of the file.
+
+    :param fns: The functions to store.
+    :type fns: BooleanFunction
+    :param metadata: Extra JSON-serializable data to store in the header, defaults to None
+    :type metadata: dict[str, Any] | None, optional
+    :param cache_key: A key to store in the header, which identifies the stored functions.
+        If `True`, a hash of the node records and output ids is used. Defaults to None
+    :type cache_key: str | None, optional
+    :return: The encoded functions.
+    :rtype: bytes
+    """
+    # label nodes in postorder over the shared DAG (children before parents).
+    # (one traversal, rather than one generate_ids call per function)
+    node_ids = {}
+    stack: list[Any] = list(reversed(fns))
+    last = None
+    while stack:
+        curr_node = stack[-1]
+
+        # dont interact with sentinel values
+        if curr_node is False:
+            last = stack.pop()
+            continue
+
+        # hitting a visited node while travelling down:
+        elif curr_node in node_ids:
+            last = stack.pop()
+            continue
+
+        # moving up the tree after finishing children or hitting a leaf:
+        elif last is False or curr_node.is_leaf():
+            node_ids[curr_node] = len(node_ids)
+            last = stack.pop()
+            continue
+
+        # before moving down to children:
+        else:
+            stack.append(False) # sentinel value
+            for child in reversed(curr_node.args):
+                stack.append(child)
+            continue
+    nodes = list(node_ids)
+
+    # encode the node records:
+    registry = {}
+    records = bytearray()
+    offsets = np.zeros(len(nodes), dtype = '<u8')
+    for node_id, node in enumerate(nodes):
+        offsets[node_id] = len(records)
+        kind = _node_kind(node)
+        class_index = registry.setdefault((kind, type(node).__name__), len(registry))
+        _write_varint(records, class_index)
+
+        if kind == _VAR:
+            _write_varint(records, _zigzag(node.index))
+        elif kind in (_CONST, _BOOL):
+            _write_varint(records, _zigzag(int(node.value)))
+        elif kind == _GATE:
+            _write_varint(records, 0 if node.arg_limit == None else node.arg_limit + 1)
+            _write_varint(records, len(node.args))
+            for arg in node.args:
+                _write_varint(records, _zigzag(node_id - node_ids[arg]))
+        else:
+            entry = node._generate_JSON_entry(node_ids)
+            _write_bytes(records, json.dumps(entry['data']).encode())
+
+    if cache_key == True:
+        # the records and the output ids (the same nodes in another order are other functions)
+        digest = hashlib.sha256(bytes(records))
+        digest.update(np.asarray([node_ids[fn] for fn in fns], dtype = '<u8').tobytes())
+        cache_key = digest.hexdigest()[:32]
+
+    # header:
+    output = bytearray(MAGIC)
+    _write_varint(output, len(registry))
+    for (kind, name) in registry:
+        output.append(kind)
+        _write_bytes(output, name.encode())
+
+    _write_varint(output, len(nodes))
+    _write_varint(output, len(fns))
+    for fn in fns:
+        _write_varint(output, node_ids[fn])
+
+    _write_bytes(output, (cache_key or "").encode())
+    _write_bytes(output, json.dumps(metadata).encode() if metadata != None else b"")
+
+    output += bytes(-len(output) % 8)
+    output += offsets.tobytes()
+    output += records
+    return bytes(output)
+
+
+class BinaryFunctionFile:
+    """Lazy reader for the binary format.
+
+    The header and offset table are read when the file is opened, but nodes are only
+    decoded when one of the stored functions is requested. Decoded nodes are cached,
+    so functions which share nodes still share them after loading. Files are memory
+    mapped, so opening a file does not read the node records.
+    """
+    def __init__(self, source: str | bytes):
+        """Open a file (or a bytes object) in the binary format.
+
+        :param source: A filename, or the output of `generate_binary`.
+        :type source: str | bytes
+        :raises ValueError: If the data does not start with the expected magic bytes.
+        """
+        self._file = None
+        if isinstance(source, (bytes, bytearray)):
+            self._data = source
+        else:
+            self._file = open(source, 'rb')
+            self._data = mmap.mmap(self._file.fileno(), 0, access = mmap.ACCESS_READ)
+
+        data = self._data
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not a PyPR binary function file")
+        pos = len(MAGIC)
+
+        num_classes, pos = _read_varint(data, pos)
+        classes = _subclass_registry()
+        self._registry = []
+        for _ in range(num_classes):
+            kind = data[pos]
+            length, pos = _read_varint(data, pos + 1)
+            name = bytes(data[pos:pos + length]).decode()
+            pos += length
+            if name not in classes:
+                raise TypeError(f"Type \'{name}\' is not a valid BooleanFunction")
+            self._registry.append((kind, classes[name]))
+
+        self.num_nodes, pos = _read_varint(data, pos)
+        num_outputs, pos = _read_varint(data, pos)
+        self.output_ids = []
+        for _ in range(num_outputs):
+            node_id, pos = _read_varint(data, pos)
+            self.output_ids.append(node_id)
+
+        length, pos = _read_varint(data, pos)
+        self.cache_key = bytes(data[pos:pos + length]).decode() or None
+        pos += length
+
+        length, pos = _read_varint(data, pos)
+        self.metadata = json.loads(bytes(data[pos:pos + length])) if length else None
+        pos += length
+
+        pos += -pos % 8
+        self._offsets = np.frombuffer(data, dtype = '<u8', count = self.num_nodes, offset = pos)
+        self._records_start = pos + 8 * self.num_nodes
+        self._nodes = {}
+
+    def __len__(self) -> int:
+        return len(self.output_ids)
+
+    def __getitem__(self, key: int) -> BooleanFunction:
+        return self.node(self.output_ids[key])
+
+    def __iter__(self) -> Iterator[BooleanFunction]:
+        return (self[i] for i in range(len(self)))
+
+    def __enter__(self) -> "BinaryFunctionFile":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying file. Functions which were already decoded are unaffected."""
+        if self._file != None:
+            self._offsets = None
+            self._data.close()
+            self._file.close()
+            self._file = None
+
+    def _read_record(self, node_id: int) -> tuple[int, type, int]:
+        pos = self._records_start + int(self._offsets[node_id])
+        class_index, pos = _read_varint(self._data, pos)
+        kind, cls = self._registry[class_index]
+        return kind, cls, pos
+
+    def _children(self, node_id: int) -> list[int]:
+        kind, _, pos = self._read_record(node_id)
+        if kind == _GATE:
+            _, pos = _read_varint(self._data, pos)
+            num_args, pos = _read_varint(self._data, pos)
+            children = []
+            for _ in range(num_args):
+                delta, pos = _read_varint(self._data, pos)
+                children.append(node_id - _unzigzag(delta))
+            return children
+        if kind == _JSON:
+            length, pos = _read_varint(self._data, pos)
+            return json.loads(bytes(self._data[pos:pos + length])).get('args', [])
+        return []
+
+    def _decode(self, node_id: int) -> BooleanFunction:
+        # assumes the children of the node were already decoded
+        kind, cls, pos = self._read_record(node_id)
+        node = object.__new__(cls)
+
+        if kind == _VAR:
+            index, pos = _read_varint(self._data, pos)
+            node.args = tuple()
+            node.arg_limit = 0
+            node.index = _unzigzag(index)
+        elif kind in (_CONST, _BOOL):
+            value, pos = _read_varint(self._data, pos)
+            node.args = tuple()
+            node.arg_limit = 0
+            node.value = _unzigzag(value) if kind == _CONST else bool(value)
+        elif kind == _GATE:
+            arg_limit, pos = _read_varint(self._data, pos)
+            num_args, pos = _read_varint(self._data, pos)
+            args = []
+            for _ in range(num_args):
+                delta, pos = _read_varint(self._data, pos)
+                args.append(self._nodes[node_id - _unzigzag(delta)])
+            node.args = tuple(args)
+            node.arg_limit = None if arg_limit == 0 else arg_limit - 1
+        else:
+            length, pos = _read_varint(self._data, pos)
+            object_data = json.loads(bytes(self._data[pos:pos + length]))
+            node = cls._parse_JSON_entry(object_data, self._nodes)
+        return node
+
+    def node(self, node_id: int) -> BooleanFunction:
+        """Decode a node (and any of its descendants which are not yet decoded).
+
+        :param node_id: The id of the node in the file.
+        :type node_id: int
+        :return: The decoded node.
+        :rtype: BooleanFunction
+        """
+        # postorder traversal over the undecoded part of the DAG:
+        stack: list[Any] = [node_id]
+        last = None
+        while stack:
+            curr_id = stack[-1]
+
+            # dont interact with sentinel values
+            if curr_id is False:
+                last = stack.pop()
+                continue
+
+            # hitting a decoded node while travelling down:
+            elif curr_id in self._nodes:
+                last = stack.pop()
+                continue
+
+            # moving up the tree after finishing children:
+            elif last is False:
+                self._nodes[curr_id] = self._decode(curr_id)
+                last = stack.pop()
+                continue
+
+            # before moving down to children:
+            else:
+                stack.append(False) # sentinel value
+                for child in reversed(self._children(curr_id)):
+                    stack.append(child)
+                continue
+
+        return self._nodes[node_id]
+
+
+class LazyFunctionList:
+    """A list-like view over the functions in a `BinaryFunctionFile`.
+
+    Functions are decoded the first time they are accessed, which allows a
+    FeedbackFunction to be loaded without decoding every bit.
+    """
+    def __init__(self, reader: BinaryFunctionFile):
+        self._reader = reader
+        self._overrides = {}
+
+    def __len__(self) -> int:
+        return len(self._reader)
+
+    def __getitem__(self, key: int | slice) -> Any:
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        if key in self._overrides:
+            return self._overrides[key]
+        return self._reader[key]
+
+    def __setitem__(self, key: int, value: BooleanFunction) -> None:
+        if key < 0:
+            key += len(self)
+        self._overrides[key] = value
+
+    def __iter__(self) -> Iterator[BooleanFunction]:
+        return (self[i] for i in range(len(self)))
+
+    def __add__(self, other: list[BooleanFunction]) -> list[BooleanFunction]:
+        return list(self) + list(other)
+
+
+def parse_binary(source: str | bytes) -> tuple[BooleanFunction, ...]:
+    """Decode all of the functions stored in the binary format.
+
+    This is the binary counterpart of `BooleanFunction.parse_JSON`.
+
+    :param source: A filename, or the output of `generate_binary`.
+    :type source: str | bytes
+    :return: The stored functions, in the order they were passed to `generate_binary`.
+    :rtype: tuple[BooleanFunction, ...]
+    """
+    with BinaryFunctionFile(source) as reader:
+        return tuple(reader)
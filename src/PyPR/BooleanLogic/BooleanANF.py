@@ -4,12 +4,14 @@ from collections.abc import Iterable
 from PyPR.BooleanLogic.BooleanFunction import BooleanFunction
 from PyPR.BooleanLogic.Gates import XOR, AND
 from PyPR.BooleanLogic.FunctionInputs import CONST, VAR
+from PyPR.BooleanLogic.Instrumentation import begin_pass, end_pass
 
 from itertools import product
 
 # A container class which can hold an BooleanANF of any hashable type
 # Note that this class is unordered, because it uses sets. 
 class BooleanANF:
+    __slots__ = ('terms',)
     terms: frozenset[frozenset[Any]]
 
     @classmethod
@@ -320,7 +322,11 @@ def translate_ANF(self: "BooleanFunction") -> "BooleanFunction":
     :return: A BooleanFunction which models an ANF equation.
     :rtype: BooleanFunction
     """
-    return BooleanANF.from_BooleanFunction(self).to_BooleanFunction()
+    record = begin_pass('translate_ANF')
+    anf = BooleanANF.from_BooleanFunction(self).to_BooleanFunction()
+    if record:
+        end_pass(record, allocations = len(anf.args))
+    return anf
 BooleanFunction.translate_ANF = translate_ANF
 
 def from_ANF(cls, nested_iterable: Any) -> "BooleanFunction": 
@@ -2,20 +2,39 @@
 # DOCSTRINGS: FALSE
 
 from typing import Self, Optional, Any, Protocol
-from collections.abc import Iterator
-
-# njit actually used (in compile) even if greyed out
-from numba import njit
+from collections.abc import Iterator, Iterable
 
 import json
+import weakref
+
+from PyPR.BooleanLogic.Instrumentation import begin_pass, end_pass
+
+# Data which only a few nodes have is kept out of the nodes themselves, in side
+# tables which don't keep the nodes alive: compiled functions, and arg limits
+# which differ from the default of the node's class.
+_compiled_functions: "weakref.WeakKeyDictionary[BooleanFunction, Any]" = weakref.WeakKeyDictionary()
+_arg_limits: "weakref.WeakKeyDictionary[BooleanFunction, Optional[int]]" = weakref.WeakKeyDictionary()
+
+# marks a node whose args are stored as a tuple in _arg0 (rather than inline)
+_VARIADIC = object()
 
 
 class IndexableContainer[K,V](Protocol):
     def __getitem__(self, key: K, /) -> V: ...
 
 class BooleanFunction:
-    args: tuple["BooleanFunction", ...]
-    arg_limit: Optional[int]
+    # Nodes use slots instead of an instance __dict__, since large DAGs can have
+    # millions of them. Subclasses should declare their own fields in `__slots__`
+    # (or `__slots__ = ()` if they have none); subclasses which don't still work,
+    # but get a __dict__ back.
+    #
+    # The args of two argument gates (most of the gates in a typical DAG) are
+    # stored inline in _arg0 and _arg1, so they don't need a tuple of their own.
+    # Other nodes keep a tuple in _arg0. arg_limit is a class attribute, which
+    # can be overridden per node, and compiled functions are kept in a side
+    # table (see above).
+    __slots__ = ('_arg0', '_arg1', '__weakref__')
+    _default_arg_limit: Optional[int] = None
 
     def __init__(self,
         *args: "BooleanFunction",
@@ -23,6 +42,56 @@ class BooleanFunction:
     ):
         self.args = args
         self.arg_limit = arg_limit
+
+    @property
+    def args(self) -> tuple["BooleanFunction", ...]:
+        second = self._arg1
+        if second is _VARIADIC:
+            return self._arg0
+        return (self._arg0, second)
+
+    @args.setter
+    def args(self, args: Iterable["BooleanFunction"]) -> None:
+        args = tuple(args)
+        if len(args) == 2:
+            self._arg0, self._arg1 = args
+        else:
+            self._arg0 = args
+            self._arg1 = _VARIADIC
+
+    @property
+    def arg_limit(self) -> Optional[int]:
+        # (the table is nearly always empty, so skip making a weakref)
+        if _arg_limits:
+            return _arg_limits.get(self, type(self)._default_arg_limit)
+        return type(self)._default_arg_limit
+
+    @arg_limit.setter
+    def arg_limit(self, arg_limit: Optional[int]) -> None:
+        if arg_limit == type(self)._default_arg_limit:
+            if _arg_limits:
+                _arg_limits.pop(self, None)
+        else:
+            _arg_limits[self] = arg_limit
+
+    @property
+    def _compiled(self) -> Any:
+        try:
+            return _compiled_functions[self]
+        except KeyError:
+            raise AttributeError(f"{type(self).__name__} object has not been compiled") from None
+
+    @_compiled.setter
+    def _compiled(self, compiled: Any) -> None:
+        _compiled_functions[self] = compiled
+
+    # pickle the fields rather than the slots (which can hold the _VARIADIC marker)
+    def __getstate__(self) -> dict[str, Any]:
+        return self._fields()
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        for key, value in state.items():
+            setattr(self, key, value)
     
     @classmethod
     def _copy(cls, 
@@ -158,6 +227,9 @@ class BooleanFunction:
         :returns subfunctions: A topologically sorted list of BooleanFunction 
             which are referenced by multiple parents
         """
+        record = begin_pass('subfunctions')
+        hits = peak = 0
+
         subfuncs = []
         visited = set()
         stack: list[Any] = [self]
@@ -179,6 +251,7 @@ class BooleanFunction:
             elif curr_node in visited and not curr_node.is_leaf():
                 if curr_node not in subfuncs:
                     subfuncs.append(curr_node)
+                hits += 1
                 last=stack.pop()
                 continue
 
@@ -206,7 +279,10 @@ class BooleanFunction:
                 for child in reversed(curr_node.args):
                     stack.append(child)
                     continue
+                if len(stack) > peak: peak = len(stack)
 
+        if record:
+            end_pass(record, len(visited), hits, peak)
         return sorted(subfuncs, key = lambda x: order[x])
 
     def inputs(self) -> list["BooleanFunction"]:
@@ -1123,6 +1199,9 @@ class BooleanFunction:
         :return: A BooleanFunction with the indices remapped.
         :rtype: BooleanFunction
         """    
+        record = begin_pass('compose')
+        hits = peak = 0
+
         new_nodes = {}
         stack: list[Any] = [self]
         last = None
@@ -1137,6 +1216,7 @@ class BooleanFunction:
 
             # hitting a visited node while travelling down:
             if curr_node in new_nodes:
+                hits += 1
                 last=stack.pop()
                 continue
 
@@ -1166,7 +1246,11 @@ class BooleanFunction:
                 for child in reversed(curr_node.args):
                     stack.append(child)
                     continue
+                if len(stack) > peak: peak = len(stack)
 
+        if record:
+            allocations = sum(1 for old, new in new_nodes.items() if new is not old)
+            end_pass(record, len(new_nodes), hits, peak, allocations)
         return new_nodes[self]
    
     def _merge_redundant(self,
@@ -1228,6 +1312,9 @@ class BooleanFunction:
         :return: A reduced and simplified version of the input function.
         :rtype: BooleanFunction
         """        
+        record = begin_pass('merge_redundant')
+        hits = peak = 0
+
         subfunctions = self.subfunctions()
 
         new_nodes = {}
@@ -1244,6 +1331,7 @@ class BooleanFunction:
 
             # hitting a visited node while travelling down:
             if curr_node in new_nodes:
+                hits += 1
                 last=stack.pop()
                 continue
 
@@ -1254,6 +1342,8 @@ class BooleanFunction:
                 new_nodes[curr_node] = curr_node._merge_redundant(
                     new_nodes, subfunctions, in_place = in_place,
                 )
+                last = stack.pop()
+                continue
 
             # hitting a leaf:
             elif curr_node.is_leaf():
@@ -1268,7 +1358,11 @@ class BooleanFunction:
                 for child in reversed(curr_node.args):
                     stack.append(child)
                     continue
+                if len(stack) > peak: peak = len(stack)
 
+        if record:
+            allocations = sum(1 for old, new in new_nodes.items() if new is not old)
+            end_pass(record, len(new_nodes), hits, peak, allocations)
         return new_nodes[self]
 
     # evaluation
@@ -1379,6 +1473,9 @@ class BooleanFunction:
         :return: The value of the functions evaluation at this node.
         :rtype: Any
         """
+        record = begin_pass('eval_ANF')
+        hits = peak = 0
+
         values = {}
         stack: list[Any] = [self]
         last = None
@@ -1393,6 +1490,7 @@ class BooleanFunction:
 
             # hitting a visited node while travelling down:
             elif curr_node in values:
+                hits += 1
                 last=stack.pop()
                 continue
 
@@ -1418,7 +1516,11 @@ class BooleanFunction:
                 for child in reversed(curr_node.args):
                     stack.append(child)
                     continue
+                if len(stack) > peak: peak = len(stack)
 
+        if record:
+            # every value is a new object, except for inputs passed through
+            end_pass(record, len(values), hits, peak, len({id(v) for v in values.values()}))
         return values[self]     
 
     def compile(self) -> Any:
@@ -1437,6 +1539,9 @@ class BooleanFunction:
             applications.
         :rtype: Any
         """        
+        # numba is only imported when first needed, since importing it is slow
+        from numba import njit
+
         self._compiled = None
         python_body = "\n    ".join(self.generate_python())
 
@@ -1628,11 +1733,13 @@ self._compiled = _compiled
             dict[int,int]
         ]
         """    
-        raise NotImplementedError  # defined in SAT.py
+        import PyPR.BooleanLogic.SAT # defined in SAT.py, which replaces this method
+        return self.tseytin(prev_clauses, prev_node_labels, prev_variable_labels)
 
     def tseytin_labels(self,
         node_labels: dict["BooleanFunction", list[int]] |None = None,
-        variable_labels: dict[int,int] | None = None
+        variable_labels: dict[int,int] | None = None,
+        next_index: int | None = None
     ) -> tuple[
         dict["BooleanFunction", list[int]],
         dict[int,int]
@@ -1674,13 +1781,18 @@ self._compiled = _compiled
             variables in the sat solver. This can be used to convert the sat solution back to a satisfying
             assignment of input variables, or to impose additional conditions based on extra information.
         :type prev_variable_labels: dict[int,int]
+        :param next_index: The first free solver variable, when continuing from previous
+            labels. Defaults to one more than the largest previous label, which takes a
+            pass over the previous labels.
+        :type next_index: int | None, optional
         :return: (Node Labels, Variable Labels)
         :rtype: tuple[
             dict[BooleanFunction,list[int]],
             dict[int,int]
         ]
         """
-        raise NotImplementedError  # defined in SAT.py
+        import PyPR.BooleanLogic.SAT # defined in SAT.py, which replaces this method
+        return self.tseytin_labels(node_labels, variable_labels, next_index)
     
     def tseytin_clauses(self, 
         label_map: dict["BooleanFunction", list[int]]
@@ -1701,11 +1813,14 @@ self._compiled = _compiled
         :return: clauses which encode the given function for a sat solver.
         :rtype: list[tuple[int]],
         """
-        raise NotImplementedError  # defined in SAT.py
+        import PyPR.BooleanLogic.SAT # defined in SAT.py, which replaces this method
+        return self.tseytin_clauses(label_map)
     
     def sat(self, 
         solver_name: str = "cadical195",
         verbose: bool = False, 
+        portfolio: bool | Iterable[str | tuple[str, int]] | None = None,
+        time_limit: float | None = None
     ) -> dict[int,bool] | None:
         """Solve the SAT problem for a given BooleanFunction
 
@@ -1723,13 +1838,24 @@ self._compiled = _compiled
         :type solver_name: str, optional
         :param verbose: if True, print statistics and timings for debugging, defaults to False
         :type verbose: bool, optional
+        :param portfolio: If `True`, race the configurations of `DEFAULT_PORTFOLIO` in worker
+            processes (one per CPU) and take the first answer, see `solve_portfolio`. A list
+            of solver names or (solver name, seed) pairs races those instead, and `False` always
+            uses a single solver. Defaults to None, which races `solver_name` and the default
+            portfolio when there is more than one CPU, the encoding has at least
+            `AUTO_PORTFOLIO_CLAUSES` clauses, and the workers can be forked (`fork_is_safe`).
+        :type portfolio: bool | Iterable[str | tuple[str, int]] | None, optional
+        :param time_limit: The most time to spend solving, in seconds, defaults to None (no limit)
+        :type time_limit: float | None, optional
+        :raises TimeoutError: If the time limit was reached before an answer.
 
         :return: if the function is unsatisfiable, return None. otherwise, returns a dictionary
             which maps variables to their boolean values in a satisfying assignment. Any variables 
             which don't appear in the dict are "don't care" .
         :rtype: dict[int,bool] | None
         """
-        raise NotImplementedError  # defined in SAT.py
+        import PyPR.BooleanLogic.SAT # defined in SAT.py, which replaces this method
+        return self.sat(solver_name, verbose, portfolio, time_limit)
     
     def enum_models(self, 
         solver_name: str = 'cadical195', 
@@ -1760,10 +1886,65 @@ self._compiled = _compiled
             assignment. Any variables which don't appear in the dict are "don't care".
         :rtype: dict[int,bool] | None
         """
-        raise NotImplementedError # defined in SAT.py
+        import PyPR.BooleanLogic.SAT # defined in SAT.py, which replaces this method
+        return self.enum_models(solver_name, verbose)
+
+    def enum_projected(self,
+        variables: list[int] | None = None,
+        assumptions: dict[int, bool] | None = None,
+        minimize: bool = True,
+        solver_name: str = "cadical195"
+    ) -> Iterator[tuple[Any, Any]]:
+        """Enumerate the satisfying assignments of the function, projected onto some input variables.
+
+        Models are only blocked on the projection variables, and with `minimize` each
+        model is shrunk to a cube using an unsat core, so one solver call can cover many
+        assignments. The cubes are disjoint, and are returned as packed bit arrays
+        `(care, values)`; see `enumerate_projected` in SAT.py and `unpack_cube`.
+
+        :param variables: The projection variables, defaults to every input variable of
+            the function, in sorted order.
+        :type variables: list[int] | None, optional
+        :param assumptions: A dict mapping input variables to fixed values, defaults to None
+        :type assumptions: dict[int, bool] | None, optional
+        :param minimize: If `True`, shrink each model to a cube, defaults to True
+        :type minimize: bool, optional
+        :param solver_name: A string giving the name of a sat solver provided by PySAT,
+            defaults to "cadical195"
+        :type solver_name: str, optional
+        :return: An iterator over disjoint cubes which cover the projected satisfying assignments.
+        :rtype: Iterator[tuple[np.ndarray, np.ndarray]]
+        """
+        import PyPR.BooleanLogic.SAT # defined in SAT.py, which replaces this method
+        return self.enum_projected(variables, assumptions, minimize, solver_name)
+
+    def count_projected(self,
+        variables: list[int] | None = None,
+        assumptions: dict[int, bool] | None = None,
+        solver_name: str = "cadical195"
+    ) -> int:
+        """Count the satisfying assignments of the function, projected onto some input variables.
+
+        :param variables: The projection variables, defaults to every input variable of
+            the function.
+        :type variables: list[int] | None, optional
+        :param assumptions: A dict mapping input variables to fixed values, defaults to None
+        :type assumptions: dict[int, bool] | None, optional
+        :param solver_name: A string giving the name of a sat solver provided by PySAT,
+            defaults to "cadical195"
+        :type solver_name: str, optional
+        :return: The number of assignments of the projection variables which can be
+            extended to a satisfying assignment.
+        :rtype: int
+        """
+        import PyPR.BooleanLogic.SAT # defined in SAT.py, which replaces this method
+        return self.count_projected(variables, assumptions, solver_name)
 
     def functionally_equivalent(self,
-        other: "BooleanFunction"
+        other: "BooleanFunction",
+        portfolio: bool | Iterable[str | tuple[str, int]] | None = None,
+        time_limit: float | None = None,
+        fraig: bool = False
     ) -> bool:
         """Determines if two functions have the same truth table.
 
@@ -1774,11 +1955,106 @@ self._compiled = _compiled
         or infeasible task.
 
         :param BooleanFunction other: the function to compare to.         
+        :param portfolio: If `True` (or a list of configurations), solve with a portfolio
+            of solvers in worker processes, as in `sat`. Defaults to None, which uses a
+            portfolio for large instances on machines with more than one CPU, when the
+            workers can be forked.
+        :type portfolio: bool | Iterable[str | tuple[str, int]] | None, optional
+        :param time_limit: The most time to spend solving, in seconds, defaults to None (no limit)
+        :type time_limit: float | None, optional
+        :raises TimeoutError: If the time limit was reached before an answer.
+        :param fraig: If `True`, simulate both functions and prove their internal
+            equivalences first (see `fraig_equivalent`), which is much faster for
+            functions with similar structure, defaults to False
+        :type fraig: bool, optional
         
         :return equivalent: A boolean representing whether or not the two functions 
             have the same truth table.
         """   
-        raise NotImplementedError # defined in SAT.py
+        import PyPR.BooleanLogic.SAT # defined in SAT.py, which replaces this method
+        return self.functionally_equivalent(other, portfolio, time_limit, fraig)
+
+    def sat_session(self,
+        solver_name: str = "cadical195"
+    ) -> Any:
+        """Start a persistent SAT session with this function encoded.
+
+        Unlike `sat`, the session keeps its solver and encoding, so many related queries
+        (e.g. under different assumptions, or about functions which share nodes) each
+        cost a solve call instead of a new encoding and solver. See `SATSession`.
+
+        :param solver_name: A string giving the name of a sat solver provided by PySAT,
+            defaults to "cadical195"
+        :type solver_name: str, optional
+        :return: The session.
+        :rtype: SATSession
+        """
+        import PyPR.BooleanLogic.SAT # defined in SAT.py, which replaces this method
+        return self.sat_session(solver_name)
+
+    # Methods from CNFEncoding.py
+    def cnf_encoding(self,
+        cut_size: int = 4,
+        native_xor: bool = False
+    ) -> Any:
+        """Build an XOR-aware CNF encoding of the function.
+
+        Compared to `tseytin`, the encoding maps negations to negated literals,
+        folds constants and repeated arguments into the gates, and encodes long XORs
+        as constraints which are cut into chunks (or kept separate, for solvers with
+        native XOR support). See `CNFEncoding`.
+
+        :param cut_size: The largest number of variables in a single XOR constraint
+            expanded to clauses, defaults to 4
+        :type cut_size: int, optional
+        :param native_xor: If `True`, keep XOR constraints separate from the clauses,
+            defaults to False
+        :type native_xor: bool, optional
+        :return: The encoding.
+        :rtype: CNFEncoding
+        """
+        from PyPR.BooleanLogic.CNFEncoding import CNFEncoding
+        return CNFEncoding(self, cut_size = cut_size, native_xor = native_xor)
+
+    # Methods from BDD.py
+    def to_BDD(self,
+        manager: Any = None
+    ) -> Any:
+        """Build a reduced ordered BDD of the function.
+
+        This is equivalent to `manager.from_BooleanFunction(fn)`. Since BDDs are
+        canonical for a fixed variable order, BDDs from the same manager can be
+        checked for equivalence in constant time, and their satisfying assignments
+        can be counted without a SAT solver.
+
+        :param manager: The `BDDManager` to build the BDD in, defaults to a new manager.
+        :type manager: BDDManager | None, optional
+        :return: The BDD of the function.
+        :rtype: BDD
+        """
+        from PyPR.BooleanLogic.BDD import BDDManager
+        if manager == None:
+            manager = BDDManager()
+        return manager.from_BooleanFunction(self)
+
+    # Methods from Spectrum.py
+    def walsh_spectrum(self,
+        variables: list[int] | None = None
+    ) -> Any:
+        """Compute the Walsh-Hadamard spectrum of the function (up to 32 variables).
+
+        The spectrum gives the nonlinearity, correlation immunity, resiliency, best
+        linear approximations and autocorrelation of the function without a SAT
+        solver or an ANF; see `WalshSpectrum`.
+
+        :param variables: The variables of the spectrum, defaults to the variables
+            used by the function, in sorted order.
+        :type variables: list[int] | None, optional
+        :return: The spectrum of the function.
+        :rtype: WalshSpectrum
+        """
+        from PyPR.BooleanLogic.Spectrum import WalshSpectrum
+        return WalshSpectrum.from_BooleanFunction(self, variables)
 
     # Storage
     def generate_ids(self,
@@ -1843,6 +2119,25 @@ self._compiled = _compiled
 
         return node_labels
     
+    def _fields(self) -> dict[str, Any]:
+        """Collect the data fields of a node into a dict.
+
+        This is the slots-aware equivalent of `self.__dict__`: it contains `args` and
+        `arg_limit`, every slot which is set on the node (from the subclasses of
+        BooleanFunction), along with the contents of the node's `__dict__` if it has one.
+
+        :return: A new dict which maps each field name to its value.
+        :rtype: dict[str, Any]
+        """
+        fields = {'args': self.args, 'arg_limit': self.arg_limit}
+        for cls in reversed(type(self).__mro__[:type(self).__mro__.index(BooleanFunction)]):
+            slots = cls.__dict__.get('__slots__', ())
+            for name in (slots,) if isinstance(slots, str) else slots:
+                if name not in ('__dict__', '__weakref__') and hasattr(self, name):
+                    fields[name] = getattr(self, name)
+        fields.update(getattr(self, '__dict__', {}))
+        return fields
+
     def _generate_JSON_entry(self,
         node_ids: dict["BooleanFunction", int]
     ) -> dict[str, Any]:
@@ -1864,7 +2159,7 @@ self._compiled = _compiled
         # copy class name and non-nested data
         JSON_object = {
             'class': type(self).__name__,
-            'data': self.__dict__.copy()
+            'data': self._fields()
         }
 
         # recurse on any children/nested data:
@@ -2016,17 +2311,17 @@ self._compiled = _compiled
         json_node_list = json_object["Node Data"]
         num_nodes = len(json_node_list)
         parsed_functions: list[Any] = [None for i in range(num_nodes)]
+
+        # look up subclasses by name once, rather than for every node
+        subclasses = {subcls.__name__: subcls for subcls in cls.__subclasses__()}
         for node_id in range(num_nodes):
             node_data = json_node_list[node_id]
             
             # create information for the python object for this node
-            object_class = None
             object_data = node_data['data']
 
             # find the appropriate subclass of BooleanFunction for the node
-            for subcls in cls.__subclasses__():
-                if subcls.__name__ == node_data['class']:
-                    object_class = subcls
+            object_class = subclasses.get(node_data['class'])
 
             # throw a better error if no class found
             if object_class == None:
@@ -0,0 +1,438 @@
+# TYPE ANNOTATIONS: TRUE
+# DOCSTRINGS: TRUE
+
+from typing import Any
+from collections.abc import Iterable
+from itertools import product
+
+from PyPR.BooleanLogic.BooleanFunction import BooleanFunction
+from PyPR.BooleanLogic.Gates import XOR, AND, OR, XNOR, NAND, NOR, NOT
+from PyPR.BooleanLogic.FunctionInputs import VAR, CONST
+from PyPR.BooleanLogic.Instrumentation import begin_pass, end_pass
+from PyPR.BooleanLogic.CNFWriter import ClauseSink, DIMACSWriter
+
+import json
+
+
+class CNFEncoding:
+    """An XOR-aware CNF encoding of one or more BooleanFunctions.
+
+    Like `tseytin`, every input variable gets a solver variable (shared between all
+    of the encoded functions), and solver variable 1 is the constant true. Unlike
+    `tseytin`, nodes are mapped to *literals* rather than to new variables, which
+    simplifies the encoding as it is built:
+
+    - NOT gates, negated gates (XNOR, NAND, NOR) and negated inputs don't need new
+      variables, since they are negated literals.
+    - Constants are folded into the gates, repeated XOR arguments cancel, repeated
+      AND/OR arguments are removed, and gates with a single remaining argument are
+      the literal of that argument.
+    - Gates of the same type over the same literals are only encoded once.
+
+    Long XOR gates are encoded as XOR constraints. With `native_xor`, these are
+    kept in `xors` (e.g. for solvers with Gauss-Jordan elimination, through the
+    `x` lines of `to_dimacs`). Otherwise they are cut into chunks of at most
+    `cut_size` variables linked by auxiliary variables, and each chunk is expanded
+    into its `2**(cut_size-1)` clauses, so an XOR of `k` variables costs about
+    `k / (cut_size - 2)` chunks instead of a chain of `k - 1` three-variable XORs.
+
+    With a `sink` (see `CNFWriter`), clauses (and native XORs) are passed to the sink
+    as they are generated instead of being kept in `clauses`, so large instances can
+    be fed straight into a solver or written to a file without ever being held in
+    memory. For example:
+    ```python
+    with DIMACSWriter("instance.cnf") as sink:
+        encoding = CNFEncoding(sink = sink)
+        outputs = [encoding.encode(fn) for fn in fns]
+        encoding.write_variable_map("instance.json", outputs)
+    ```
+    """
+    cut_size: int
+    native_xor: bool
+    clauses: list[tuple[int, ...]]
+    xors: list[tuple[tuple[int, ...], int]]
+    node_literals: dict[BooleanFunction, int]
+    variable_labels: dict[int, int]
+    next_index: int
+    sink: ClauseSink | None
+
+    def __init__(self,
+        *fns: BooleanFunction,
+        cut_size: int = 4,
+        native_xor: bool = False,
+        sink: ClauseSink | None = None
+    ):
+        """Create an encoding, and encode any given functions.
+
+        :param fns: Functions to encode right away (without asserting anything about them).
+        :type fns: BooleanFunction
+        :param cut_size: The largest number of variables in a single XOR constraint
+            expanded to clauses (at least 3), defaults to 4
+        :type cut_size: int, optional
+        :param native_xor: If `True`, keep XOR constraints in `xors` instead of
+            expanding them to clauses, defaults to False
+        :type native_xor: bool, optional
+        :param sink: A sink to stream the clauses to, instead of keeping them in
+            `clauses`, defaults to None
+        :type sink: ClauseSink | None, optional
+        :raises ValueError: If `cut_size` is less than 3, or `native_xor` is used with
+            a sink which doesn't support XOR constraints.
+        """
+        if cut_size < 3:
+            raise ValueError("The cut size must be at least 3")
+        if native_xor and sink != None and not sink.supports_xor:
+            raise ValueError(f"{type(sink).__name__} does not support XOR constraints")
+        self.cut_size = cut_size
+        self.native_xor = native_xor
+        self.sink = sink
+        self.clauses = []
+        self._add_clause((1,))
+        self.xors = []
+        self.node_literals = {}
+        self.variable_labels = {}
+        self.next_index = 2
+        self._gates: dict[tuple[Any, ...], int] = {}
+        for fn in fns:
+            self.encode(fn)
+
+    @property
+    def num_vars(self) -> int:
+        """The number of solver variables used."""
+        return self.next_index - 1
+
+    @property
+    def num_clauses(self) -> int:
+        """The number of clauses (and native XOR constraints) generated so far."""
+        if self.sink != None:
+            return self.sink.num_clauses
+        return len(self.clauses) + len(self.xors)
+
+    def new_variable(self) -> int:
+        """Allocate a fresh solver variable.
+
+        :return: The solver variable.
+        :rtype: int
+        """
+        self.next_index += 1
+        return self.next_index - 1
+
+    def variable(self, index: int) -> int:
+        """Return the solver variable of an input variable, allocating one if needed.
+
+        :param index: The index of the input variable (as in `VAR(index)`).
+        :type index: int
+        :return: The solver variable.
+        :rtype: int
+        """
+        if index not in self.variable_labels:
+            self.variable_labels[index] = self.new_variable()
+        return self.variable_labels[index]
+
+    def _add_clause(self, clause: tuple[int, ...]) -> None:
+        if self.sink != None:
+            self.sink.add_clause(clause)
+        else:
+            self.clauses.append(clause)
+
+    # XOR constraints
+    def _xor_clauses(self, variables: list[int], rhs: int, out: list[tuple[int, ...]]) -> None:
+        # forbid every assignment with the wrong parity
+        for signs in product((0, 1), repeat = len(variables)):
+            if sum(signs) % 2 != rhs:
+                out.append(tuple(-v if s else v for v, s in zip(variables, signs)))
+
+    def add_xor(self, variables: Iterable[int], rhs: int = 1) -> None:
+        """Add the constraint that the XOR of solver variables is `rhs`.
+
+        :param variables: The solver variables (positive).
+        :type variables: Iterable[int]
+        :param rhs: The value of the XOR, defaults to 1
+        :type rhs: int, optional
+        """
+        variables = list(variables)
+        if self.native_xor and self.sink != None:
+            self.sink.add_xor(variables, rhs)
+        elif self.native_xor:
+            self.xors.append((tuple(variables), rhs))
+        else:
+            for clause in self._cut(variables, rhs):
+                self._add_clause(clause)
+
+    def _cut(self, variables: list[int], rhs: int) -> list[tuple[int, ...]]:
+        # split the constraint into chunks linked by auxiliary variables:
+        # x1 ^ ... ^ x(c-1) ^ t = 0, then t ^ x(c) ^ ... = rhs, and so on
+        clauses: list[tuple[int, ...]] = []
+        while len(variables) > self.cut_size:
+            link = self.new_variable()
+            self._xor_clauses(variables[:self.cut_size - 1] + [link], 0, clauses)
+            variables = [link] + variables[self.cut_size - 1:]
+        self._xor_clauses(variables, rhs, clauses)
+        return clauses
+
+    # Gates
+    def _xor(self, lits: list[int], parity: int) -> int:
+        remaining: dict[int, None] = {}
+        for lit in lits:
+            if lit == 1 or lit == -1:
+                parity ^= (lit == 1)
+                continue
+            if lit < 0:
+                parity ^= 1
+                lit = -lit
+            if lit in remaining:
+                del remaining[lit]
+            else:
+                remaining[lit] = None
+
+        if not remaining:
+            return 1 if parity else -1
+        elif len(remaining) == 1:
+            out = next(iter(remaining))
+        else:
+            key = ('xor',) + tuple(sorted(remaining))
+            if key not in self._gates:
+                out = self.new_variable()
+                self.add_xor(list(remaining) + [out], 0)
+                self._gates[key] = out
+            out = self._gates[key]
+        return -out if parity else out
+
+    def _and(self, lits: list[int]) -> int:
+        remaining: dict[int, None] = {}
+        for lit in lits:
+            if lit == -1 or -lit in remaining:
+                return -1
+            elif lit != 1:
+                remaining[lit] = None
+
+        if not remaining:
+            return 1
+        elif len(remaining) == 1:
+            return next(iter(remaining))
+
+        key = ('and',) + tuple(sorted(remaining))
+        if key not in self._gates:
+            out = self.new_variable()
+            for lit in remaining:
+                self._add_clause((-out, lit))
+            self._add_clause((out,) + tuple(-lit for lit in remaining))
+            self._gates[key] = out
+        return self._gates[key]
+
+    def _gate(self, node: BooleanFunction) -> int:
+        cls = type(node)
+        lits = [self.node_literals[arg] for arg in node.args]
+        if cls == NOT:
+            return -lits[0]
+        elif cls in (XOR, XNOR):
+            return self._xor(lits, int(cls == XNOR))
+        elif cls in (AND, NAND):
+            out = self._and(lits)
+            return -out if cls == NAND else out
+        elif cls in (OR, NOR):
+            out = -self._and([-lit for lit in lits])
+            return -out if cls == NOR else out
+
+        # other gates use their own tseytin encoding
+        labels = [self.new_variable() for _ in range(max(1, len(lits) - 1))]
+        for clause in cls.tseytin_unroll(labels, lits):
+            self._add_clause(clause)
+        return labels[-1]
+
+    def _leaf(self, node: BooleanFunction) -> int:
+        if type(node) == VAR:
+            return self.variable(node.index)
+        elif type(node) == CONST and node.value in (0, 1):
+            return 1 if node.value else -1
+        raise ValueError(f"Unable to encode leaf {node}")
+
+    def encode(self, fn: BooleanFunction) -> int:
+        """Encode a function, if it isn't already, and return the literal of its output.
+
+        :param fn: The function to encode.
+        :type fn: BooleanFunction
+        :raises ValueError: If the function has a constant other than 0 or 1.
+        :return: A solver literal which is true exactly when the function is (1 or
+            -1 if the function simplified to a constant).
+        :rtype: int
+        """
+        record = begin_pass('CNFEncoding.encode')
+        num_clauses = self.num_clauses
+        num_prev_nodes = len(self.node_literals)
+
+        stack: list[Any] = [fn]
+        last = None
+        while stack:
+            curr_node = stack[-1]
+
+            # dont interact with sentinel values
+            if curr_node is False:
+                last = stack.pop()
+                continue
+
+            # hitting a visited node while travelling down:
+            elif curr_node in self.node_literals:
+                last = stack.pop()
+                continue
+
+            # hitting a leaf:
+            elif curr_node.is_leaf():
+                self.node_literals[curr_node] = self._leaf(curr_node)
+                last = stack.pop()
+                continue
+
+            # moving up the tree after finishing children:
+            elif last is False:
+                self.node_literals[curr_node] = self._gate(curr_node)
+                last = stack.pop()
+                continue
+
+            # before moving down to children:
+            else:
+                stack.append(False) # sentinel value
+                for child in reversed(curr_node.args):
+                    stack.append(child)
+                continue
+
+        if record:
+            end_pass(
+                record, len(self.node_literals) - num_prev_nodes,
+                allocations = self.num_clauses - num_clauses
+            )
+        return self.node_literals[fn]
+
+    def assert_value(self, fn: BooleanFunction, value: bool = True) -> None:
+        """Encode a function and constrain it to a value.
+
+        :param fn: The function.
+        :type fn: BooleanFunction
+        :param value: The value it must have, defaults to True
+        :type value: bool, optional
+        """
+        lit = self.encode(fn)
+        self._add_clause((lit if value else -lit,))
+
+    # Output
+    def _check_stored(self) -> None:
+        if self.sink != None:
+            raise ValueError("The clauses of this encoding were streamed to its sink")
+
+    def variable_map(self, outputs: Iterable[int] | None = None) -> dict[str, Any]:
+        """The information needed to interpret the solver variables of the encoding.
+
+        :param outputs: Literals to record (e.g. the output literals of the encoded
+            functions), defaults to None
+        :type outputs: Iterable[int] | None, optional
+        :return: A dict with the number of variables and clauses, the map from input
+            variable indices to solver variables ('variables'), the output literals,
+            and the encoding parameters.
+        :rtype: dict[str, Any]
+        """
+        return {
+            'num vars': self.num_vars,
+            'num clauses': self.num_clauses,
+            'variables': dict(self.variable_labels),
+            'outputs': list(outputs) if outputs != None else [],
+            'cut size': self.cut_size,
+            'native xor': self.native_xor,
+        }
+
+    def write_variable_map(self, path: str, outputs: Iterable[int] | None = None) -> None:
+        """Write `variable_map` to a JSON file (read it back with `read_variable_map`).
+
+        If the encoding has a sink which is still open, its variable count is raised to
+        include every allocated variable, so the header agrees with the map.
+
+        :param path: The path of the JSON file.
+        :type path: str
+        :param outputs: Literals to record, defaults to None
+        :type outputs: Iterable[int] | None, optional
+        """
+        if self.sink != None:
+            self.sink.num_vars = max(self.sink.num_vars, self.num_vars)
+        with open(path, 'w') as f:
+            json.dump(self.variable_map(outputs), f)
+
+    def to_clauses(self) -> list[tuple[int, ...]]:
+        """All of the constraints as clauses, with any native XORs cut and expanded.
+
+        :raises ValueError: If the clauses were streamed to a sink.
+        :return: The clauses (auxiliary variables for the XORs are allocated as needed).
+        :rtype: list[tuple[int, ...]]
+        """
+        self._check_stored()
+        clauses = list(self.clauses)
+        for variables, rhs in self.xors:
+            clauses += self._cut(list(variables), rhs)
+        return clauses
+
+    def to_dimacs(self) -> str:
+        """Write the encoding in DIMACS format.
+
+        Native XOR constraints are written as `x` lines (the extended format read by
+        CryptoMiniSat), where `x1 -2 3 0` means `v1 ^ ~v2 ^ v3` is true.
+
+        :raises ValueError: If the clauses were streamed to a sink.
+        :return: The DIMACS text.
+        :rtype: str
+        """
+        self._check_stored()
+        lines = [f"p cnf {self.num_vars} {len(self.clauses) + len(self.xors)}"]
+        lines += [" ".join(map(str, clause)) + " 0" for clause in self.clauses]
+        for variables, rhs in self.xors:
+            lits = list(variables)
+            if rhs == 0:
+                lits[0] = -lits[0]
+            lines.append("x" + " ".join(map(str, lits)) + " 0")
+        return "\n".join(lines) + "\n"
+
+    def write_dimacs(self, path: str, binary: bool = False) -> None:
+        """Write the encoding to a file with a `DIMACSWriter`, without building the text
+        in memory (as `to_dimacs` does).
+
+        :param path: The path of the output file.
+        :type path: str
+        :param binary: If `True`, write the binary CNF format (native XORs are cut and
+            expanded), defaults to False
+        :type binary: bool, optional
+        :raises ValueError: If the clauses were streamed to a sink.
+        """
+        self._check_stored()
+        with DIMACSWriter(path, binary) as writer:
+            writer.add_clauses(self.clauses)
+            for variables, rhs in self.xors:
+                if binary:
+                    writer.add_clauses(self._cut(list(variables), rhs))
+                else:
+                    writer.add_xor(variables, rhs)
+            writer.num_vars = max(writer.num_vars, self.num_vars)
+
+    def solve(self,
+        assumptions: dict[int, bool] | None = None,
+        solver_name: str = "cadical195"
+    ) -> dict[int, bool] | None:
+        """Solve the encoding with a PySAT solver (native XORs are expanded to clauses).
+
+        :param assumptions: A dict mapping input variable indices to assumed values,
+            defaults to None
+        :type assumptions: dict[int, bool] | None, optional
+        :param solver_name: A string giving the name of a sat solver provided by PySAT,
+            defaults to "cadical195"
+        :type solver_name: str, optional
+        :raises ValueError: If the clauses were streamed to a sink.
+        :return: A satisfying assignment of the input variables, or None if there is none.
+        :rtype: dict[int, bool] | None
+        """
+        from pysat.solvers import Solver
+
+        self._check_stored()
+        lits = [
+            self.variable(index) if value else -self.variable(index)
+            for index, value in (assumptions or {}).items()
+        ]
+        with Solver(name = solver_name, bootstrap_with = self.to_clauses()) as solver:
+            if not solver.solve(assumptions = lits):
+                return None
+            model: Any = solver.get_model()
+        return {k: (v <= len(model) and model[v-1] > 0) for k, v in self.variable_labels.items()}
+
@@ -0,0 +1,287 @@
+# TYPE ANNOTATIONS: TRUE
+# DOCSTRINGS: TRUE
+
+from typing import Any
+from collections.abc import Iterable, Iterator
+from array import array
+
+import numpy as np
+import json
+import struct
+
+# Layout of the binary CNF format:
+#   MAGIC
+#   number of variables, number of clauses (little endian uint64)
+#   the literals of every clause (little endian int32), each clause ended by a 0
+# so a whole file can be loaded (or memory mapped) as a single int32 array. The
+# counts are only known at the end, so the header is rewritten on close.
+MAGIC = b"PYPRCNF\x01"
+_HEADER = struct.Struct("<QQ")
+
+# text header, padded so the real counts fit when it is rewritten
+_DIMACS_HEADER_WIDTH = 48
+
+
+class ClauseSink:
+    """Base class for destinations of clauses which are streamed as they are generated.
+
+    Encoders (like `CNFEncoding`) call `add_clause` for every clause instead of
+    keeping a list, so an instance never has to be held in memory. A sink tracks
+    the number of clauses and the largest variable it has seen. Sinks are context
+    managers, which close (flush, or free their solver) on exit.
+    """
+    num_vars: int
+    num_clauses: int
+    supports_xor: bool = False
+
+    def __init__(self):
+        self.num_vars = 0
+        self.num_clauses = 0
+
+    def __enter__(self) -> "ClauseSink":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def add_clause(self, clause: Iterable[int]) -> None:
+        """Add a clause.
+
+        :param clause: The literals of the clause (non-zero ints).
+        :type clause: Iterable[int]
+        """
+        raise NotImplementedError
+
+    def add_clauses(self, clauses: Iterable[Iterable[int]]) -> None:
+        """Add several clauses.
+
+        :param clauses: The clauses.
+        :type clauses: Iterable[Iterable[int]]
+        """
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def add_xor(self, variables: Iterable[int], rhs: int = 1) -> None:
+        """Add the constraint that the XOR of solver variables is `rhs` (only for sinks
+        which support native XOR constraints).
+
+        :param variables: The solver variables (positive).
+        :type variables: Iterable[int]
+        :param rhs: The value of the XOR, defaults to 1
+        :type rhs: int, optional
+        :raises ValueError: If the sink doesn't support XOR constraints.
+        """
+        raise ValueError(f"{type(self).__name__} does not support XOR constraints")
+
+    def close(self) -> None:
+        """Finish the output."""
+        pass
+
+
+class SolverSink(ClauseSink):
+    """Feeds clauses straight into a PySAT solver.
+
+    For example:
+    ```python
+    with SolverSink("cadical195") as sink:
+        encoding = CNFEncoding(sink = sink)
+        encoding.assert_value(fn)
+        satisfiable = sink.solver.solve()
+    ```
+    """
+    def __init__(self, solver: Any = "cadical195"):
+        """Start a solver (or wrap an existing one).
+
+        :param solver: A PySAT solver, or the name of one to start, defaults to "cadical195"
+        :type solver: Any, optional
+        """
+        super().__init__()
+        if isinstance(solver, str):
+            from pysat.solvers import Solver
+            solver = Solver(name = solver)
+        self.solver = solver
+
+    def add_clause(self, clause: Iterable[int]) -> None:
+        """Add a clause to the solver.
+
+        :param clause: The literals of the clause.
+        :type clause: Iterable[int]
+        """
+        clause = tuple(clause)
+        self.num_vars = max(self.num_vars, max(map(abs, clause), default = 0))
+        self.num_clauses += 1
+        self.solver.add_clause(clause)
+
+    def close(self) -> None:
+        """Free the solver."""
+        self.solver.delete()
+
+
+class DIMACSWriter(ClauseSink):
+    """Writes clauses to a file incrementally, in DIMACS or the binary CNF format.
+
+    Only a small buffer is kept in memory. The header (the variable and clause
+    counts) is written when the writer is closed. In DIMACS, native XOR constraints
+    are written as `x` lines (as read by CryptoMiniSat).
+
+    The binary format (`binary = True`) is a short header followed by the clauses as
+    zero-terminated little endian int32 literals, which is much faster to write, and
+    to read back with `read_cnf`, than DIMACS text.
+    """
+    path: str
+    binary: bool
+
+    def __init__(self,
+        path: str,
+        binary: bool = False,
+        buffer_size: int = 1 << 16
+    ):
+        """Open a file for writing.
+
+        :param path: The path of the output file.
+        :type path: str
+        :param binary: If `True`, write the binary CNF format instead of DIMACS, defaults to False
+        :type binary: bool, optional
+        :param buffer_size: The number of literals to buffer between writes, defaults to 65536
+        :type buffer_size: int, optional
+        """
+        super().__init__()
+        self.path = path
+        self.binary = binary
+        self.supports_xor = not binary
+        self.buffer_size = buffer_size
+        self._file: Any = open(path, 'wb' if binary else 'w')
+        if binary:
+            self._file.write(MAGIC + _HEADER.pack(0, 0))
+            self._buffer: Any = array('i')
+        else:
+            self._file.write(" " * (_DIMACS_HEADER_WIDTH - 1) + "\n")
+            self._buffer = []
+        self._buffered = 0
+
+    def _flush(self) -> None:
+        if self.binary:
+            self._file.write(np.asarray(self._buffer, dtype = '<i4').tobytes())
+            self._buffer = array('i')
+        else:
+            self._file.write("".join(self._buffer))
+            self._buffer = []
+        self._buffered = 0
+
+    def add_clause(self, clause: Iterable[int]) -> None:
+        """Write a clause.
+
+        :param clause: The literals of the clause.
+        :type clause: Iterable[int]
+        """
+        clause = tuple(clause)
+        self.num_vars = max(self.num_vars, max(map(abs, clause), default = 0))
+        self.num_clauses += 1
+        if self.binary:
+            self._buffer.extend(clause)
+            self._buffer.append(0)
+        else:
+            self._buffer.append(" ".join(map(str, clause)) + " 0\n")
+        self._buffered += len(clause) + 1
+        if self._buffered >= self.buffer_size:
+            self._flush()
+
+    def add_xor(self, variables: Iterable[int], rhs: int = 1) -> None:
+        """Write an XOR constraint as an `x` line (DIMACS only).
+
+        :param variables: The solver variables (positive).
+        :type variables: Iterable[int]
+        :param rhs: The value of the XOR, defaults to 1
+        :type rhs: int, optional
+        :raises ValueError: If the writer is writing the binary format.
+        """
+        if self.binary:
+            super().add_xor(variables, rhs)
+        lits = list(variables)
+        self.num_vars = max(self.num_vars, max(lits, default = 0))
+        self.num_clauses += 1
+        if rhs == 0:
+            lits[0] = -lits[0]
+        self._buffer.append("x" + " ".join(map(str, lits)) + " 0\n")
+        self._buffered += len(lits) + 1
+        if self._buffered >= self.buffer_size:
+            self._flush()
+
+    def close(self) -> None:
+        """Flush the clauses and write the header."""
+        if self._file.closed:
+            return
+        self._flush()
+        self._file.seek(0)
+        if self.binary:
+            self._file.write(MAGIC + _HEADER.pack(self.num_vars, self.num_clauses))
+        else:
+            header = f"p cnf {self.num_vars} {self.num_clauses}"
+            if len(header) >= _DIMACS_HEADER_WIDTH:
+                raise ValueError("Too many clauses for the DIMACS header")
+            self._file.write(header.ljust(_DIMACS_HEADER_WIDTH - 1))
+        self._file.close()
+
+
+def read_cnf(path: str, chunk_size: int = 1 << 20) -> Iterator[tuple[int, ...]]:
+    """Read the clauses of a file written by `DIMACSWriter` (or any DIMACS file).
+
+    The format is detected from the first bytes of the file. Clauses are read in
+    chunks, so a file can be fed to a solver without loading all of it.
+
+    :param path: The path of the file.
+    :type path: str
+    :param chunk_size: The number of literals (or lines) to read at once, defaults to 1048576
+    :type chunk_size: int, optional
+    :raises ValueError: If a DIMACS file has XOR constraints (`x` lines).
+    :yield: The clauses, as tuples of literals.
+    :rtype: Iterator[tuple[int, ...]]
+    """
+    with open(path, 'rb') as f:
+        binary = f.read(len(MAGIC)) == MAGIC
+        if binary:
+            f.seek(len(MAGIC) + _HEADER.size)
+            rest = np.zeros(0, dtype = np.int64)
+            while True:
+                chunk = np.fromfile(f, dtype = '<i4', count = chunk_size)
+                if len(chunk) == 0:
+                    break
+                chunk = np.concatenate([rest, chunk])
+                ends = np.flatnonzero(chunk == 0)
+                start = 0
+                for end in ends.tolist():
+                    yield tuple(chunk[start:end].tolist())
+                    start = end + 1
+                rest = chunk[start:]
+            return
+
+        f.seek(0)
+        clause: list[int] = []
+        for line in f:
+            line = line.strip()
+            if line[:1] == b'%':
+                break
+            if not line or line[:1] in (b'c', b'p'):
+                continue
+            if line[:1] == b'x':
+                raise ValueError("XOR constraints can't be read as clauses")
+            for lit in map(int, line.split()):
+                if lit == 0:
+                    yield tuple(clause)
+                    clause = []
+                else:
+                    clause.append(lit)
+
+
+def read_variable_map(path: str) -> dict[str, Any]:
+    """Read a variable map written by `CNFEncoding.write_variable_map`.
+
+    :param path: The path of the JSON file.
+    :type path: str
+    :return: The map, with the keys of 'variables' converted back to ints.
+    :rtype: dict[str, Any]
+    """
+    with open(path) as f:
+        variable_map = json.load(f)
+    variable_map['variables'] = {int(k): v for k, v in variable_map['variables'].items()}
+    return variable_map
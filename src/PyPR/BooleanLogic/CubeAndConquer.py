@@ -0,0 +1,231 @@
+# TYPE ANNOTATIONS: TRUE
+# DOCSTRINGS: TRUE
+
+from typing import Any
+from collections.abc import Callable, Sequence
+
+from math import ceil, log2
+from time import perf_counter
+import multiprocessing
+import os
+
+# Worker state: each worker process keeps one incremental solver over the clauses,
+# and solves its cubes as assumptions, so clauses learned on one cube help the next.
+_solver: Any = None
+
+def _init_worker(clauses: Sequence[Sequence[int]], solver_name: str) -> None:
+    global _solver
+    from pysat.solvers import Solver
+    _solver = Solver(name = solver_name, bootstrap_with = clauses)
+
+def _solve_cube(cube: list[int]) -> tuple[bool, list[int] | None]:
+    result = _solver.solve(assumptions = cube)
+    return bool(result), (_solver.get_model() if result else None)
+
+
+def generate_cubes(
+    clauses: Sequence[Sequence[int]],
+    candidates: Sequence[int],
+    depth: int,
+    solver_name: str = "cadical195"
+) -> list[list[int]]:
+    """Split a CNF into cubes by lookahead over a set of candidate variables.
+
+    Starting from the empty cube, every unassigned candidate is scored by unit
+    propagation of both of its values, and the cube is split on the candidate with
+    the largest product of new implied literals (as in lookahead solvers). Failed
+    literals found along the way are added to the cube, and cubes which propagation
+    refutes are dropped, so the cubes don't need to cover all `2**depth` assignments.
+
+    :param clauses: The clauses, as in `tseytin`.
+    :type clauses: Sequence[Sequence[int]]
+    :param candidates: The solver variables to split on (e.g. the labels of the
+        state bits of a register).
+    :type candidates: Sequence[int]
+    :param depth: The number of decisions in each cube.
+    :type depth: int
+    :param solver_name: A string giving the name of a sat solver provided by PySAT,
+        used for propagation, defaults to "cadical195"
+    :type solver_name: str, optional
+    :return: The cubes, as lists of literals. Every model of the clauses satisfies
+        at least one cube.
+    :rtype: list[list[int]]
+    """
+    from pysat.solvers import Solver
+
+    cubes = []
+    with Solver(name = solver_name, bootstrap_with = clauses) as solver:
+        stack: list[tuple[list[int], int]] = [([], 0)]
+        while stack:
+            cube, decisions = stack.pop()
+            ok, implied = solver.propagate(assumptions = cube)
+            if not ok:
+                continue
+            if decisions == depth:
+                cubes.append(cube)
+                continue
+
+            assigned = {abs(lit) for lit in implied}
+            best, best_score = None, -1
+            for var in candidates:
+                if var in assigned:
+                    continue
+                ok_pos, implied_pos = solver.propagate(assumptions = cube + [var])
+                ok_neg, implied_neg = solver.propagate(assumptions = cube + [-var])
+                if not (ok_pos or ok_neg):
+                    break
+                elif not (ok_pos and ok_neg):
+                    # failed literal: the other value is forced
+                    cube = cube + [var if ok_pos else -var]
+                    implied = implied_pos if ok_pos else implied_neg
+                    assigned |= {abs(lit) for lit in implied}
+                    continue
+                score = (len(implied_pos) - len(implied) + 1) * (len(implied_neg) - len(implied) + 1)
+                if score > best_score:
+                    best, best_score = var, score
+            else:
+                if best == None:
+                    cubes.append(cube)
+                else:
+                    stack.append((cube + [-best], decisions + 1))
+                    stack.append((cube + [best], decisions + 1))
+    return cubes
+
+def solve_cubes(
+    clauses: Sequence[Sequence[int]],
+    cubes: Sequence[list[int]],
+    max_workers: int | None = None,
+    solver_name: str = "cadical195",
+    time_limit: float | None = None,
+    progress: Callable[[int, int, float], Any] | None = None,
+    verbose: bool = False
+) -> tuple[bool | None, list[int] | None]:
+    """Solve the cubes of a CNF in a pool of incremental solvers.
+
+    Each worker process keeps a single solver over the clauses, and solves cubes
+    as assumptions. As soon as any cube has a model, the pool is terminated.
+
+    :param clauses: The clauses, as in `tseytin`.
+    :type clauses: Sequence[Sequence[int]]
+    :param cubes: The cubes (e.g. from `generate_cubes`), which should cover every
+        model of the clauses.
+    :type cubes: Sequence[list[int]]
+    :param max_workers: The number of worker processes, defaults to the number of CPUs.
+        With one worker and no time limit, the cubes are solved in this process.
+    :type max_workers: int | None, optional
+    :param solver_name: A string giving the name of a sat solver provided by PySAT,
+        defaults to "cadical195"
+    :type solver_name: str, optional
+    :param time_limit: The most time to spend solving, in seconds, defaults to None (no limit)
+    :type time_limit: float | None, optional
+    :param progress: Called after each cube as `progress(done, remaining, elapsed)`,
+        defaults to None
+    :type progress: Callable[[int, int, float], Any] | None, optional
+    :param verbose: If `True`, print the progress and an estimate of the remaining
+        time after each cube, defaults to False
+    :type verbose: bool, optional
+    :return: `(satisfiable, model)`: whether the clauses are satisfiable (None if the
+        time limit was reached), and the model from the solver (if satisfiable).
+    :rtype: tuple[bool | None, list[int] | None]
+    """
+    if max_workers == None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(cubes)))
+
+    start = perf_counter()
+    def report(done: int) -> None:
+        elapsed = perf_counter() - start
+        if progress != None:
+            progress(done, len(cubes) - done, elapsed)
+        if verbose:
+            estimate = elapsed / done * (len(cubes) - done)
+            print(f"cubes: {done}/{len(cubes)} done, {len(cubes) - done} remaining, "
+                  f"{elapsed:.1f}s elapsed, ~{estimate:.1f}s to go")
+
+    if max_workers == 1 and time_limit == None:
+        _init_worker(clauses, solver_name)
+        try:
+            for done, cube in enumerate(cubes, 1):
+                result, model = _solve_cube(cube)
+                report(done)
+                if result:
+                    return True, model
+        finally:
+            _solver.delete()
+        return False, None
+
+    deadline = None if time_limit == None else start + time_limit
+    pool = multiprocessing.get_context().Pool(max_workers, _init_worker, (clauses, solver_name))
+    try:
+        results = pool.imap_unordered(_solve_cube, cubes)
+        for done in range(1, len(cubes) + 1):
+            timeout = None if deadline == None else max(0, deadline - perf_counter())
+            try:
+                result, model = results.next(timeout)
+            except multiprocessing.TimeoutError:
+                return None, None
+            report(done)
+            if result:
+                return True, model
+        return False, None
+    finally:
+        pool.terminate()
+        pool.join()
+
+def cube_and_conquer(
+    clauses: Sequence[Sequence[int]],
+    candidates: Sequence[int],
+    depth: int | None = None,
+    max_workers: int | None = None,
+    solver_name: str = "cadical195",
+    time_limit: float | None = None,
+    progress: Callable[[int, int, float], Any] | None = None,
+    verbose: bool = False
+) -> tuple[bool | None, list[int] | None]:
+    """Solve a CNF by cube-and-conquer: `generate_cubes`, then `solve_cubes`.
+
+    This suits state recovery instances, where splitting on the state bits of the
+    register (the `candidates`) gives cubes which are much easier than the whole
+    instance. For example:
+    ```python
+    clauses, node_labels, variable_labels = ...
+    candidates = [variable_labels[bit] for bit in range(register.size)]
+    satisfiable, model = cube_and_conquer(clauses, candidates, verbose = True)
+    ```
+
+    :param clauses: The clauses, as in `tseytin`.
+    :type clauses: Sequence[Sequence[int]]
+    :param candidates: The solver variables to split on.
+    :type candidates: Sequence[int]
+    :param depth: The number of decisions in each cube, defaults to enough for about
+        16 cubes per worker.
+    :type depth: int | None, optional
+    :param max_workers: The number of worker processes, defaults to the number of CPUs.
+    :type max_workers: int | None, optional
+    :param solver_name: A string giving the name of a sat solver provided by PySAT,
+        defaults to "cadical195"
+    :type solver_name: str, optional
+    :param time_limit: The most time to spend solving the cubes, in seconds, defaults
+        to None (no limit)
+    :type time_limit: float | None, optional
+    :param progress: Called after each cube as `progress(done, remaining, elapsed)`,
+        defaults to None
+    :type progress: Callable[[int, int, float], Any] | None, optional
+    :param verbose: If `True`, print the number of cubes and the progress, defaults to False
+    :type verbose: bool, optional
+    :return: `(satisfiable, model)`, as in `solve_cubes`.
+    :rtype: tuple[bool | None, list[int] | None]
+    """
+    if max_workers == None:
+        max_workers = os.cpu_count() or 1
+    if depth == None:
+        depth = ceil(log2(16 * max_workers))
+    depth = min(depth, len(candidates))
+
+    start = perf_counter()
+    cubes = generate_cubes(clauses, candidates, depth, solver_name)
+    if verbose:
+        print(f"{len(cubes)} cubes (of {2**depth}) in {perf_counter() - start:.2f}s")
+    if not cubes:
+        return False, None
+    return solve_cubes(clauses, cubes, max_workers, solver_name, time_limit, progress, verbose)
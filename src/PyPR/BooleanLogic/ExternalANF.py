@@ -0,0 +1,453 @@
+# TYPE ANNOTATIONS: TRUE
+# DOCSTRINGS: TRUE
+
+from typing import Any
+from collections.abc import Iterable, Iterator
+
+from PyPR.BooleanLogic.BooleanFunction import BooleanFunction
+from PyPR.BooleanLogic.BooleanANF import BooleanANF
+
+from math import ceil, isqrt
+import tempfile
+import os
+
+import numpy as np
+
+# Monomials are stored as bitmasks over the variables 0, ..., num_vars - 1, with
+# one record per monomial. Registers with at most 64 variables use plain uint64
+# records; larger ones use fixed size byte strings holding the big endian words
+# of the mask, which sort (bytewise) in the same order as the masks. An ANF is a
+# sorted run of records without repeats, kept in memory while it is small, and
+# in a memory mapped file once it grows past `block_size` records.
+
+DEFAULT_BLOCK_SIZE = 2**22
+
+
+def _record_dtype(num_words: int) -> np.dtype:
+    if num_words == 1:
+        return np.dtype('<u8')
+    return np.dtype((np.void, 8 * num_words))
+
+def _to_words(records: np.ndarray, num_words: int) -> np.ndarray:
+    # records -> (n, num_words) uint64 words, most significant word first
+    if num_words == 1:
+        return np.asarray(records, dtype = np.uint64).reshape(-1, 1)
+    return np.frombuffer(np.ascontiguousarray(records).tobytes(), dtype = '>u8').reshape(-1, num_words).astype(np.uint64)
+
+def _from_words(words: np.ndarray, num_words: int) -> np.ndarray:
+    if num_words == 1:
+        return words[:, 0].astype('<u8')
+    return np.ascontiguousarray(words.astype('>u8')).view(_record_dtype(num_words)).ravel()
+
+def _key(record: Any) -> Any:
+    # a comparable key, in the same order as np.sort uses for the records
+    if isinstance(record, np.void):
+        return record.tobytes()
+    return int(record)
+
+def _cancel(records: np.ndarray) -> np.ndarray:
+    # sort, and keep the records which appear an odd number of times (x + x = 0)
+    if len(records) == 0:
+        return records
+    unique, counts = np.unique(records, return_counts = True)
+    return unique[(counts & 1) == 1]
+
+
+class _RunWriter:
+    # Collects sorted blocks into one run, in memory until it grows
+    # past block_size records and then in a temporary file.
+    def __init__(self, dtype: np.dtype, block_size: int, directory: str | None):
+        self.dtype = dtype
+        self.block_size = block_size
+        self.directory = directory
+        self.blocks: list[np.ndarray] = []
+        self.buffered = 0
+        self.count = 0
+        self.file: Any = None
+        self.path: str | None = None
+
+    def append(self, block: np.ndarray) -> None:
+        if len(block) == 0:
+            return
+        self.blocks.append(np.asarray(block))
+        self.buffered += len(block)
+        if self.buffered >= self.block_size:
+            self._spill()
+
+    def _spill(self) -> None:
+        if not self.blocks:
+            return
+        if self.file == None:
+            fd, self.path = tempfile.mkstemp(suffix = '.anf', dir = self.directory)
+            self.file = os.fdopen(fd, 'wb')
+        for block in self.blocks:
+            self.file.write(np.ascontiguousarray(block).tobytes())
+            self.count += len(block)
+        self.blocks = []
+        self.buffered = 0
+
+    def finish(self) -> tuple[np.ndarray, str | None]:
+        if self.file == None:
+            if not self.blocks:
+                return np.zeros(0, dtype = self.dtype), None
+            return np.concatenate(self.blocks), None
+
+        self._spill()
+        self.file.close()
+        return np.memmap(self.path, dtype = self.dtype, mode = 'r', shape = (self.count,)), self.path
+
+
+class ExternalANF:
+    """An algebraic normal form which can be larger than memory.
+
+    The monomials are stored as a sorted run of packed bitmasks, which is kept
+    in memory while it is small, and spills to a temporary file once it has more
+    than `block_size` monomials. Every operation works on blocks of at most about
+    `block_size` monomials: XOR is a merge of two sorted runs which cancels equal
+    monomials, AND multiplies blocks of each operand, and sorts and merges the
+    (spilled) partial products.
+
+    The supported operations (`^`, `&`, and `~`) match `BooleanANF`, so functions
+    can be translated with `BooleanFunction.eval_ANF`, as in `from_BooleanFunction`.
+    Temporary files are deleted when the ANF is garbage collected (or closed).
+    """
+    num_vars: int
+    block_size: int
+    directory: str | None
+
+    def __init__(self,
+        num_vars: int,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        directory: str | None = None
+    ):
+        """Create an empty ANF (the constant 0).
+
+        :param num_vars: The number of variables. Monomials are over the variables
+            0, ..., num_vars - 1.
+        :type num_vars: int
+        :param block_size: The number of monomials to process or hold in memory at
+            once, defaults to 2**22
+        :type block_size: int, optional
+        :param directory: The directory for temporary files, defaults to the system's
+            temporary directory.
+        :type directory: str | None, optional
+        """
+        self.num_vars = num_vars
+        self.block_size = block_size
+        self.directory = directory
+        self._num_words = max(1, ceil(num_vars / 64))
+        self._dtype = _record_dtype(self._num_words)
+        self._records: np.ndarray = np.zeros(0, dtype = self._dtype)
+        self._path: str | None = None
+
+    def _like(self, records: np.ndarray, path: str | None = None) -> "ExternalANF":
+        # a new ANF with the same parameters, from a sorted run
+        new_anf = ExternalANF(self.num_vars, self.block_size, self.directory)
+        new_anf._records = records
+        new_anf._path = path
+        return new_anf
+
+    def _writer(self) -> _RunWriter:
+        return _RunWriter(self._dtype, self.block_size, self.directory)
+
+    def close(self) -> None:
+        """Delete the temporary file of the ANF (if it has one). The ANF is 0 afterwards."""
+        self._records = np.zeros(0, dtype = self._dtype)
+        if self._path != None:
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+            self._path = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass # interpreter shutdown
+
+    @property
+    def on_disk(self) -> bool:
+        """`True` if the monomials are stored in a file."""
+        return self._path != None
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    # Construction
+    def _pack(self, monomials: Iterable[Iterable[int]]) -> np.ndarray:
+        masks = []
+        for term in monomials:
+            mask = 0
+            for var in term:
+                if not 0 <= var < self.num_vars:
+                    raise ValueError(f"Variable {var} is outside of [0, {self.num_vars})")
+                mask |= 1 << var
+            masks.append(mask)
+
+        if self._num_words == 1:
+            return np.asarray(masks, dtype = np.uint64)
+        data = b"".join(mask.to_bytes(8 * self._num_words, 'big') for mask in masks)
+        return np.frombuffer(data, dtype = self._dtype)
+
+    @classmethod
+    def from_monomials(cls,
+        monomials: Iterable[Iterable[int]],
+        num_vars: int,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        directory: str | None = None
+    ) -> "ExternalANF":
+        """Build an ANF from a stream of monomials.
+
+        The monomials do not have to be sorted, and monomials which appear twice
+        cancel. The stream is read in blocks, so it can be larger than memory.
+
+        :param monomials: An iterable of monomials, each an iterable of variable indices
+            (an empty monomial is the constant 1).
+        :type monomials: Iterable[Iterable[int]]
+        :param num_vars: The number of variables.
+        :type num_vars: int
+        :param block_size: The number of monomials to process at once, defaults to 2**22
+        :type block_size: int, optional
+        :param directory: The directory for temporary files, defaults to None
+        :type directory: str | None, optional
+        :raises ValueError: If a variable index is outside of [0, num_vars)
+        :return: The ANF which is the sum of the monomials.
+        :rtype: ExternalANF
+        """
+        anf = cls(num_vars, block_size, directory)
+        builder = _RunBuilder(anf)
+        batch = []
+        for term in monomials:
+            batch.append(term)
+            if len(batch) == block_size:
+                builder.add(anf._pack(batch))
+                batch = []
+        builder.add(anf._pack(batch))
+        return builder.finish()
+
+    @classmethod
+    def from_BooleanANF(cls,
+        anf: BooleanANF,
+        num_vars: int | None = None,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        directory: str | None = None
+    ) -> "ExternalANF":
+        """Convert a `BooleanANF` over integer variables.
+
+        :param anf: The ANF to convert.
+        :type anf: BooleanANF
+        :param num_vars: The number of variables, defaults to one more than the largest variable.
+        :type num_vars: int | None, optional
+        :return: The converted ANF.
+        :rtype: ExternalANF
+        """
+        if num_vars == None:
+            num_vars = max((max(term, default = -1) for term in anf.terms), default = -1) + 1
+        return cls.from_monomials(anf.terms, num_vars, block_size, directory)
+
+    @classmethod
+    def from_BooleanFunction(cls,
+        fn: BooleanFunction,
+        num_vars: int | None = None,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        directory: str | None = None
+    ) -> "ExternalANF":
+        """Compute the ANF of a BooleanFunction, spilling to disk as it grows.
+
+        This works like `BooleanANF.from_BooleanFunction`, but every intermediate
+        ANF is an `ExternalANF`, so neither the result nor the intermediate values
+        have to fit in memory.
+
+        :param fn: The function to translate.
+        :type fn: BooleanFunction
+        :param num_vars: The number of variables, defaults to `fn.max_idx() + 1`
+        :type num_vars: int | None, optional
+        :return: The ANF of the function.
+        :rtype: ExternalANF
+        """
+        if num_vars == None:
+            num_vars = fn.max_idx() + 1
+        zero = cls(num_vars, block_size, directory)
+        one = ~zero
+        var_list = {
+            i: cls.from_monomials([[i]], num_vars, block_size, directory)
+            for i in fn.idxs_used()
+        }
+        new_fn = fn.remap_constants([(0, zero), (1, one)])
+        return new_fn.eval_ANF(var_list)
+
+    # Operations
+    def _check(self, other: "ExternalANF") -> None:
+        if other.num_vars != self.num_vars:
+            raise ValueError("ANFs must have the same number of variables")
+
+    def blocks(self, size: int | None = None) -> Iterator[np.ndarray]:
+        """Iterate over the packed monomial records in sorted blocks.
+
+        :param size: The number of records per block, defaults to `block_size`
+        :type size: int | None, optional
+        :return: An iterator over arrays of records.
+        :rtype: Iterator[np.ndarray]
+        """
+        size = self.block_size if size == None else size
+        for start in range(0, len(self._records), size):
+            yield np.asarray(self._records[start:start + size])
+
+    def __xor__(self, other: "ExternalANF") -> "ExternalANF":
+        self._check(other)
+        a, b = self._records, other._records
+        step = max(1, self.block_size // 2)
+        writer = self._writer()
+
+        # merge blocks up to the smaller of the two last records, so that
+        # everything equal to a merged record is in the same merge
+        i = j = 0
+        while i < len(a) and j < len(b):
+            a_block = np.asarray(a[i:i + step])
+            b_block = np.asarray(b[j:j + step])
+            if _key(a_block[-1]) <= _key(b_block[-1]):
+                b_block = b_block[:np.searchsorted(b_block, a_block[-1], side = 'right')]
+            else:
+                a_block = a_block[:np.searchsorted(a_block, b_block[-1], side = 'right')]
+            writer.append(_cancel(np.concatenate([a_block, b_block])))
+            i += len(a_block)
+            j += len(b_block)
+
+        for rest, start in ((a, i), (b, j)):
+            for k in range(start, len(rest), step):
+                writer.append(np.asarray(rest[k:k + step]))
+
+        return self._like(*writer.finish())
+
+    def __add__(self, other: "ExternalANF") -> "ExternalANF":
+        return self ^ other
+
+    def __and__(self, other: "ExternalANF") -> "ExternalANF":
+        self._check(other)
+        if len(self) == 0 or len(other) == 0:
+            return self._like(np.zeros(0, dtype = self._dtype))
+
+        # products of a block of each operand, about block_size at a time
+        other_step = max(1, min(len(other), isqrt(self.block_size)))
+        self_step = max(1, self.block_size // other_step)
+        builder = _RunBuilder(self)
+        for a_block in self.blocks(self_step):
+            a_words = _to_words(a_block, self._num_words)
+            for b_block in other.blocks(other_step):
+                b_words = _to_words(b_block, self._num_words)
+                products = (a_words[:, None, :] | b_words[None, :, :]).reshape(-1, self._num_words)
+                builder.add(_from_words(products, self._num_words))
+        return builder.finish()
+
+    def __mul__(self, other: "ExternalANF") -> "ExternalANF":
+        return self & other
+
+    def __invert__(self) -> "ExternalANF":
+        return self ^ self._like(np.zeros(1, dtype = self._dtype))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ExternalANF):
+            return NotImplemented
+        if other.num_vars != self.num_vars or len(other) != len(self):
+            return False
+        return all(
+            np.array_equal(a, b)
+            for a, b in zip(self.blocks(), other.blocks(self.block_size))
+        )
+
+    __hash__ = None # type: ignore
+
+    # Streaming and export
+    def masks(self) -> Iterator[int]:
+        """Iterate over the monomials as integer bitmasks (bit i is variable i), in sorted order."""
+        for block in self.blocks():
+            if self._num_words == 1:
+                yield from block.tolist()
+            else:
+                for record in block:
+                    yield int.from_bytes(record.tobytes(), 'big')
+
+    def monomials(self) -> Iterator[tuple[int, ...]]:
+        """Iterate over the monomials as sorted tuples of variable indices.
+
+        This is the monomial format used by the equation stores (with `tuple()` for
+        the constant term), so an ExternalANF can be inserted into a store without
+        building it in memory.
+        """
+        for mask in self.masks():
+            term = []
+            while mask:
+                low = mask & -mask
+                term.append(low.bit_length() - 1)
+                mask ^= low
+            yield tuple(term)
+
+    def __iter__(self) -> Iterator[frozenset[int]]:
+        for term in self.monomials():
+            yield frozenset(term)
+
+    def degree(self) -> int:
+        """The algebraic degree (computed one block at a time). The constant 0 has degree 0."""
+        degree = 0
+        for block in self.blocks():
+            words = _to_words(block, self._num_words)
+            counts = np.unpackbits(words.view(np.uint8), axis = 1).sum(axis = 1)
+            degree = max(degree, int(counts.max(initial = 0)))
+        return degree
+
+    def to_BooleanANF(self) -> BooleanANF:
+        """Load the ANF into memory as a `BooleanANF`."""
+        return BooleanANF(frozenset(self), fast_init = True)
+
+    def to_BooleanFunction(self) -> BooleanFunction:
+        """Load the ANF into memory, and convert it to a BooleanFunction (see `BooleanANF`)."""
+        return self.to_BooleanANF().to_BooleanFunction()
+
+
+class _RunBuilder:
+    # Builds an ANF from unsorted records: blocks are sorted and cancelled in
+    # memory, and written out as runs. Runs are merged with XOR as they are made,
+    # like a binary counter (two runs made from the same number of blocks are
+    # merged), so only a logarithmic number of runs (and open files) exist at once.
+    def __init__(self, anf: ExternalANF):
+        self.anf = anf
+        self.buffer: list[np.ndarray] = []
+        self.buffered = 0
+        self.runs: list[tuple[int, ExternalANF]] = []
+
+    def add(self, records: np.ndarray) -> None:
+        self.buffer.append(records)
+        self.buffered += len(records)
+        if self.buffered >= self.anf.block_size:
+            self._flush(spill = True)
+
+    def _flush(self, spill: bool) -> None:
+        if not self.buffer:
+            return
+        records = _cancel(np.concatenate(self.buffer))
+        self.buffer = []
+        self.buffered = 0
+
+        writer = self.anf._writer()
+        writer.append(records)
+        if spill:
+            writer._spill()
+        run = self.anf._like(*writer.finish())
+
+        level = 0
+        while self.runs and self.runs[-1][0] == level:
+            run = self.runs.pop()[1] ^ run
+            level += 1
+        self.runs.append((level, run))
+
+    def finish(self) -> ExternalANF:
+        # a single small run can stay in memory
+        self._flush(spill = bool(self.runs))
+        if not self.runs:
+            return self.anf._like(np.zeros(0, dtype = self.anf._dtype))
+
+        result = self.runs.pop()[1]
+        while self.runs:
+            result = self.runs.pop()[1] ^ result
+        return result
@@ -0,0 +1,323 @@
+# TYPE ANNOTATIONS: TRUE
+# DOCSTRINGS: TRUE
+
+from typing import Any
+
+from PyPR.BooleanLogic.BooleanFunction import BooleanFunction
+from PyPR.BooleanLogic.FunctionInputs import VAR
+from PyPR.BooleanLogic.Netlist import Netlist
+from PyPR.BooleanLogic.Spectrum import _packed_gate
+from PyPR.BooleanLogic.SAT import SATSession
+
+import numpy as np
+from numba import njit, prange
+
+_ONES = ~np.uint64(0)
+
+
+@njit(parallel=True)
+def _simulate(
+    values, gate_offset,
+    level_ptr, slice_ptr, slice_ops, arg_ptr, arg_idx,
+    parallel_threshold
+):
+    # evaluate every gate on every word of `values` (the input and constant rows
+    # are already filled), one level at a time
+    ones = ~np.uint64(0)
+    width = values.shape[1]
+    for level in range(len(level_ptr)-1):
+        for s in range(level_ptr[level], level_ptr[level+1]):
+            op = slice_ops[s]
+            if slice_ptr[s+1] - slice_ptr[s] >= parallel_threshold:
+                for g in prange(slice_ptr[s], slice_ptr[s+1]):
+                    _packed_gate(values, op, gate_offset + g, arg_ptr, arg_idx, g, width, ones)
+            else:
+                for g in range(slice_ptr[s], slice_ptr[s+1]):
+                    _packed_gate(values, op, gate_offset + g, arg_ptr, arg_idx, g, width, ones)
+
+
+class Fraig:
+    """Functionally reduces the nodes of one or more functions, by simulation and SAT (FRAIG).
+
+    All of the nodes are simulated together on `64 * num_words` random input patterns,
+    and grouped into classes of candidate equivalent nodes: nodes with the same
+    simulation signature, up to complement. The candidates are then checked against
+    the first node of their class (in topological order) with small incremental SAT
+    queries, which are cut off after `conflict_limit` conflicts:
+
+    - A counterexample is simulated (with 63 neighbouring patterns, which each flip
+      one input) and used to split the classes, so the counterexample also rules
+      out every other candidate pair it distinguishes.
+    - A proven equivalence is added to the solver as a pair of clauses, which makes
+      the queries for the nodes above it (and the final miter) much easier.
+
+    So most functions which are not equivalent are told apart by the simulation
+    alone, and equivalent functions with shared or similar structure are proven
+    one small step at a time instead of with a single hard query.
+    """
+    netlist: Netlist
+    session: SATSession
+    conflict_limit: int | None
+    stats: dict[str, int]
+
+    def __init__(self,
+        fns: list[BooleanFunction],
+        num_words: int = 32,
+        conflict_limit: int | None = 1000,
+        solver_name: str = "cadical195",
+        seed: int | None = None
+    ):
+        """Flatten and simulate the functions.
+
+        :param fns: The functions to reduce.
+        :type fns: list[BooleanFunction]
+        :param num_words: The number of 64 bit words of random patterns to simulate,
+            defaults to 32
+        :type num_words: int, optional
+        :param conflict_limit: The most conflicts for each internal SAT query (queries
+            which reach it leave their nodes unmerged), defaults to 1000. None for no limit.
+        :type conflict_limit: int | None, optional
+        :param solver_name: A string giving the name of a sat solver provided by PySAT,
+            defaults to "cadical195"
+        :type solver_name: str, optional
+        :param seed: A seed for the random patterns, defaults to None
+        :type seed: int | None, optional
+        """
+        self.netlist = Netlist(fns)
+        self.session = SATSession(solver_name = solver_name)
+        self.conflict_limit = conflict_limit
+        self.stats = {'proved': 0, 'disproved': 0, 'undecided': 0, 'counterexamples': 0}
+        self._rng = np.random.default_rng(seed)
+
+        # the nodes of every slot which takes part (used inputs, constants, gates)
+        netlist = self.netlist
+        self._inputs = sorted(netlist.slot(var) for fn in fns for var in self._variables(fn))
+        self._nodes: dict[int, Any] = {index: VAR(index) for index in self._inputs}
+        self._nodes[netlist.gate_offset - 2] = False
+        self._nodes[netlist.gate_offset - 1] = True
+        for gate in netlist.gates():
+            self._nodes[netlist.slot(gate)] = gate
+
+        values = np.zeros((netlist.num_slots, num_words), dtype = np.uint64)
+        values[self._inputs] = self._rng.integers(0, 2**64, size = (len(self._inputs), num_words), dtype = np.uint64)
+        values[netlist.gate_offset - 1] = _ONES
+        self._run(values)
+        self.signatures = values
+
+        # group the slots by signature, normalized so that the first bit is 0
+        self._phase = {s: bool(values[s, 0] & 1) for s in self._nodes}
+        groups: dict[bytes, list[int]] = {}
+        for s in sorted(self._nodes):
+            row = values[s] ^ _ONES if self._phase[s] else values[s]
+            groups.setdefault(row.tobytes(), []).append(s)
+        self._classes = [members for members in groups.values() if len(members) > 1]
+        self._class_of = {s: i for i, members in enumerate(self._classes) for s in members}
+
+        # proven merges: each slot points to the representative it was merged into
+        self._merged: dict[int, int] = {}
+
+    @staticmethod
+    def _variables(fn: BooleanFunction) -> set[VAR]:
+        # the distinct VAR nodes of a function (iterative, DAG aware)
+        seen: set[int] = set()
+        found = set()
+        stack = [fn]
+        while stack:
+            node = stack.pop()
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            if type(node) == VAR:
+                found.add(node)
+            stack.extend(node.args)
+        return found
+
+    def _run(self, values: np.ndarray) -> None:
+        netlist = self.netlist
+        _simulate(
+            values, netlist.gate_offset,
+            netlist.level_ptr, netlist.slice_ptr, netlist.slice_ops,
+            netlist.arg_ptr, netlist.arg_idx, 256
+        )
+
+    def literal(self, slot: int) -> int:
+        """The solver literal of a slot, normalized by its simulation phase.
+
+        :param slot: A slot of the netlist.
+        :type slot: int
+        :return: A literal which is 0 on the first simulation pattern.
+        :rtype: int
+        """
+        # (solver variable 1 is the constant true)
+        node = self._nodes[slot]
+        if node is True or node is False:
+            lit = 1 if node else -1
+        else:
+            lit = self.session.encode(node)
+        return -lit if self._phase[slot] else lit
+
+    def _solve(self, assumptions: list[int]) -> bool | None:
+        self.session.num_queries += 1
+        solver = self.session.solver
+        if self.conflict_limit == None:
+            return solver.solve(assumptions = assumptions)
+        solver.conf_budget(self.conflict_limit)
+        return solver.solve_limited(assumptions = assumptions)
+
+    def _counterexample(self) -> None:
+        # simulate the model and its neighbours (each flips one input), and split
+        # every class on the result
+        self.stats['counterexamples'] += 1
+        model = self.session.model()
+        netlist = self.netlist
+        values = np.zeros((netlist.num_slots, 1), dtype = np.uint64)
+        values[netlist.gate_offset - 1] = _ONES
+        flips = self._rng.integers(0, len(self._inputs), size = 63) if self._inputs else []
+        for index in self._inputs:
+            value = model.get(index, bool(self._rng.integers(2)))
+            word = _ONES if value else np.uint64(0)
+            for b, flip in enumerate(flips, 1):
+                if self._inputs[flip] == index:
+                    word ^= np.uint64(1) << np.uint64(b)
+            values[index, 0] = word
+        self._run(values)
+        self.signatures = np.concatenate([self.signatures, values], axis = 1)
+
+        classes = []
+        for members in self._classes:
+            groups: dict[int, list[int]] = {}
+            for s in members:
+                word = int(values[s, 0] ^ _ONES) if self._phase[s] else int(values[s, 0])
+                groups.setdefault(word, []).append(s)
+            classes += [group for group in groups.values() if len(group) > 1]
+        self._classes = classes
+        self._class_of = {s: i for i, members in enumerate(classes) for s in members}
+
+    def find(self, slot: int) -> int:
+        """The representative a slot was merged into (itself if it wasn't merged).
+
+        :param slot: A slot of the netlist.
+        :type slot: int
+        :return: The representative slot.
+        :rtype: int
+        """
+        while slot in self._merged:
+            slot = self._merged[slot]
+        return slot
+
+    def sweep(self, until: list[int] | None = None) -> None:
+        """Prove or disprove the candidate equivalences, in topological order.
+
+        :param until: Stop early once all of these slots have been merged into one
+            representative, defaults to None (sweep every candidate).
+        :type until: list[int] | None, optional
+        """
+        for s in sorted(self._class_of):
+            while s in self._class_of:
+                rep = self._classes[self._class_of[s]][0]
+                if rep == s or s in self._merged:
+                    break
+                a, b = self.literal(s), self.literal(rep)
+
+                result = self._solve([a, -b])
+                if not result:
+                    other = self._solve([-a, b])
+                    result = other if result == False else (True if other else None)
+                if result == True:
+                    # the counterexample splits this class (and possibly others)
+                    self.stats['disproved'] += 1
+                    self._counterexample()
+                    if self._class_of.get(s) != None and self._class_of.get(s) == self._class_of.get(rep):
+                        # the encoding and the simulation disagree on the model, so
+                        # asking again would give the same counterexample forever
+                        self.stats['undecided'] += 1
+                        break
+                    continue
+                elif result == False:
+                    self.stats['proved'] += 1
+                    self.session.add_clause([-a, b])
+                    self.session.add_clause([a, -b])
+                    self._merged[s] = rep
+                else:
+                    self.stats['undecided'] += 1
+                break
+
+            if until != None and len({self.find(u) for u in until}) == 1:
+                return
+
+    def equivalent(self, a: int, b: int) -> bool:
+        """Check if two slots are equivalent, with a final (unlimited) SAT query if needed.
+
+        :param a: A slot of the netlist.
+        :type a: int
+        :param b: Another slot.
+        :type b: int
+        :return: `True` if the nodes in the two slots are functionally equivalent.
+        :rtype: bool
+        """
+        if not np.array_equal(self.signatures[a], self.signatures[b]):
+            return False
+        if self.find(a) == self.find(b):
+            return True
+        la, lb = self.literal(a), self.literal(b)
+        for differ in ([la, -lb], [-la, lb]):
+            self.session.num_queries += 1
+            if self.session.solver.solve(assumptions = differ):
+                return False
+        return True
+
+    def close(self) -> None:
+        """Free the solver."""
+        self.session.close()
+
+
+def fraig_equivalent(
+    fn: BooleanFunction,
+    other: BooleanFunction,
+    num_words: int = 32,
+    conflict_limit: int | None = 1000,
+    solver_name: str = "cadical195",
+    seed: int | None = None,
+    verbose: bool = False
+) -> bool:
+    """Check if two functions are equivalent, by simulation, SAT sweeping, then a final miter.
+
+    The functions are first simulated together on random patterns: if their signatures
+    differ, they are not equivalent, and no SAT query is needed. Otherwise the internal
+    nodes are swept (see `Fraig`) until the two outputs are merged, and only if they
+    aren't, the miter of the two outputs is solved (with the proven equivalences).
+
+    :param fn: A function.
+    :type fn: BooleanFunction
+    :param other: The function to compare to.
+    :type other: BooleanFunction
+    :param num_words: The number of 64 bit words of random patterns, defaults to 32
+    :type num_words: int, optional
+    :param conflict_limit: The most conflicts for each internal SAT query, defaults to 1000
+    :type conflict_limit: int | None, optional
+    :param solver_name: A string giving the name of a sat solver provided by PySAT,
+        defaults to "cadical195"
+    :type solver_name: str, optional
+    :param seed: A seed for the random patterns, defaults to None
+    :type seed: int | None, optional
+    :param verbose: If `True`, print the sweeping statistics, defaults to False
+    :type verbose: bool, optional
+    :return: `True` if the functions have the same truth table.
+    :rtype: bool
+    """
+    if fn is other:
+        return True
+    fraig = Fraig([fn, other], num_words, conflict_limit, solver_name, seed)
+    try:
+        a, b = (fraig.netlist.slot(f) for f in (fn, other))
+        if not np.array_equal(fraig.signatures[a], fraig.signatures[b]):
+            if verbose:
+                print("Rejected by simulation")
+            return False
+        fraig.sweep(until = [a, b])
+        result = fraig.equivalent(a, b)
+        if verbose:
+            print(f"{fraig.stats}, SAT queries: {fraig.session.num_queries}")
+        return result
+    finally:
+        fraig.close()
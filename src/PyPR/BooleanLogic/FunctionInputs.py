@@ -1,6 +1,9 @@
 from PyPR.BooleanLogic.BooleanFunction import BooleanFunction
 
 class CONST(BooleanFunction):
+    __slots__ = ('value',)
+    _default_arg_limit = 0
+
     def __init__(self, value):
         self.args = tuple()
         self.arg_limit = 0
@@ -102,6 +105,9 @@ class CONST(BooleanFunction):
 
 
 class VAR(BooleanFunction):
+    __slots__ = ('index',)
+    _default_arg_limit = 0
+
     def __init__(self, index):
         self.args = tuple()
         self.arg_limit = 0
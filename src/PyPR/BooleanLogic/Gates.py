@@ -15,6 +15,8 @@ def invert(bool_like):
         return bool_like.__invert__()
 
 class XOR(BooleanFunction):
+    __slots__ = ()
+
     def __init__(self, *args, arg_limit = None):
         self.arg_limit = arg_limit
         self.args = args
@@ -118,6 +120,8 @@ class XOR(BooleanFunction):
 
 
 class AND(BooleanFunction):
+    __slots__ = ()
+
     def __init__(self, *args, arg_limit = None):
         self.arg_limit = arg_limit
         self.args = args
@@ -210,6 +214,8 @@ class AND(BooleanFunction):
 
 
 class OR(BooleanFunction):
+    __slots__ = ()
+
     def __init__(self, *args, arg_limit = None):
         self.arg_limit = arg_limit
         self.args = args
@@ -300,6 +306,8 @@ class OR(BooleanFunction):
 
 
 class XNOR(BooleanFunction):
+    __slots__ = ()
+
     def __init__(self, *args, arg_limit = None):
         self.arg_limit = arg_limit
         self.args = args
@@ -365,7 +373,7 @@ class XNOR(BooleanFunction):
             # use negation for the final output
             idx = len(gate_labels)-1
             clauses += cls.tseytin_formula(
-                gate_labels[idx-1], arg_labels[idx+1], gate_labels[idx]
+                gate_labels[idx], gate_labels[idx-1], arg_labels[idx+1]
             )
             
             return clauses
@@ -373,6 +381,8 @@ class XNOR(BooleanFunction):
 
 
 class NAND(BooleanFunction):
+    __slots__ = ()
+
     def __init__(self, *args, arg_limit = None):
         self.arg_limit = arg_limit
         self.args = args
@@ -438,7 +448,7 @@ class NAND(BooleanFunction):
             # use negation for the final output
             idx = len(gate_labels)-1
             clauses += cls.tseytin_formula(
-                gate_labels[idx-1], arg_labels[idx+1], gate_labels[idx]
+                gate_labels[idx], gate_labels[idx-1], arg_labels[idx+1]
             )
 
             return clauses
@@ -447,6 +457,8 @@ class NAND(BooleanFunction):
 
 
 class NOR(BooleanFunction):
+    __slots__ = ()
+
     def __init__(self, *args, arg_limit = None):
         self.arg_limit = arg_limit
         self.args = args
@@ -513,7 +525,7 @@ class NOR(BooleanFunction):
             # use negation for the final output
             idx = len(gate_labels)-1
             clauses += cls.tseytin_formula(
-                gate_labels[idx-1], arg_labels[idx+1], gate_labels[idx]
+                gate_labels[idx], gate_labels[idx-1], arg_labels[idx+1]
             )
             
             return clauses
@@ -522,6 +534,9 @@ class NOR(BooleanFunction):
 
 
 class NOT(BooleanFunction):
+    __slots__ = ()
+    _default_arg_limit = 1
+
     def __init__(self, *args):
         if len(args) != 1:
             raise ValueError("NOT takes only 1 argument")
@@ -0,0 +1,186 @@
+# TYPE ANNOTATIONS: TRUE
+# DOCSTRINGS: TRUE
+
+from typing import Any
+
+from time import perf_counter
+
+# The passes over the DAG (compose, merge_redundant, subfunctions, eval_ANF,
+# translate_ANF and the tseytin passes) keep a few local counters while they
+# run, and report them with `begin_pass`/`end_pass`. Without an active
+# Instrumentation, `begin_pass` returns None and nothing is recorded.
+_active: list["Instrumentation"] = []
+_open: list["PassRecord"] = []
+
+_COUNTERS = ('nodes_visited', 'cache_hits', 'peak_stack', 'allocations', 'wall_time')
+
+
+class PassRecord:
+    """The work done by a single run of a DAG pass.
+
+    - **nodes_visited**: The number of distinct nodes the pass processed.
+    - **cache_hits**: The number of times the pass reached a node it had already
+        processed (through another parent), and reused the result.
+    - **peak_stack**: The largest size of the traversal stack.
+    - **allocations**: The number of new objects the pass built (e.g. nodes for
+        `compose`/`merge_redundant`, ANF values for `eval_ANF`, labels for
+        `tseytin_labels`, clauses for `tseytin_clauses`).
+    - **wall_time**: The time taken, in seconds, including any passes it ran itself.
+    - **depth**: How many instrumented passes this pass was nested inside of (e.g.
+        `translate_ANF` runs `eval_ANF` at depth 1).
+    """
+    __slots__ = ('name', 'depth', 'nodes_visited', 'cache_hits', 'peak_stack', 'allocations', 'wall_time', '_start')
+
+    def __init__(self, name: str, depth: int = 0):
+        self.name = name
+        self.depth = depth
+        self.nodes_visited = 0
+        self.cache_hits = 0
+        self.peak_stack = 0
+        self.allocations = 0
+        self.wall_time = 0.0
+        self._start = perf_counter()
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the record as a dict (e.g. for JSON)."""
+        return {'name': self.name, 'depth': self.depth, **{c: getattr(self, c) for c in _COUNTERS}}
+
+    def __repr__(self) -> str:
+        return f"PassRecord({', '.join(f'{k}={v!r}' for k, v in self.to_dict().items())})"
+
+
+def begin_pass(name: str) -> PassRecord | None:
+    """Start recording a pass, if any Instrumentation is active.
+
+    :param name: The name of the pass.
+    :type name: str
+    :return: A record to pass to `end_pass`, or None when nothing is being recorded.
+    :rtype: PassRecord | None
+    """
+    if not _active:
+        return None
+    record = PassRecord(name, len(_open))
+    _open.append(record)
+    return record
+
+def end_pass(
+    record: PassRecord,
+    nodes_visited: int = 0,
+    cache_hits: int = 0,
+    peak_stack: int = 0,
+    allocations: int = 0
+) -> None:
+    """Finish recording a pass, and add the record to every active Instrumentation.
+
+    :param record: The record returned by `begin_pass`.
+    :type record: PassRecord
+    :param nodes_visited: The number of distinct nodes processed, defaults to 0
+    :type nodes_visited: int, optional
+    :param cache_hits: The number of revisits to processed nodes, defaults to 0
+    :type cache_hits: int, optional
+    :param peak_stack: The largest size of the traversal stack, defaults to 0
+    :type peak_stack: int, optional
+    :param allocations: The number of new objects built, defaults to 0
+    :type allocations: int, optional
+    """
+    record.wall_time = perf_counter() - record._start
+    record.nodes_visited = nodes_visited
+    record.cache_hits = cache_hits
+    record.peak_stack = peak_stack
+    record.allocations = allocations
+
+    # also drop records of nested passes which raised an exception
+    while _open and _open.pop() is not record:
+        pass
+    for instrumentation in _active:
+        instrumentation.records.append(record)
+
+
+class Instrumentation:
+    """Collects counters from the DAG passes which run while it is active.
+
+    Use it as a context manager. Every instrumented pass which finishes inside the
+    `with` block adds a `PassRecord` to `records` (nested instrumentations all receive
+    the records). For example:
+    ```python
+    with Instrumentation() as inst:
+        fn.merge_redundant().translate_ANF()
+    print(inst.report())
+    ```
+    Instrumentation is opt-in: while none is active, the passes only keep a few local
+    counters, and don't record or time anything.
+    """
+    label: Any
+    records: list[PassRecord]
+
+    def __init__(self, label: Any = None):
+        """Create an empty instrumentation.
+
+        :param label: An optional label, added to the exported records (e.g. the
+            pipeline or register which is being measured), defaults to None
+        :type label: Any, optional
+        """
+        self.label = label
+        self.records = []
+
+    def __enter__(self) -> "Instrumentation":
+        _active.append(self)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        _active.remove(self)
+        if not _active:
+            _open.clear()
+
+    @property
+    def is_active(self) -> bool:
+        """`True` while the instrumentation is collecting records."""
+        return self in _active
+
+    def clear(self) -> None:
+        """Remove all of the collected records."""
+        self.records = []
+
+    def to_records(self) -> list[dict[str, Any]]:
+        """Export the collected records as dicts, in the order the passes finished.
+
+        :return: A dict for each record (see `PassRecord.to_dict`), with the label
+            of this instrumentation under `label`.
+        :rtype: list[dict[str, Any]]
+        """
+        return [{'label': self.label, **record.to_dict()} for record in self.records]
+
+    def summary(self) -> dict[str, dict[str, Any]]:
+        """Aggregate the records of each pass.
+
+        :return: A dict mapping each pass name to the number of `calls`, the totals
+            of every counter, and the largest `peak_stack` of any call.
+        :rtype: dict[str, dict[str, Any]]
+        """
+        summary: dict[str, dict[str, Any]] = {}
+        for record in self.records:
+            if record.name not in summary:
+                summary[record.name] = {'calls': 0, **{c: 0 for c in _COUNTERS}}
+            entry = summary[record.name]
+            entry['calls'] += 1
+            for counter in _COUNTERS:
+                if counter == 'peak_stack':
+                    entry[counter] = max(entry[counter], record.peak_stack)
+                else:
+                    entry[counter] += getattr(record, counter)
+        return summary
+
+    def report(self) -> str:
+        """A table of the summary, with the most expensive passes (by wall time) first.
+
+        :return: The table, as a string.
+        :rtype: str
+        """
+        columns = ('calls',) + _COUNTERS
+        rows = sorted(self.summary().items(), key = lambda item: -item[1]['wall_time'])
+        width = max([len('pass')] + [len(name) for name, _ in rows])
+        lines = [f"{'pass':<{width}}" + ''.join(f"  {c:>13}" for c in columns)]
+        for name, entry in rows:
+            values = [f"{entry[c]:>13.4f}" if c == 'wall_time' else f"{entry[c]:>13}" for c in columns]
+            lines.append(f"{name:<{width}}" + ''.join(f"  {v}" for v in values))
+        return "\n".join(lines)
@@ -0,0 +1,253 @@
+# TYPE ANNOTATIONS: TRUE
+# DOCSTRINGS: TRUE
+
+from typing import Any
+
+from PyPR.BooleanLogic.BooleanFunction import BooleanFunction
+from PyPR.BooleanLogic.Gates import XOR, AND, OR, XNOR, NAND, NOR, NOT
+from PyPR.BooleanLogic.FunctionInputs import VAR, CONST
+
+import numpy as np
+from numba import njit, prange
+
+# opcodes for the flattened gates. The negated gates are the
+# associative gate opcode + 3, which the kernels rely on.
+OPCODES = {XOR: 0, AND: 1, OR: 2, XNOR: 3, NAND: 4, NOR: 5, NOT: 6}
+
+
+class Netlist:
+    """A flattened, level-scheduled version of one or more BooleanFunctions.
+
+    Every node of the DAG is given a slot in a flat value array. The first
+    `num_inputs` slots hold the input variables, followed by two slots for the
+    constants 0 and 1, followed by the gates. Gates are grouped into levels by
+    their dependency depth (every gate in a level only reads slots from previous
+    levels), and within each level they are sorted into slices which share an
+    opcode. Because the gates in a slice are independent and do the same work,
+    each slice can be evaluated with a parallel loop.
+    """
+    num_inputs: int
+    num_slots: int
+    gate_offset: int
+
+    def __init__(self,
+        fns: list[BooleanFunction],
+        num_inputs: int | None = None
+    ):
+        """Flatten and schedule a list of functions which share one input array.
+
+        :param fns: The functions to flatten. Nodes shared between the functions
+            are only evaluated once.
+        :type fns: list[BooleanFunction]
+        :param num_inputs: The length of the input array, defaults to one more than
+            the largest variable index used by the functions.
+        :type num_inputs: int | None, optional
+        :raises TypeError: If a node has a type which has no opcode.
+        """
+        if num_inputs == None:
+            num_inputs = max((fn.max_idx() for fn in fns), default=-1) + 1
+        self.num_inputs = num_inputs
+        const_slots = {0: num_inputs, 1: num_inputs+1}
+
+        # postorder traversal over the shared DAG:
+        levels = {}
+        gates = []
+        stack: list[Any] = list(reversed(fns))
+        last = None
+        while stack:
+            curr_node = stack[-1]
+
+            # dont interact with sentinel values
+            if curr_node is False:
+                last = stack.pop()
+                continue
+
+            # hitting a visited node while travelling down:
+            elif curr_node in levels:
+                last = stack.pop()
+                continue
+
+            # leaves are always level 0:
+            elif curr_node.is_leaf():
+                if type(curr_node) == CONST and curr_node.value not in const_slots:
+                    raise ValueError(f"Unable to flatten constant {curr_node.value}")
+                levels[curr_node] = 0
+                last = stack.pop()
+                continue
+
+            # moving up the tree after finishing children:
+            elif last is False:
+                if type(curr_node) not in OPCODES:
+                    raise TypeError(f"No opcode for node of type {type(curr_node).__name__}")
+                levels[curr_node] = 1 + max((levels[arg] for arg in curr_node.args), default=0)
+                gates.append(curr_node)
+                last = stack.pop()
+                continue
+
+            # before moving down to children:
+            else:
+                stack.append(False) # sentinel value
+                for child in reversed(curr_node.args):
+                    stack.append(child)
+                continue
+
+        # sort gates into (level, opcode) slices, then assign slots in that order
+        gates.sort(key = lambda g: (levels[g], OPCODES[type(g)]))
+        self.gate_offset = num_inputs + 2
+        self.num_slots = self.gate_offset + len(gates)
+
+        slots = {g: self.gate_offset + i for i, g in enumerate(gates)}
+        def slot(node):
+            if type(node) == VAR: return node.index
+            if type(node) == CONST: return const_slots[node.value]
+            return slots[node]
+
+        arg_ptr = [0]
+        arg_idx = []
+        slice_ptr = [0]
+        slice_ops = []
+        level_ptr = [0]
+        for i, gate in enumerate(gates):
+            key = (levels[gate], OPCODES[type(gate)])
+
+            # start a new slice/level when the key changes:
+            if i > 0 and key != (levels[gates[i-1]], OPCODES[type(gates[i-1])]):
+                slice_ptr.append(i)
+                if key[0] != levels[gates[i-1]]:
+                    level_ptr.append(len(slice_ops))
+            if len(slice_ops) < len(slice_ptr):
+                slice_ops.append(key[1])
+
+            arg_idx += [slot(arg) for arg in gate.args]
+            arg_ptr.append(len(arg_idx))
+
+        if gates:
+            slice_ptr.append(len(gates))
+            level_ptr.append(len(slice_ops))
+
+        self.arg_ptr = np.asarray(arg_ptr, dtype=np.int64)
+        self.arg_idx = np.asarray(arg_idx, dtype=np.int64)
+        self.slice_ptr = np.asarray(slice_ptr, dtype=np.int64)
+        self.slice_ops = np.asarray(slice_ops, dtype=np.int64)
+        self.level_ptr = np.asarray(level_ptr, dtype=np.int64)
+        self.outputs = np.asarray([slot(fn) for fn in fns], dtype=np.int64)
+
+        self._gate_slots = slots
+        self._scratch = {}
+
+    def slot(self, node: BooleanFunction) -> int:
+        """The slot of a node of the flattened functions in the value array.
+
+        :param node: An input variable, a constant 0 or 1, or a gate of the functions.
+        :type node: BooleanFunction
+        :raises KeyError: If the node is a gate which is not part of the functions.
+        :return: The index of the node's value in the value array.
+        :rtype: int
+        """
+        if type(node) == VAR:
+            return node.index
+        elif type(node) == CONST:
+            return self.num_inputs + int(node.value)
+        return self._gate_slots[node]
+
+    def gates(self) -> list[BooleanFunction]:
+        """The gates of the flattened functions, in slot (and so topological) order.
+
+        :return: The gate in slot `gate_offset + i`, for each i.
+        :rtype: list[BooleanFunction]
+        """
+        return sorted(self._gate_slots, key = self._gate_slots.__getitem__)
+
+    @property
+    def num_levels(self) -> int:
+        """The number of dependent levels (the depth of the DAG)."""
+        return len(self.level_ptr) - 1
+
+    @property
+    def num_gates(self) -> int:
+        """The number of gates which are evaluated."""
+        return self.num_slots - self.gate_offset
+
+    def evaluate(self,
+        inputs: np.ndarray,
+        out: np.ndarray | None = None,
+        parallel_threshold: int = 4096
+    ) -> np.ndarray:
+        """Evaluate all of the flattened functions on a single input array.
+
+        :param inputs: An array of 0/1 values with length `num_inputs`
+        :type inputs: np.ndarray
+        :param out: An optional buffer to write the outputs into.
+        :type out: np.ndarray | None, optional
+        :param parallel_threshold: Slices with fewer gates than this are evaluated
+            serially, because the threads cost more than they save, defaults to 4096
+        :type parallel_threshold: int, optional
+        :return: An array with the value of each function, in the order they were passed.
+        :rtype: np.ndarray
+        """
+        # reuse a scratch buffer for the node values
+        values = self._scratch.get(inputs.dtype)
+        if values is None:
+            values = np.zeros(self.num_slots, dtype=inputs.dtype)
+            self._scratch[inputs.dtype] = values
+
+        values[:self.num_inputs] = inputs
+        values[self.num_inputs] = 0
+        values[self.num_inputs+1] = 1
+
+        _evaluate_levels(
+            values, values.dtype.type(1), self.gate_offset,
+            self.level_ptr, self.slice_ptr, self.slice_ops,
+            self.arg_ptr, self.arg_idx, parallel_threshold
+        )
+
+        if out is None:
+            return values[self.outputs]
+        out[:] = values[self.outputs]
+        return out
+
+
+@njit(inline='always')
+def _evaluate_gate(values, ones, op, slot, arg_ptr, arg_idx, g):
+    start = arg_ptr[g]
+    end = arg_ptr[g+1]
+
+    # NOT has exactly one argument
+    if op == 6:
+        values[slot] = values[arg_idx[start]] ^ ones
+        return
+
+    # empty gates evaluate to the identity of the operation
+    base = op % 3
+    if end == start:
+        acc = ones if base == 1 else ones ^ ones
+    else:
+        acc = values[arg_idx[start]]
+        for k in range(start+1, end):
+            if base == 0:
+                acc = acc ^ values[arg_idx[k]]
+            elif base == 1:
+                acc = acc & values[arg_idx[k]]
+            else:
+                acc = acc | values[arg_idx[k]]
+
+    if op >= 3:
+        acc = acc ^ ones
+    values[slot] = acc
+
+@njit(parallel=True)
+def _evaluate_levels(
+    values, ones, gate_offset,
+    level_ptr, slice_ptr, slice_ops,
+    arg_ptr, arg_idx, parallel_threshold
+):
+    # levels must run in order, but every gate within a slice is independent
+    for level in range(len(level_ptr)-1):
+        for s in range(level_ptr[level], level_ptr[level+1]):
+            op = slice_ops[s]
+            if slice_ptr[s+1] - slice_ptr[s] >= parallel_threshold:
+                for g in prange(slice_ptr[s], slice_ptr[s+1]):
+                    _evaluate_gate(values, ones, op, gate_offset + g, arg_ptr, arg_idx, g)
+            else:
+                for g in range(slice_ptr[s], slice_ptr[s+1]):
+                    _evaluate_gate(values, ones, op, gate_offset + g, arg_ptr, arg_idx, g)
@@ -0,0 +1,147 @@
+# TYPE ANNOTATIONS: TRUE
+# DOCSTRINGS: TRUE
+
+from typing import Any
+
+from PyPR.BooleanLogic.BooleanFunction import BooleanFunction
+from PyPR.BooleanLogic.BooleanANF import BooleanANF
+from PyPR.BooleanLogic.BinaryFormat import generate_binary, parse_binary
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from math import ceil
+import os
+
+import numpy as np
+
+# Monomial encoding, used to send ANFs between processes (pickling nested
+# frozensets is slow and large). All values are little endian:
+#   uint64: the number of monomials, n
+#   uint8, uint8: the byte widths (1, 2 or 4) of the lengths and of the variables
+#   n unsigned ints: the number of variables in each monomial
+#   unsigned ints: the variable indices of every monomial, concatenated (sorted)
+_WIDTHS = {1: '<u1', 2: '<u2', 4: '<u4'}
+
+def _width(max_value: int) -> int:
+    return 1 if max_value < 2**8 else 2 if max_value < 2**16 else 4
+
+
+def encode_ANF(anf: BooleanANF) -> bytes:
+    """Encode a BooleanANF over integer variables into the compact monomial encoding.
+
+    :param anf: The ANF to encode. Its variables must be integers in [0, 2**32).
+    :type anf: BooleanANF
+    :raises TypeError: If a variable is not an integer in range.
+    :return: The encoded ANF.
+    :rtype: bytes
+    """
+    terms = [sorted(term) for term in anf.terms]
+    lengths = np.asarray([len(term) for term in terms], dtype = np.int64)
+    try:
+        flat = np.fromiter(chain.from_iterable(terms), dtype = np.int64, count = int(lengths.sum()))
+    except (TypeError, ValueError, OverflowError):
+        raise TypeError("Only ANFs over integer variables can be encoded")
+    if len(flat) and (flat.min() < 0 or flat.max() >= 2**32):
+        raise TypeError("Only ANFs over variables in [0, 2**32) can be encoded")
+
+    length_width = _width(int(lengths.max(initial = 0)))
+    var_width = _width(int(flat.max(initial = 0)))
+    return b"".join([
+        np.asarray([len(terms)], dtype = '<u8').tobytes(),
+        bytes([length_width, var_width]),
+        lengths.astype(_WIDTHS[length_width]).tobytes(),
+        flat.astype(_WIDTHS[var_width]).tobytes(),
+    ])
+
+def decode_ANF(data: bytes) -> BooleanANF:
+    """Decode a BooleanANF from the monomial encoding produced by `encode_ANF`.
+
+    :param data: The encoded ANF.
+    :type data: bytes
+    :return: The decoded ANF.
+    :rtype: BooleanANF
+    """
+    num_terms = int(np.frombuffer(data, dtype = '<u8', count = 1)[0])
+    length_width, var_width = data[8], data[9]
+    lengths = np.frombuffer(data, dtype = _WIDTHS[length_width], count = num_terms, offset = 10).tolist()
+    flat = np.frombuffer(data, dtype = _WIDTHS[var_width], offset = 10 + length_width*num_terms).tolist()
+
+    terms = []
+    pos = 0
+    for length in lengths:
+        terms.append(frozenset(flat[pos:pos + length]))
+        pos += length
+    return BooleanANF(frozenset(terms), fast_init = True)
+
+
+def _limit_memory(memory_limit: int | None) -> None:
+    # process pool initializer: cap the address space of each worker
+    if memory_limit == None:
+        return
+    import resource # unix only
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    resource.setrlimit(resource.RLIMIT_AS, (memory_limit, hard))
+
+def _translate_shard(data: bytes) -> list[bytes]:
+    # worker: decode a shard of functions, translate each, and encode the results
+    return [encode_ANF(BooleanANF.from_BooleanFunction(fn)) for fn in parse_binary(data)]
+
+
+def translate_ANF_parallel(
+    fns: list[BooleanFunction],
+    max_workers: int | None = None,
+    memory_limit: int | None = None,
+    shard_size: int | None = None
+) -> list[BooleanANF]:
+    """Compute the ANF of many functions in a pool of worker processes.
+
+    The functions are split into shards, and each shard is sent to a worker in
+    the binary format (so nodes shared inside a shard are only sent and translated
+    once). The workers send back their ANFs in a compact monomial encoding, which
+    is decoded in the parent.
+
+    :param fns: The functions to translate (e.g. the bits of a register).
+    :type fns: list[BooleanFunction]
+    :param max_workers: The number of worker processes. Defaults to the number of
+        CPUs, and is never more than the number of shards. With one worker, the
+        functions are translated in this process.
+    :type max_workers: int | None, optional
+    :param memory_limit: A cap in bytes on the address space of each worker, so a
+        translation which blows up fails with a `MemoryError` instead of exhausting
+        the machine (unix only). Defaults to None (no cap).
+    :type memory_limit: int | None, optional
+    :param shard_size: The number of functions in each shard, defaults to splitting
+        the functions into about four shards per worker.
+    :type shard_size: int | None, optional
+    :raises MemoryError: If a worker runs out of memory under the memory cap.
+    :return: The ANF of each function, in the same order.
+    :rtype: list[BooleanANF]
+    """
+    if not fns:
+        return []
+
+    if max_workers == None:
+        max_workers = os.cpu_count() or 1
+    if shard_size == None:
+        shard_size = max(1, ceil(len(fns) / (4 * max_workers)))
+    shards = [fns[i:i + shard_size] for i in range(0, len(fns), shard_size)]
+    max_workers = min(max_workers, len(shards))
+
+    if max_workers <= 1 and memory_limit == None:
+        return [BooleanANF.from_BooleanFunction(fn) for fn in fns]
+
+    # send the largest shards first, so one large shard doesn't finish last
+    payloads = [generate_binary(*shard) for shard in shards]
+    order = sorted(range(len(shards)), key = lambda i: len(payloads[i]), reverse = True)
+
+    results: list[Any] = [None] * len(shards)
+    with ProcessPoolExecutor(
+        max_workers = max_workers,
+        initializer = _limit_memory,
+        initargs = (memory_limit,)
+    ) as executor:
+        futures = {i: executor.submit(_translate_shard, payloads[i]) for i in order}
+        for i, future in futures.items():
+            results[i] = future.result()
+
+    return [decode_ANF(data) for shard in results for data in shard]
@@ -0,0 +1,220 @@
+# TYPE ANNOTATIONS: TRUE
+# DOCSTRINGS: TRUE
+
+from typing import Any
+from collections.abc import Iterable, Sequence
+
+import multiprocessing
+import os
+import queue
+import random
+import sys
+from time import perf_counter
+
+# A configuration is a pysat solver name and a seed. Seed 0 runs the solver on the
+# clauses as given; any other seed shuffles the clauses and picks random initial
+# phases, so several copies of one solver explore different parts of the search.
+# Runs of a portfolio only use as many configurations as there are workers, so
+# the most useful ones come first.
+DEFAULT_PORTFOLIO: tuple[tuple[str, int], ...] = (
+    ("cadical195", 0),
+    ("glucose4", 0),
+    ("cadical195", 1),
+    ("maplechrono", 0),
+    ("cadical195", 2),
+    ("minisat22", 0),
+    ("glucose4", 1),
+    ("cadical195", 3),
+)
+
+Configuration = tuple[str, int]
+
+# `satisfiable` and `functionally_equivalent` use a portfolio by default (with
+# portfolio = None) when there is more than one CPU and the instance has at least
+# this many clauses. Smaller instances are usually solved before the workers
+# would have started.
+AUTO_PORTFOLIO_CLAUSES = 100000
+
+
+def _solve(
+    clauses: Sequence[Sequence[int]],
+    assumptions: list[int],
+    solver_name: str,
+    seed: int
+) -> tuple[bool, list[int] | None]:
+    # run a single configuration
+    from pysat.solvers import Solver
+
+    rng = random.Random(seed)
+    if seed:
+        clauses = list(clauses)
+        rng.shuffle(clauses)
+    with Solver(name = solver_name, bootstrap_with = clauses) as solver:
+        if seed:
+            try:
+                solver.set_phases([v if rng.random() < 0.5 else -v for v in range(1, solver.nof_vars() + 1)])
+            except NotImplementedError:
+                pass
+        result = solver.solve(assumptions = assumptions)
+        model: Any = solver.get_model() if result else None
+    return bool(result), model
+
+def _worker(
+    index: int,
+    clauses: Sequence[Sequence[int]],
+    assumptions: list[int],
+    solver_name: str,
+    seed: int,
+    results: Any
+) -> None:
+    # worker process: report (index, 'sat'/'unsat', model) or (index, 'error', message)
+    try:
+        result, model = _solve(clauses, assumptions, solver_name, seed)
+        results.put((index, 'sat' if result else 'unsat', model))
+    except Exception as e:
+        results.put((index, 'error', f"{solver_name} (seed {seed}): {e!r}"))
+
+
+def fork_is_safe() -> bool:
+    """Check if worker processes can be started by forking this process.
+
+    Forking is only safe while the process has a single thread, and before numba's
+    threading layer has been started (by the first `parallel=True` kernel which
+    runs): a forked copy of its thread pool can hang the process at exit, even on
+    one core. Threads started by other libraries aren't visible to `threading`, so
+    they are counted by the OS. This is only known on Linux, and is assumed to be
+    unsafe elsewhere.
+
+    :return: `True` if the process has one thread and no numba thread pool.
+    :rtype: bool
+    """
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return False
+    # (only check numba if it was imported)
+    parallel = sys.modules.get("numba.np.ufunc.parallel")
+    if parallel != None and getattr(parallel, "_is_initialized", True):
+        return False
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    return int(line.split()[1]) == 1
+    except OSError:
+        pass
+    return False
+
+def _context() -> Any:
+    # fork while it is safe (it is the fastest, and doesn't re-import __main__),
+    # otherwise start the workers from a clean server process
+    if fork_is_safe():
+        return multiprocessing.get_context("fork")
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def solve_portfolio(
+    clauses: Sequence[Sequence[int]],
+    assumptions: Iterable[int] = (),
+    configurations: Sequence[str | Configuration] | None = None,
+    max_workers: int | None = None,
+    time_limit: float | None = None
+) -> tuple[bool | None, list[int] | None, Configuration | None]:
+    """Solve a CNF with a portfolio of solver configurations in parallel.
+
+    Every configuration runs in its own worker process on the same clauses. The
+    first one to finish gives the answer, and the others are terminated. Solvers
+    which fail (e.g. unknown names, or assumptions they don't support) are ignored
+    as long as another configuration gives an answer.
+
+    With a single worker and no time limit, the first configuration is solved in
+    this process, so on one core this costs the same as a plain solver call.
+
+    Workers are forked while this process has a single thread (see `fork_is_safe`).
+    Once it has more, e.g. after a numba `parallel=True` kernel has run, they are
+    started with the "forkserver" (or "spawn") method instead, which imports the
+    main module again in the workers. A script which calls this then has to guard
+    its top level code with `if __name__ == "__main__":`.
+
+    :param clauses: The clauses, as in `tseytin`.
+    :type clauses: Sequence[Sequence[int]]
+    :param assumptions: Literals to assume, defaults to ()
+    :type assumptions: Iterable[int], optional
+    :param configurations: The configurations to run, as pysat solver names or
+        (solver name, seed) pairs, defaults to `DEFAULT_PORTFOLIO`. Only the first
+        `max_workers` are used.
+    :type configurations: Sequence[str | tuple[str, int]] | None, optional
+    :param max_workers: The number of worker processes. Defaults to the number of
+        CPUs for the default portfolio, and to one per configuration otherwise.
+    :type max_workers: int | None, optional
+    :param time_limit: The most time to wait for an answer, in seconds, defaults to
+        None (no limit).
+    :type time_limit: float | None, optional
+    :raises RuntimeError: If every configuration failed.
+    :return: `(satisfiable, model, configuration)`: whether the clauses are satisfiable
+        (None if the time limit was reached), the model from the solver (if satisfiable),
+        and the configuration which answered.
+    :rtype: tuple[bool | None, list[int] | None, tuple[str, int] | None]
+    """
+    if configurations == None:
+        configurations = DEFAULT_PORTFOLIO
+        if max_workers == None:
+            max_workers = os.cpu_count() or 1
+    if max_workers == None:
+        max_workers = len(configurations)
+    configs = [(config, 0) if isinstance(config, str) else tuple(config) for config in configurations]
+    configs = configs[:max(1, max_workers)]
+    assumptions = list(assumptions)
+
+    if len(configs) == 1 and time_limit == None:
+        solver_name, seed = configs[0]
+        try:
+            result, model = _solve(clauses, assumptions, solver_name, seed)
+        except Exception as e:
+            # the same error as when the configuration fails in a worker
+            raise RuntimeError(f"Every solver in the portfolio failed: {solver_name} (seed {seed}): {e!r}") from e
+        return result, model, configs[0]
+
+    context = _context()
+    results = context.Queue()
+    workers = [
+        context.Process(
+            target = _worker,
+            args = (index, clauses, assumptions, solver_name, seed, results),
+            daemon = True
+        )
+        for index, (solver_name, seed) in enumerate(configs)
+    ]
+
+    deadline = None if time_limit == None else perf_counter() + time_limit
+    errors = []
+    try:
+        for worker in workers:
+            worker.start()
+
+        while len(errors) < len(workers):
+            # wake up regularly, to notice the deadline or workers which crashed
+            timeout = 0.05 if deadline == None else min(0.05, max(0, deadline - perf_counter()))
+            try:
+                index, status, payload = results.get(timeout = timeout)
+            except queue.Empty:
+                if deadline != None and perf_counter() >= deadline:
+                    return None, None, None
+                if not any(worker.is_alive() for worker in workers) and results.empty():
+                    crashed = [w for w in workers if w.exitcode not in (0, None)]
+                    raise RuntimeError(f"{len(crashed)} portfolio workers exited without an answer")
+                continue
+
+            if status == 'error':
+                errors.append(payload)
+                continue
+            return status == 'sat', payload, configs[index]
+
+        raise RuntimeError("Every solver in the portfolio failed: " + "; ".join(errors))
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        for worker in workers:
+            worker.join()
+        results.close()
@@ -1,10 +1,17 @@
-from collections.abc import Iterator
+from collections.abc import Iterator, Iterable
 from typing import Any
+from itertools import islice
+from time import perf_counter
+import os
 
-from PyPR.BooleanLogic import BooleanFunction,XOR
+from PyPR.BooleanLogic import BooleanFunction,XOR,AND,NOT
+from PyPR.BooleanLogic.Instrumentation import begin_pass, end_pass
+from PyPR.BooleanLogic.Portfolio import solve_portfolio, fork_is_safe, DEFAULT_PORTFOLIO, AUTO_PORTFOLIO_CLAUSES
 from pysat.formula import CNF
 from pysat.solvers import Solver
 
+import numpy as np
+
 
 def tseytin(self, 
     prev_clauses: list[tuple[int]] | None = None, 
@@ -66,17 +73,22 @@ def tseytin(self,
         dict[int,int]
     ]
     """ 
+    record = begin_pass('tseytin')
     clauses: dict[tuple,None]
     if not prev_clauses: clauses = dict.fromkeys([(1,)])
     else: clauses = dict.fromkeys([tuple(x) for x in prev_clauses])
+    num_prev_clauses = len(clauses)
 
     node_labels, variable_labels, = self.tseytin_labels(prev_node_labels, prev_variable_labels)
     clauses.update(dict.fromkeys(self.tseytin_clauses(node_labels)))
+    if record:
+        end_pass(record, allocations = len(clauses) - num_prev_clauses)
     return list(clauses.keys()), node_labels, variable_labels
     
 def tseytin_labels(self,
     node_labels: dict[BooleanFunction,list[int]] | None = None,
-    variable_labels: dict[int,int] | None = None
+    variable_labels: dict[int,int] | None = None,
+    next_index: int | None = None
 ) -> tuple[
     dict[BooleanFunction,list[int]],
     dict[int,int]
@@ -118,12 +130,19 @@ def tseytin_labels(self,
         variables in the sat solver. This can be used to convert the sat solution back to a satisfying
         assignment of input variables, or to impose additional conditions based on extra information.
     :type prev_variable_labels: dict[int,int]
+    :param next_index: The first free solver variable, when continuing from previous
+        labels. Defaults to one more than the largest previous label, which takes a
+        pass over the previous labels.
+    :type next_index: int | None, optional
     :return: (Node Labels, Variable Labels)
     :rtype: tuple[
         dict[BooleanFunction,list[int]],
         dict[int,int]
     ]
     """
+    record = begin_pass('tseytin_labels')
+    hits = peak = 0
+
     stack = [self]
 
     # initialize index maps if needed
@@ -137,15 +156,20 @@ def tseytin_labels(self,
         raise ValueError("Missing node labels")
     elif variable_labels == None:
         raise ValueError("Missing variable labels")
+    elif next_index != None:
+        next_available_index = next_index
     else:
         # if both passed in, just set the next index
         next_available_index = max([max(ls) for ls in node_labels.values()]) + 1
+    first_index = next_available_index
+    num_prev_labels = len(node_labels)
 
     while stack:
         curr_node = stack[-1]
 
         #don't visit nodes twice:
         if curr_node in node_labels:
+            hits += 1
             stack.pop()
 
         # handle VAR and CONST Nodes
@@ -169,7 +193,10 @@ def tseytin_labels(self,
         else:
             for child in reversed(curr_node.args):
                 stack.append(child)
+            if len(stack) > peak: peak = len(stack)
 
+    if record:
+        end_pass(record, len(node_labels) - num_prev_labels, hits, peak, next_available_index - first_index)
     return node_labels,variable_labels
 
 def tseytin_clauses(self, 
@@ -191,6 +218,9 @@ def tseytin_clauses(self,
     :return: clauses which encode the given function for a sat solver.
     :rtype: list[tuple[int]],
     """
+    record = begin_pass('tseytin_clauses')
+    hits = peak = 0
+
     visited = set()
     stack = [self]
 
@@ -201,6 +231,7 @@ def tseytin_clauses(self,
         # if current node has no children, or one child has been visited: 
         # you are moving back up the tree
         if curr_node in visited:
+            hits += 1
             stack.pop()
 
         elif curr_node.is_leaf():
@@ -222,11 +253,17 @@ def tseytin_clauses(self,
         else:
             for child in reversed(curr_node.args):
                 stack.append(child)
+            if len(stack) > peak: peak = len(stack)
+
+    if record:
+        end_pass(record, len(visited), hits, peak, len(clauses))
     return list(clauses.keys())
 
 def satisfiable(self,
     solver_name: str = "cadical195", 
-    verbose: bool = False
+    verbose: bool = False,
+    portfolio: bool | Iterable[str | tuple[str, int]] | None = None,
+    time_limit: float | None = None
 ) -> dict[int,bool] | None:
     """Solve the SAT problem for a given BooleanFunction
 
@@ -244,6 +281,16 @@ def satisfiable(self,
     :type solver_name: str, optional
     :param verbose: if True, print statistics and timings for debugging, defaults to False
     :type verbose: bool, optional
+    :param portfolio: If `True`, race the configurations of `DEFAULT_PORTFOLIO` in worker
+        processes (one per CPU) and take the first answer, see `solve_portfolio`. A list
+        of solver names or (solver name, seed) pairs races those instead, and `False` always
+        uses a single solver. Defaults to None, which races `solver_name` and the default
+        portfolio when there is more than one CPU, the encoding has at least
+        `AUTO_PORTFOLIO_CLAUSES` clauses, and the workers can be forked (`fork_is_safe`).
+    :type portfolio: bool | Iterable[str | tuple[str, int]] | None, optional
+    :param time_limit: The most time to spend solving, in seconds, defaults to None (no limit)
+    :type time_limit: float | None, optional
+    :raises TimeoutError: If the time limit was reached before an answer.
 
     :return: if the function is unsatisfiable, return None. otherwise, returns a dictionary
         which maps variables to their boolean values in a satisfying assignment. Any variables 
@@ -260,15 +307,38 @@ def satisfiable(self,
         print(f'Number of variables: {num_variables}')
         print(f'Number of clauses: {num_clauses}')
 
-    cnf = CNF(from_clauses=clauses)
-    with Solver(name = solver_name, bootstrap_with=cnf, use_timer=True) as solver:
-        satisfiable = solver.solve()
-        assignments: Any = solver.get_model()
+    if portfolio == None:
+        # only when the workers can be forked, so a call which didn't ask for a
+        # portfolio never needs a __main__ guard
+        if (os.cpu_count() or 1) > 1 and num_clauses >= AUTO_PORTFOLIO_CLAUSES and fork_is_safe():
+            # an unknown solver_name raises here, as it does without the portfolio
+            Solver(name = solver_name).delete()
+            portfolio = [(solver_name, 0)] + [config for config in DEFAULT_PORTFOLIO if config != (solver_name, 0)]
+            portfolio = portfolio[:os.cpu_count()]
+        else:
+            portfolio = False
+
+    if portfolio or time_limit != None:
+        configurations = None if portfolio is True else list(portfolio) if portfolio else [solver_name]
+        start = perf_counter()
+        satisfiable, assignments, configuration = solve_portfolio(
+            clauses, configurations = configurations, time_limit = time_limit
+        )
+        if verbose:
+            print(configuration, perf_counter() - start)
+        if satisfiable == None:
+            raise TimeoutError(f"No answer within the time limit of {time_limit}s")
+    else:
+        cnf = CNF(from_clauses=clauses)
+        with Solver(name = solver_name, bootstrap_with=cnf, use_timer=True) as solver:
+            satisfiable = solver.solve()
+            assignments = solver.get_model()
 
-    if verbose:
-        print(solver.time())
+        if verbose:
+            print(solver.time())
 
     if satisfiable:
+        assert assignments != None
         return {k: (assignments[v-1]>0) for k,v in var_map.items()}
     else:
         return None
@@ -319,7 +389,10 @@ def enumerate_models(self,
             yield {k: (assignment[v-1]>0) for k,v in var_map.items()}
 
 def functionally_equivalent(self, 
-    other: BooleanFunction 
+    other: BooleanFunction,
+    portfolio: bool | Iterable[str | tuple[str, int]] | None = None,
+    time_limit: float | None = None,
+    fraig: bool = False
 ) -> bool:
     """Enumerate solutions to the SAT problem for a given BooleanFunction
 
@@ -341,17 +414,488 @@ def functionally_equivalent(self,
     :param verbose: if `True` print statistics and timings for debugging, defaults to False
     :type verbose: bool, optional
 
+    :param portfolio: If `True` (or a list of configurations), solve with a portfolio of
+        solvers in worker processes, as in `satisfiable`. Defaults to None, which uses a
+        portfolio for large instances on machines with more than one CPU, when the
+        workers can be forked.
+    :type portfolio: bool | Iterable[str | tuple[str, int]] | None, optional
+    :param time_limit: The most time to spend solving, in seconds, defaults to None (no limit)
+    :type time_limit: float | None, optional
+    :raises TimeoutError: If the time limit was reached before an answer.
+    :param fraig: If `True`, simulate the functions and sweep their internal equivalences
+        before the final miter (see `fraig_equivalent`), which is much faster for functions
+        with similar structure, and rejects most non-equivalent functions without a SAT
+        call. The portfolio and time limit don't apply to this check. Defaults to False
+    :type fraig: bool, optional
+
     :return: if the function is unsatisfiable, return None. otherwise, on each iteration,
         return a dictionary which maps variables to their boolean values in a satisfying 
         assignment. Any variables which don't appear in the dict are "don't care".
     :rtype: dict[int,bool] | None
     """
-    return ((satisfiable(XOR(self,other))) == None)
+    if fraig:
+        from PyPR.BooleanLogic.Fraig import fraig_equivalent
+        return fraig_equivalent(self, other)
+    return ((satisfiable(XOR(self,other), portfolio = portfolio, time_limit = time_limit)) == None)
+
+class SATSession:
+    """A persistent SAT solver over an incrementally built Tseytin encoding.
+
+    `sat`, `enum_models` and `functionally_equivalent` encode the function and start
+    a new solver on every call. A session instead keeps one solver and one label map
+    (the same node and variable labels as `tseytin`) for its whole life. Functions are
+    encoded once, when they are first used: nodes which are already encoded (e.g. shared
+    with an earlier query) only add their new gates. Queries are solve calls under
+    assumptions, so the solver keeps its learned clauses between them. For example:
+    ```python
+    with SATSession(fn) as session:
+        for bit in range(8):
+            model = session.sat(fn, assumptions = {bit: True})
+    ```
+    As in `tseytin`, solver variable 1 is the constant true.
+    """
+    solver_name: str
+    node_labels: dict[BooleanFunction, list[int]]
+    variable_labels: dict[int, int]
+    next_index: int
+    num_queries: int
+
+    def __init__(self,
+        *fns: BooleanFunction,
+        solver_name: str = "cadical195"
+    ):
+        """Start a solver, and encode any given functions.
+
+        :param fns: Functions to encode right away (without asserting anything about them).
+        :type fns: BooleanFunction
+        :param solver_name: A string giving the name of a sat solver provided by PySAT,
+            defaults to "cadical195"
+        :type solver_name: str, optional
+        """
+        self.solver_name = solver_name
+        self.solver = Solver(name = solver_name, bootstrap_with = [(1,)], use_timer = True)
+        self.node_labels = {}
+        self.variable_labels = {}
+        self.next_index = 2
+        self.num_queries = 0
+        for fn in fns:
+            self.encode(fn)
+
+    def __enter__(self) -> "SATSession":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Free the solver."""
+        self.solver.delete()
+
+    # Encoding
+    def encode(self, fn: BooleanFunction) -> int:
+        """Encode a function, if it isn't already, and return the literal of its output.
+
+        Only nodes which are not encoded yet are labeled and get clauses, so encoding
+        a function which shares most of its DAG with earlier functions is cheap.
+
+        :param fn: The function to encode.
+        :type fn: BooleanFunction
+        :return: The solver literal which is true exactly when the function is.
+        :rtype: int
+        """
+        if fn in self.node_labels:
+            return self.node_labels[fn][-1]
+
+        record = begin_pass('SATSession.encode')
+        num_prev_labels = len(self.node_labels)
+        fn.tseytin_labels(self.node_labels, self.variable_labels, self.next_index)
+
+        # new nodes are at the end of the (insertion ordered) label map
+        clauses: list[Any] = []
+        for node in islice(reversed(self.node_labels), len(self.node_labels) - num_prev_labels):
+            labels = self.node_labels[node]
+            self.next_index = max(self.next_index, max(labels) + 1)
+            if node.is_leaf():
+                clauses += node._tseytin_clauses(self.node_labels)
+            else:
+                arg_labels = [self.node_labels[arg][-1] for arg in node.args]
+                clauses += type(node).tseytin_unroll(labels, arg_labels)
+        self.solver.append_formula(clauses)
+
+        if record:
+            end_pass(record, len(self.node_labels) - num_prev_labels, allocations = len(clauses))
+        return self.node_labels[fn][-1]
+
+    def variable(self, index: int) -> int:
+        """Return the solver variable of an input variable, allocating one if needed.
+
+        :param index: The index of the input variable (as in `VAR(index)`).
+        :type index: int
+        :return: The solver variable.
+        :rtype: int
+        """
+        if index not in self.variable_labels:
+            self.variable_labels[index] = self.next_index
+            self.next_index += 1
+        return self.variable_labels[index]
+
+    def new_variable(self) -> int:
+        """Allocate a fresh solver variable (e.g. for a selector literal).
+
+        :return: The solver variable.
+        :rtype: int
+        """
+        self.next_index += 1
+        return self.next_index - 1
+
+    def literal(self, item: BooleanFunction | int, value: bool = True) -> int:
+        """The solver literal for an input variable index or a function having a value.
+
+        :param item: An input variable index, or a function (which is encoded if needed).
+        :type item: BooleanFunction | int
+        :param value: The value, defaults to True
+        :type value: bool, optional
+        :return: A literal which is true exactly when `item` has the given value.
+        :rtype: int
+        """
+        lit = self.encode(item) if isinstance(item, BooleanFunction) else self.variable(item)
+        return lit if value else -lit
+
+    def add_clause(self, clause: Iterable[int]) -> None:
+        """Permanently add a clause of solver literals.
+
+        :param clause: The literals of the clause.
+        :type clause: Iterable[int]
+        """
+        self.solver.add_clause(list(clause))
+
+    def add_constraint(self, fn: BooleanFunction, value: bool = True) -> None:
+        """Permanently assert that a function has a value, for every later query.
+
+        :param fn: The function.
+        :type fn: BooleanFunction
+        :param value: The value it must have, defaults to True
+        :type value: bool, optional
+        """
+        self.add_clause([self.literal(fn, value)])
+
+    # Queries
+    def _assumptions(self,
+        fn: BooleanFunction | None,
+        assumptions: dict[Any, bool] | None
+    ) -> list[int]:
+        lits = [] if fn == None else [self.encode(fn)]
+        if assumptions != None:
+            lits += [self.literal(item, value) for item, value in assumptions.items()]
+        return lits
+
+    def solve(self,
+        fn: BooleanFunction | None = None,
+        assumptions: dict[Any, bool] | None = None
+    ) -> bool:
+        """Check if a function can be true, under temporary assumptions.
+
+        :param fn: The function which must be true, defaults to None (only the assumptions
+            and constraints).
+        :type fn: BooleanFunction | None, optional
+        :param assumptions: A dict mapping input variable indices or functions to the
+            values they are assumed to have for this query only, defaults to None
+        :type assumptions: dict[int | BooleanFunction, bool] | None, optional
+        :return: `True` if it is satisfiable.
+        :rtype: bool
+        """
+        lits = self._assumptions(fn, assumptions)
+        self.num_queries += 1
+        return bool(self.solver.solve(assumptions = lits))
+
+    def model(self) -> dict[int, bool]:
+        """The values of the input variables in the model found by the last satisfiable query.
+
+        :return: A dict mapping each encoded input variable to its value.
+        :rtype: dict[int, bool]
+        """
+        assignment: Any = self.solver.get_model()
+        return {
+            k: (v <= len(assignment) and assignment[v-1] > 0)
+            for k, v in self.variable_labels.items()
+        }
+
+    def sat(self,
+        fn: BooleanFunction | None = None,
+        assumptions: dict[Any, bool] | None = None
+    ) -> dict[int, bool] | None:
+        """Like `BooleanFunction.sat`, but in this session and under assumptions.
+
+        :param fn: The function which must be true, defaults to None
+        :type fn: BooleanFunction | None, optional
+        :param assumptions: Temporary assumptions, as in `solve`, defaults to None
+        :type assumptions: dict[int | BooleanFunction, bool] | None, optional
+        :return: A satisfying assignment of the input variables (see `model`), or None
+            if there is none.
+        :rtype: dict[int, bool] | None
+        """
+        return self.model() if self.solve(fn, assumptions) else None
+
+    def enum_models(self,
+        fn: BooleanFunction | None = None,
+        assumptions: dict[Any, bool] | None = None,
+        variables: Iterable[int] | None = None
+    ) -> Iterator[dict[int, bool]]:
+        """Enumerate the assignments of input variables which satisfy a function.
+
+        Each model found is blocked with a clause guarded by a fresh selector literal,
+        which is only assumed during this enumeration and disabled afterwards, so the
+        blocking clauses don't affect later queries.
+
+        :param fn: The function which must be true, defaults to None
+        :type fn: BooleanFunction | None, optional
+        :param assumptions: Temporary assumptions, as in `solve`, defaults to None
+        :type assumptions: dict[int | BooleanFunction, bool] | None, optional
+        :param variables: The input variables to enumerate assignments of (models which
+            only differ elsewhere are only returned once). Defaults to every input
+            variable encoded when the enumeration starts.
+        :type variables: Iterable[int] | None, optional
+        :return: An iterator over satisfying assignments of `variables`.
+        :rtype: Iterator[dict[int, bool]]
+        """
+        lits = self._assumptions(fn, assumptions)
+        if variables == None:
+            variables = list(self.variable_labels)
+        labels = {index: self.variable(index) for index in variables}
+        selector = self.new_variable()
+        try:
+            while True:
+                self.num_queries += 1
+                if not self.solver.solve(assumptions = lits + [selector]):
+                    return
+                assignment = self.model()
+                model = {index: assignment[index] for index in labels}
+                yield model
+                self.add_clause([-selector] + [
+                    -label if model[index] else label for index, label in labels.items()
+                ])
+        finally:
+            self.add_clause([-selector])
+
+    def equivalent(self,
+        fn: BooleanFunction,
+        other: BooleanFunction,
+        assumptions: dict[Any, bool] | None = None
+    ) -> bool:
+        """Check if two functions are equal on every input (under the assumptions).
+
+        Both functions are encoded into the session, and checked with two solve calls
+        (one for each way the outputs can differ), so no miter clauses are added.
+
+        :param fn: The first function.
+        :type fn: BooleanFunction
+        :param other: The second function.
+        :type other: BooleanFunction
+        :param assumptions: Temporary assumptions, as in `solve`, defaults to None
+        :type assumptions: dict[int | BooleanFunction, bool] | None, optional
+        :return: `True` if the functions are equivalent.
+        :rtype: bool
+        """
+        a = self.encode(fn)
+        b = self.encode(other)
+        lits = self._assumptions(None, assumptions)
+        for differ in ([a, -b], [-a, b]):
+            self.num_queries += 1
+            if self.solver.solve(assumptions = lits + differ):
+                return False
+        return True
+
+def _projected_cubes(
+    fn: BooleanFunction,
+    variables: list[int] | None,
+    assumptions: dict[int, bool] | None,
+    minimize: bool,
+    solver_name: str
+) -> Iterator[tuple[list[int], int, int]]:
+    # yields (variables, care, values), with cubes as bitmasks over the variables
+    with SATSession(fn, solver_name = solver_name) as session:
+        out = session.encode(fn)
+        if variables == None:
+            variables = sorted(session.variable_labels)
+        labels = [session.variable(index) for index in variables]
+        bits = {label: 1 << k for k, label in enumerate(labels)}
+        lits = session._assumptions(None, assumptions)
+
+        # assumed projection variables have the same value in every cube
+        forced = 0
+        for lit in lits:
+            forced |= bits.get(abs(lit), 0)
+
+        cubes: list[tuple[int, int]] = []
+        while session.solver.solve(assumptions = lits + [out]):
+            session.num_queries += 1
+            model: Any = session.solver.get_model()
+            values = 0
+            for k, label in enumerate(labels):
+                if label <= len(model) and model[label-1] > 0:
+                    values |= 1 << k
+            care = (1 << len(labels)) - 1
+
+            if minimize:
+                # shrink the model to the projection literals in an unsat core of
+                # (model & ~fn): every assignment in the smaller cube satisfies fn
+                cube = [label if values >> k & 1 else -label for k, label in enumerate(labels)]
+                if not session.solver.solve(assumptions = lits + cube + [-out]):
+                    care = forced
+                    for lit in session.solver.get_core() or []:
+                        care |= bits.get(abs(lit), 0)
+
+                # keep the cubes disjoint (for counting): the model disagrees with
+                # every earlier cube somewhere, so keep one of those literals
+                for prev_care, prev_values in cubes:
+                    if care & prev_care & (values ^ prev_values) == 0:
+                        diff = prev_care & (values ^ prev_values)
+                        care |= diff & -diff
+                cubes.append((care, values & care))
+
+            yield variables, care, values & care
+            if care == 0:
+                return
+            session.add_clause([
+                -label if values >> k & 1 else label
+                for k, label in enumerate(labels) if care >> k & 1
+            ])
+
+def _pack(mask: int, length: int) -> np.ndarray:
+    return np.frombuffer(mask.to_bytes((length + 7) // 8, 'little'), dtype = np.uint8).copy()
+
+def enumerate_projected(self,
+    variables: list[int] | None = None,
+    assumptions: dict[int, bool] | None = None,
+    minimize: bool = True,
+    solver_name: str = "cadical195"
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Enumerate the satisfying assignments of a function, projected onto some input variables.
+
+    Unlike `enum_models`, models are only blocked on the projection variables, so each
+    assignment of them is found once. With `minimize`, each model is shrunk to a cube
+    (a partial assignment) using an unsat core of the model and the negated function,
+    so a single cube (and a single blocking clause) covers every assignment where the
+    other projection variables don't matter. The cubes are disjoint, so the number of
+    assignments is the sum of `2**(number of free variables)` over the cubes.
+
+    Cubes are returned as two packed bit arrays (as from `numpy.packbits` with
+    `bitorder = 'little'`): bit `k` of `care` is set if `variables[k]` is fixed in the
+    cube, and then bit `k` of `values` is its value. See `unpack_cube`.
+
+    :param variables: The projection variables, defaults to every input variable of
+        the function, in sorted order.
+    :type variables: list[int] | None, optional
+    :param assumptions: A dict mapping input variables to fixed values, defaults to None
+    :type assumptions: dict[int, bool] | None, optional
+    :param minimize: If `True`, shrink each model to a cube, defaults to True
+    :type minimize: bool, optional
+    :param solver_name: A string giving the name of a sat solver provided by PySAT,
+        defaults to "cadical195"
+    :type solver_name: str, optional
+    :return: An iterator over disjoint cubes `(care, values)` which cover the projected
+        satisfying assignments.
+    :rtype: Iterator[tuple[np.ndarray, np.ndarray]]
+    """
+    for variables, care, values in _projected_cubes(self, variables, assumptions, minimize, solver_name):
+        yield _pack(care, len(variables)), _pack(values, len(variables))
+
+def count_projected(self,
+    variables: list[int] | None = None,
+    assumptions: dict[int, bool] | None = None,
+    solver_name: str = "cadical195"
+) -> int:
+    """Count the satisfying assignments of a function, projected onto some input variables.
+
+    This sums the sizes of the cubes from `enumerate_projected`, so functions with
+    many satisfying assignments can be counted with far fewer solver calls than
+    there are assignments.
+
+    :param variables: The projection variables, defaults to every input variable of
+        the function.
+    :type variables: list[int] | None, optional
+    :param assumptions: A dict mapping input variables to fixed values, defaults to None
+    :type assumptions: dict[int, bool] | None, optional
+    :param solver_name: A string giving the name of a sat solver provided by PySAT,
+        defaults to "cadical195"
+    :type solver_name: str, optional
+    :return: The number of assignments of the projection variables which can be
+        extended to a satisfying assignment.
+    :rtype: int
+    """
+    count = 0
+    for variables, care, _ in _projected_cubes(self, variables, assumptions, True, solver_name):
+        count += 1 << (len(variables) - care.bit_count())
+    return count
+
+def enumerate_preimages(
+    fns: list[BooleanFunction],
+    values: Iterable[Any],
+    variables: list[int] | None = None,
+    minimize: bool = True,
+    solver_name: str = "cadical195"
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Enumerate the inputs which functions map to given output values.
+
+    For example, the preimages of a register state under its update function, or
+    the states which produce a short keystream. See `enumerate_projected` for the
+    format of the cubes.
+
+    :param fns: The functions (e.g. the bits of a feedback function).
+    :type fns: list[BooleanFunction]
+    :param values: The output value of each function.
+    :type values: Iterable[Any]
+    :param variables: The input variables to enumerate, defaults to every input
+        variable of the functions, in sorted order.
+    :type variables: list[int] | None, optional
+    :param minimize: If `True`, shrink each preimage to a cube, defaults to True
+    :type minimize: bool, optional
+    :param solver_name: A string giving the name of a sat solver provided by PySAT,
+        defaults to "cadical195"
+    :type solver_name: str, optional
+    :return: An iterator over disjoint cubes `(care, values)` which cover the preimages.
+    :rtype: Iterator[tuple[np.ndarray, np.ndarray]]
+    """
+    fn = AND(*(fn if value else NOT(fn) for fn, value in zip(fns, values)))
+    return enumerate_projected(fn, variables, None, minimize, solver_name)
+
+def unpack_cube(
+    cube: tuple[np.ndarray, np.ndarray],
+    variables: list[int]
+) -> dict[int, bool]:
+    """Convert a packed cube from `enumerate_projected` to a partial assignment.
+
+    :param cube: The cube, as `(care, values)`.
+    :type cube: tuple[np.ndarray, np.ndarray]
+    :param variables: The projection variables the cube was enumerated over.
+    :type variables: list[int]
+    :return: A dict mapping the fixed variables of the cube to their values (the
+        other variables can take any value).
+    :rtype: dict[int, bool]
+    """
+    care, values = (np.unpackbits(array, count = len(variables), bitorder = 'little') for array in cube)
+    return {var: bool(values[k]) for k, var in enumerate(variables) if care[k]}
+
+def sat_session(self,
+    solver_name: str = "cadical195"
+) -> SATSession:
+    """Start a `SATSession` with this function encoded.
+
+    :param solver_name: A string giving the name of a sat solver provided by PySAT,
+        defaults to "cadical195"
+    :type solver_name: str, optional
+    :return: The session.
+    :rtype: SATSession
+    """
+    return SATSession(self, solver_name = solver_name)
 
 # add functions to BooleanFunction class
+BooleanFunction.sat_session = sat_session
 BooleanFunction.tseytin = tseytin
 BooleanFunction.tseytin_labels = tseytin_labels
 BooleanFunction.tseytin_clauses = tseytin_clauses
 BooleanFunction.sat = satisfiable
 BooleanFunction.enum_models = enumerate_models
+BooleanFunction.enum_projected = enumerate_projected
+BooleanFunction.count_projected = count_projected
 BooleanFunction.functionally_equivalent = functionally_equivalent
\ No newline at end of file
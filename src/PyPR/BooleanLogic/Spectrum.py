@@ -0,0 +1,460 @@
+# TYPE ANNOTATIONS: TRUE
+# DOCSTRINGS: TRUE
+
+from typing import Any
+
+from PyPR.BooleanLogic.BooleanFunction import BooleanFunction
+from PyPR.BooleanLogic.Netlist import Netlist
+
+import numpy as np
+from numba import njit, prange
+
+# Truth tables are bit-packed into uint64 words: bit b of word w is the value
+# of the function on input k = 64*w + b, where variable `variables[i]` is set
+# to bit i of k. Inside a word, the first six variables follow fixed patterns,
+# and the other variables are constant across a word.
+_PATTERNS = np.array([
+    0xAAAAAAAAAAAAAAAA,
+    0xCCCCCCCCCCCCCCCC,
+    0xF0F0F0F0F0F0F0F0,
+    0xFF00FF00FF00FF00,
+    0xFFFF0000FFFF0000,
+    0xFFFFFFFF00000000,
+], dtype = np.uint64)
+
+MAX_VARS = 32
+
+
+@njit(inline='always')
+def _packed_gate(values, op, slot, arg_ptr, arg_idx, g, width, ones):
+    start = arg_ptr[g]
+    end = arg_ptr[g+1]
+
+    # NOT has exactly one argument
+    if op == 6:
+        for w in range(width):
+            values[slot, w] = values[arg_idx[start], w] ^ ones
+        return
+
+    # empty gates evaluate to the identity of the operation
+    base = op % 3
+    for w in range(width):
+        if end == start:
+            acc = ones if base == 1 else ones ^ ones
+        else:
+            acc = values[arg_idx[start], w]
+            for k in range(start+1, end):
+                if base == 0:
+                    acc = acc ^ values[arg_idx[k], w]
+                elif base == 1:
+                    acc = acc & values[arg_idx[k], w]
+                else:
+                    acc = acc | values[arg_idx[k], w]
+        if op >= 3:
+            acc = acc ^ ones
+        values[slot, w] = acc
+
+@njit(parallel=True)
+def _packed_tables(
+    num_slots, gate_offset, input_slots, num_words, chunk,
+    level_ptr, slice_ptr, slice_ops, arg_ptr, arg_idx, outputs
+):
+    # evaluate the netlist on `chunk` words of the truth table at a time,
+    # with each chunk in its own thread and its own value buffer
+    ones = ~np.uint64(0)
+    zero = np.uint64(0)
+    tables = np.zeros((len(outputs), num_words), dtype = np.uint64)
+    num_chunks = (num_words + chunk - 1) // chunk
+    for c in prange(num_chunks):
+        first = c * chunk
+        width = min(num_words, first + chunk) - first
+        values = np.zeros((num_slots, width), dtype = np.uint64)
+        for w in range(width):
+            values[gate_offset-1, w] = ones # the constant 1
+
+        for i in range(len(input_slots)):
+            for w in range(width):
+                if i < 6:
+                    values[input_slots[i], w] = _PATTERNS[i]
+                elif ((first + w) >> (i - 6)) & 1:
+                    values[input_slots[i], w] = ones
+                else:
+                    values[input_slots[i], w] = zero
+
+        for level in range(len(level_ptr)-1):
+            for s in range(level_ptr[level], level_ptr[level+1]):
+                op = slice_ops[s]
+                for g in range(slice_ptr[s], slice_ptr[s+1]):
+                    _packed_gate(values, op, gate_offset + g, arg_ptr, arg_idx, g, width, ones)
+
+        for o in range(len(outputs)):
+            for w in range(width):
+                tables[o, first + w] = values[outputs[o], w]
+    return tables
+
+@njit(parallel=True)
+def _unpack_signs(table, out):
+    # out[k] = (-1)**f(k)
+    n = len(out)
+    for w in prange(len(table)):
+        word = table[w]
+        for b in range(min(64, n - 64*w)):
+            out[64*w + b] = 1 - 2 * np.int64((word >> np.uint64(b)) & np.uint64(1))
+
+@njit(parallel=True)
+def _fwht(a, block_log):
+    # In place, unnormalized transform. The first stages only mix values inside
+    # blocks of 2**block_log, so each block is finished in one thread (in cache);
+    # the remaining stages are split over all of the butterflies.
+    n = len(a)
+    block = min(n, 1 << block_log)
+    for b in prange(n // block):
+        base = b * block
+        h = 1
+        while h < block:
+            for i in range(base, base + block, 2*h):
+                for j in range(i, i + h):
+                    x = a[j]
+                    y = a[j+h]
+                    a[j] = x + y
+                    a[j+h] = x - y
+            h *= 2
+
+    h = block
+    while h < n:
+        for i in range(0, n, 2*h):
+            for j in prange(i, i + h):
+                x = a[j]
+                y = a[j+h]
+                a[j] = x + y
+                a[j+h] = x - y
+        h *= 2
+
+@njit(inline='always')
+def _popcount(x):
+    # masks have at most 32 bits
+    x = x - ((x >> 1) & 0x55555555)
+    x = (x & 0x33333333) + ((x >> 2) & 0x33333333)
+    x = (x + (x >> 4)) & 0x0F0F0F0F
+    return ((x * 0x01010101) >> 24) & 0xFF
+
+@njit
+def _spectrum_stats(spectrum):
+    # one pass: the largest |W(a)|, how many masks reach it, and the
+    # smallest weight of a nonzero mask with W(a) != 0 (64 if there is none)
+    max_abs = 0
+    count = 0
+    min_weight = 64
+    for a in range(len(spectrum)):
+        value = abs(np.int64(spectrum[a]))
+        if value > max_abs:
+            max_abs = value
+            count = 1
+        elif value == max_abs:
+            count += 1
+        if a and value and min_weight > 1:
+            weight = _popcount(a)
+            if weight < min_weight:
+                min_weight = weight
+    return max_abs, count, min_weight
+
+@njit(parallel=True)
+def _square(spectrum, out):
+    for a in prange(len(spectrum)):
+        value = np.int64(spectrum[a])
+        out[a] = value * value # wraps for 32 variables, see autocorrelation
+
+
+def _table_variables(netlist: Netlist) -> list[int]:
+    # the variables read by a netlist
+    used = netlist.arg_idx[netlist.arg_idx < netlist.num_inputs]
+    outputs = netlist.outputs[netlist.outputs < netlist.num_inputs]
+    return sorted(set(used.tolist()) | set(outputs.tolist()))
+
+def truth_tables(
+    fns: list[BooleanFunction],
+    variables: list[int] | None = None
+) -> tuple[np.ndarray, list[int]]:
+    """Compute the bit-packed truth tables of functions over the same variables.
+
+    The functions are flattened into one `Netlist` (so shared nodes are only evaluated
+    once), which is evaluated 64 inputs at a time on uint64 words, in parallel over
+    blocks of the table. Bit `b` of word `w` of a table is the value of the function
+    when variable `variables[i]` is set to bit `i` of `64*w + b`.
+
+    :param fns: The functions to tabulate.
+    :type fns: list[BooleanFunction]
+    :param variables: The variables of the tables, which must include every variable
+        the functions use. Defaults to all of the variables used, in sorted order.
+    :type variables: list[int] | None, optional
+    :raises ValueError: If there are more than 32 variables, or a function uses a
+        variable which is not in `variables`.
+    :raises TypeError: If a node has no netlist opcode (see `Netlist`).
+    :return: An array with one row of `max(1, 2**(n-6))` words per function, and the
+        list of variables.
+    :rtype: tuple[np.ndarray, list[int]]
+    """
+    netlist = Netlist(fns)
+    used = _table_variables(netlist)
+    if variables == None:
+        variables = used
+    elif set(used) - set(variables):
+        raise ValueError(f"Variables {sorted(set(used) - set(variables))} are used but not in the table")
+    if len(variables) > MAX_VARS:
+        raise ValueError(f"Truth tables are limited to {MAX_VARS} variables, got {len(variables)}")
+
+    # variables outside of the netlist's inputs can't affect the outputs,
+    # so they share one extra scratch slot after the gates
+    num_vars = len(variables)
+    num_words = max(1, 2**num_vars // 64)
+    scratch = netlist.num_slots
+    input_slots = np.asarray(
+        [v if v < netlist.num_inputs else scratch for v in variables],
+        dtype = np.int64
+    )
+
+    # keep each thread's value buffer to about 8MB
+    chunk = max(1, min(num_words, 2**20 // (scratch + 1)))
+    tables = _packed_tables(
+        scratch + 1, netlist.gate_offset, input_slots, num_words, chunk,
+        netlist.level_ptr, netlist.slice_ptr, netlist.slice_ops,
+        netlist.arg_ptr, netlist.arg_idx, netlist.outputs
+    )
+    if num_vars < 6:
+        tables &= np.uint64(2**(2**num_vars) - 1)
+    return tables, list(variables)
+
+
+class WalshSpectrum:
+    """The Walsh-Hadamard spectrum of a Boolean function of up to 32 variables.
+
+    Entry `a` of the spectrum is `W(a) = sum_x (-1)**(f(x) ^ a.x)`, where bit `i`
+    of `a` (and of `x`) is variable `variables[i]`. `W(a) / 2**n` is the correlation
+    between `f` and the linear function `a.x`, so the spectrum gives the linearity,
+    nonlinearity, correlation immunity and best linear approximations of `f`
+    directly, and the autocorrelation with one more transform.
+
+    The spectrum is computed by an in-place, multithreaded fast Walsh-Hadamard
+    transform (the number of threads is set with `numba.set_num_threads`). The
+    derived metrics are computed together in a single pass over the spectrum,
+    on first use.
+    """
+    num_vars: int
+    variables: list[int]
+    spectrum: np.ndarray
+
+    def __init__(self,
+        table: np.ndarray,
+        variables: list[int] | int
+    ):
+        """Transform a bit-packed truth table, as returned by `truth_tables`.
+
+        :param table: The packed table, one row of `max(1, 2**(n-6))` uint64 words.
+        :type table: np.ndarray
+        :param variables: The variables of the table, or the number of variables
+            (for variables 0, ..., n - 1).
+        :type variables: list[int] | int
+        :raises ValueError: If there are more than 32 variables.
+        """
+        if isinstance(variables, int):
+            variables = list(range(variables))
+        if len(variables) > MAX_VARS:
+            raise ValueError(f"Spectra are limited to {MAX_VARS} variables, got {len(variables)}")
+        self.variables = list(variables)
+        self.num_vars = len(variables)
+
+        # |W(a)| <= 2**n, which only fits in an int32 up to 30 variables
+        dtype = np.int32 if self.num_vars <= 30 else np.int64
+        self.spectrum = np.empty(2**self.num_vars, dtype = dtype)
+        _unpack_signs(np.ascontiguousarray(table, dtype = np.uint64), self.spectrum)
+        _fwht(self.spectrum, 12)
+        self._stats: Any = None
+
+    @classmethod
+    def from_BooleanFunction(cls,
+        fn: BooleanFunction,
+        variables: list[int] | None = None
+    ) -> "WalshSpectrum":
+        """Compute the spectrum of a function.
+
+        :param fn: The function.
+        :type fn: BooleanFunction
+        :param variables: The variables of the spectrum, defaults to the variables
+            used by the function, in sorted order.
+        :type variables: list[int] | None, optional
+        :return: The spectrum of the function.
+        :rtype: WalshSpectrum
+        """
+        tables, variables = truth_tables([fn], variables)
+        return cls(tables[0], variables)
+
+    def _compute_stats(self) -> tuple[int, int, int]:
+        if self._stats == None:
+            self._stats = tuple(int(x) for x in _spectrum_stats(self.spectrum))
+        return self._stats
+
+    def __getitem__(self, mask: int) -> int:
+        return int(self.spectrum[mask])
+
+    @property
+    def linearity(self) -> int:
+        """The largest absolute value in the spectrum, `max_a |W(a)|`."""
+        return self._compute_stats()[0]
+
+    @property
+    def nonlinearity(self) -> int:
+        """The distance to the closest affine function, `2**(n-1) - linearity/2`."""
+        return 2**(self.num_vars - 1) - self.linearity // 2 if self.num_vars else 0
+
+    @property
+    def is_balanced(self) -> bool:
+        """`True` if the function has as many 0s as 1s (`W(0) = 0`)."""
+        return self.spectrum[0] == 0
+
+    @property
+    def weight(self) -> int:
+        """The number of inputs where the function is 1."""
+        return (2**self.num_vars - int(self.spectrum[0])) // 2
+
+    @property
+    def correlation_immunity(self) -> int:
+        """The correlation immunity order: the largest `m` with `W(a) = 0` for
+        every mask `a` of weight 1 to `m`. Constant functions have order `n`."""
+        min_weight = self._compute_stats()[2]
+        return min(min_weight, self.num_vars + 1) - 1
+
+    @property
+    def resiliency(self) -> int:
+        """The resiliency order: the correlation immunity order of a balanced
+        function, and -1 for an unbalanced function."""
+        return self.correlation_immunity if self.is_balanced else -1
+
+    def best_linear_approximations(self,
+        limit: int = 16
+    ) -> list[tuple[tuple[int, ...], float]]:
+        """The linear functions with the largest absolute correlation to the function.
+
+        :param limit: The number of approximations to return, defaults to 16
+        :type limit: int, optional
+        :return: A list of `(variables, correlation)` pairs, from the strongest
+            correlation, where `variables` are the variables XORed in the linear
+            function (`()` for the constant 0). A negative correlation means the
+            function is approximated by the negated linear function.
+        :rtype: list[tuple[tuple[int, ...], float]]
+        """
+        limit = min(limit, len(self.spectrum))
+        if limit <= 0:
+            return []
+        magnitudes = np.abs(self.spectrum.astype(np.int64))
+        best = np.argpartition(-magnitudes, limit - 1)[:limit]
+        best = best[np.argsort(-magnitudes[best], kind = 'stable')]
+        scale = 2.0**self.num_vars
+        return [
+            (
+                tuple(var for i, var in enumerate(self.variables) if (int(a) >> i) & 1),
+                int(self.spectrum[a]) / scale
+            )
+            for a in best
+        ]
+
+    def autocorrelation(self) -> np.ndarray:
+        """The autocorrelation spectrum, `r(d) = sum_x (-1)**(f(x) ^ f(x ^ d))`.
+
+        This is computed as the transform of the squared spectrum, divided by
+        `2**n`. The int64 arithmetic wraps for 32 variables, but the result is
+        exact modulo 2**64, so it is exact whenever it fits (every entry but
+        `r(0) = 2**n`, which is set directly).
+
+        :return: An int64 array with the autocorrelation of each offset `d`.
+        :rtype: np.ndarray
+        """
+        squared = np.empty(len(self.spectrum), dtype = np.int64)
+        _square(self.spectrum, squared)
+        _fwht(squared, 12)
+        squared >>= self.num_vars
+        squared[0] = 2**self.num_vars
+        return squared
+
+    def metrics(self,
+        autocorrelation: bool = False
+    ) -> dict[str, Any]:
+        """The derived metrics of the function, computed together.
+
+        :param autocorrelation: If `True`, also compute the absolute indicator
+            (`max_{d != 0} |r(d)|`) and sum-of-squares indicator (`sum_d r(d)**2`)
+            of the autocorrelation, which needs a second transform. Defaults to False
+        :type autocorrelation: bool, optional
+        :return: A dict with the keys `num_vars`, `weight`, `balanced`, `linearity`,
+            `nonlinearity`, `correlation_immunity`, `resiliency` and `best_linear`
+            (the strongest approximation), and optionally `absolute_indicator` and
+            `sum_of_squares_indicator`.
+        :rtype: dict[str, Any]
+        """
+        metrics = {
+            'num_vars': self.num_vars,
+            'weight': self.weight,
+            'balanced': bool(self.is_balanced),
+            'linearity': self.linearity,
+            'nonlinearity': self.nonlinearity,
+            'correlation_immunity': self.correlation_immunity,
+            'resiliency': self.resiliency,
+            'best_linear': self.best_linear_approximations(1)[0],
+        }
+        if autocorrelation:
+            r = self.autocorrelation()
+            metrics['absolute_indicator'] = int(np.abs(r[1:]).max(initial = 0))
+            # the sum is below 2**(3n), so it is exact in an int64 up to 20 variables
+            if self.num_vars <= 20:
+                metrics['sum_of_squares_indicator'] = int(np.dot(r, r))
+            else:
+                metrics['sum_of_squares_indicator'] = float(np.dot(r.astype(np.float64), r.astype(np.float64)))
+        return metrics
+
+
+def walsh_spectra(
+    fns: list[BooleanFunction],
+    variables: list[int] | None = None
+) -> list[WalshSpectrum]:
+    """Compute the spectra of many functions over the same variables.
+
+    The truth tables of all of the functions are computed in one evaluation (see
+    `truth_tables`), which is much faster than tabulating candidate functions one
+    at a time.
+
+    :param fns: The functions.
+    :type fns: list[BooleanFunction]
+    :param variables: The variables of the spectra, defaults to every variable used
+        by any of the functions, in sorted order.
+    :type variables: list[int] | None, optional
+    :return: The spectrum of each function, in the same order.
+    :rtype: list[WalshSpectrum]
+    """
+    if not fns:
+        return []
+    tables, variables = truth_tables(fns, variables)
+    return [WalshSpectrum(table, variables) for table in tables]
+
+def screen(
+    fns: list[BooleanFunction],
+    variables: list[int] | None = None,
+    autocorrelation: bool = False
+) -> list[dict[str, Any]]:
+    """Compute the metrics (see `WalshSpectrum.metrics`) of many candidate functions.
+
+    Only the metrics are kept, so the spectra of large batches don't have to fit
+    in memory together.
+
+    :param fns: The candidate functions (e.g. filter functions).
+    :type fns: list[BooleanFunction]
+    :param variables: The variables of the spectra, defaults to every variable used
+        by any of the functions, in sorted order.
+    :type variables: list[int] | None, optional
+    :param autocorrelation: If `True`, include the autocorrelation indicators, defaults to False
+    :type autocorrelation: bool, optional
+    :return: The metrics of each function, in the same order.
+    :rtype: list[dict[str, Any]]
+    """
+    if not fns:
+        return []
+    tables, variables = truth_tables(fns, variables)
+    return [WalshSpectrum(table, variables).metrics(autocorrelation) for table in tables]
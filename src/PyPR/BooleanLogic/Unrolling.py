@@ -0,0 +1,367 @@
+# TYPE ANNOTATIONS: TRUE
+# DOCSTRINGS: TRUE
+
+from typing import Any
+from collections.abc import Iterable
+
+from PyPR.BooleanLogic.BooleanFunction import BooleanFunction
+from PyPR.BooleanLogic.Gates import XOR, AND, OR, XNOR, NAND, NOR, NOT
+from PyPR.BooleanLogic.FunctionInputs import VAR, CONST
+
+# gates which are negations of an associative gate, and the gate they negate
+_NEGATED = {XNOR: XOR, NAND: AND, NOR: OR}
+
+
+class Unroller:
+    """Builds compositions of BooleanFunctions as a single shared DAG.
+
+    Every node is built through the unroller, which folds constants into the
+    gates (so known bits propagate through the DAG), cancels repeated XOR
+    arguments and removes repeated AND/OR arguments. With structural hashing,
+    gates with the same type and arguments are only ever built once, so equal
+    subfunctions which appear in different rounds or different bits are shared.
+
+    The built nodes are ordinary BooleanFunctions: XOR, AND and OR gates (with
+    negations as NOT nodes), VAR and CONST leaves, and copies of any other node
+    types which are used. They can be compiled, tseytin encoded, or translated
+    to ANF like any other function.
+    """
+    structural_hashing: bool
+
+    def __init__(self, structural_hashing: bool = True):
+        """Create an unroller with an empty node table.
+
+        :param structural_hashing: If `True`, reuse existing gates with the same
+            type and arguments instead of building duplicates, defaults to True
+        :type structural_hashing: bool, optional
+        """
+        self.structural_hashing = structural_hashing
+        self._consts: dict[Any, CONST] = {}
+        self._vars: dict[int, VAR] = {}
+        self._table: dict[tuple[Any, ...], BooleanFunction] = {}
+
+    def __len__(self) -> int:
+        """The number of gates in the structural hashing table."""
+        return len(self._table)
+
+    def const(self, value: Any) -> CONST:
+        """Return the shared constant node with the given value.
+
+        :param value: The value of the constant.
+        :type value: Any
+        :return: A `CONST` node, which is the same object for equal values.
+        :rtype: CONST
+        """
+        if value not in self._consts:
+            self._consts[value] = CONST(value)
+        return self._consts[value]
+
+    def var(self, index: int) -> VAR:
+        """Return the shared variable node with the given index.
+
+        :param index: The index of the variable.
+        :type index: int
+        :return: A `VAR` node, which is the same object for equal indices.
+        :rtype: VAR
+        """
+        if index not in self._vars:
+            self._vars[index] = VAR(index)
+        return self._vars[index]
+
+    def _const_value(self, node: BooleanFunction) -> Any:
+        # the value of a 0/1 constant, or None for anything else
+        if type(node) == CONST and node.value in (0, 1):
+            return int(node.value)
+        return None
+
+    def _lookup(self, cls: type, args: list[BooleanFunction]) -> BooleanFunction:
+        if not self.structural_hashing:
+            return cls(*args)
+        key = (cls,) + tuple(sorted(id(arg) for arg in args))
+        if key not in self._table:
+            # the table keeps the arguments alive, so their ids stay unique
+            self._table[key] = cls(*args)
+        return self._table[key]
+
+    def negate(self, node: BooleanFunction) -> BooleanFunction:
+        """Return the negation of a built node, folding constants and double negations.
+
+        :param node: A node built by this unroller.
+        :type node: BooleanFunction
+        :return: A node equivalent to `NOT(node)`.
+        :rtype: BooleanFunction
+        """
+        value = self._const_value(node)
+        if value != None:
+            return self.const(1 - value)
+        if type(node) == NOT:
+            return node.args[0]
+        return self._lookup(NOT, [node])
+
+    def xor(self, *args: BooleanFunction, parity: int = 0) -> BooleanFunction:
+        """Build the XOR of built nodes (inverted if `parity` is 1).
+
+        Constants are folded into the parity, negations are pulled out of the
+        arguments, and arguments which appear twice cancel.
+
+        :param args: Nodes built by this unroller.
+        :type args: BooleanFunction
+        :param parity: A constant to XOR with the result, defaults to 0
+        :type parity: int, optional
+        :return: A node equivalent to the XOR of the arguments.
+        :rtype: BooleanFunction
+        """
+        remaining: dict[int, BooleanFunction] = {}
+        for arg in args:
+            value = self._const_value(arg)
+            if value != None:
+                parity ^= value
+                continue
+            if type(arg) == NOT:
+                parity ^= 1
+                arg = arg.args[0]
+            if id(arg) in remaining:
+                del remaining[id(arg)]
+            else:
+                remaining[id(arg)] = arg
+
+        if not remaining:
+            return self.const(parity)
+        elif len(remaining) == 1:
+            node = next(iter(remaining.values()))
+        else:
+            node = self._lookup(XOR, list(remaining.values()))
+        return self.negate(node) if parity else node
+
+    def _and_or(self, cls: type, args: Iterable[BooleanFunction]) -> BooleanFunction:
+        # AND and OR are handled together: the absorbing constant is 0 for AND
+        # and 1 for OR, and the other constant is the identity.
+        absorbing = 0 if cls == AND else 1
+        remaining: dict[int, BooleanFunction] = {}
+        negated: set[int] = set()
+        for arg in args:
+            value = self._const_value(arg)
+            if value == absorbing:
+                return self.const(absorbing)
+            elif value != None:
+                continue
+
+            # x & ~x = 0, x | ~x = 1
+            if type(arg) == NOT:
+                if id(arg.args[0]) in remaining:
+                    return self.const(absorbing)
+                negated.add(id(arg.args[0]))
+            elif id(arg) in negated:
+                return self.const(absorbing)
+            remaining[id(arg)] = arg
+
+        if not remaining:
+            return self.const(1 - absorbing)
+        elif len(remaining) == 1:
+            return next(iter(remaining.values()))
+        return self._lookup(cls, list(remaining.values()))
+
+    def and_(self, *args: BooleanFunction) -> BooleanFunction:
+        """Build the AND of built nodes, folding constants and repeated arguments.
+
+        :param args: Nodes built by this unroller.
+        :type args: BooleanFunction
+        :return: A node equivalent to the AND of the arguments.
+        :rtype: BooleanFunction
+        """
+        return self._and_or(AND, args)
+
+    def or_(self, *args: BooleanFunction) -> BooleanFunction:
+        """Build the OR of built nodes, folding constants and repeated arguments.
+
+        :param args: Nodes built by this unroller.
+        :type args: BooleanFunction
+        :return: A node equivalent to the OR of the arguments.
+        :rtype: BooleanFunction
+        """
+        return self._and_or(OR, args)
+
+    def _build(self,
+        node: BooleanFunction,
+        new_nodes: dict[BooleanFunction, BooleanFunction]
+    ) -> BooleanFunction:
+        # build the image of a gate, given the images of its children
+        cls = type(node)
+        args = [new_nodes[arg] for arg in node.args]
+
+        if cls in _NEGATED:
+            negated = _NEGATED[cls]
+            if negated == XOR:
+                return self.xor(*args, parity = 1)
+            return self.negate(self._and_or(negated, args))
+        elif cls == XOR:
+            return self.xor(*args)
+        elif cls in (AND, OR):
+            return self._and_or(cls, args)
+        elif cls == NOT:
+            return self.negate(args[0])
+
+        # other node types are copied, and evaluated if all of their inputs are known
+        new_node = cls._copy(node, new_nodes)
+        if all(self._const_value(arg) != None for arg in args):
+            return self.const(int(new_node.eval([])))
+        if self.structural_hashing and set(new_node._fields()) == {'args', 'arg_limit'}:
+            key = (cls, new_node.arg_limit) + tuple(id(arg) for arg in args)
+            return self._table.setdefault(key, new_node)
+        return new_node
+
+    def compose(self,
+        fns: list[BooleanFunction],
+        input_map: Any
+    ) -> list[BooleanFunction]:
+        """Compose functions with the nodes in `input_map`, building the result in the shared DAG.
+
+        This works like `BooleanFunction.compose`, but all of the functions are
+        composed in one pass (so nodes they share are only built once), and every
+        node is built through the unroller. Variables which are not in `input_map`
+        are kept as (shared) variables.
+
+        :param fns: The functions to compose.
+        :type fns: list[BooleanFunction]
+        :param input_map: Any container which supports indexing via integers, mapping
+            variable indices to nodes built by this unroller (e.g. the previous state).
+        :type input_map: Any
+        :return: The composed functions, in the same order.
+        :rtype: list[BooleanFunction]
+        """
+        new_nodes: dict[BooleanFunction, BooleanFunction] = {}
+        stack: list[Any] = list(reversed(fns))
+        last = None
+
+        while stack:
+            curr_node = stack[-1]
+
+            # dont interact with sentinel values
+            if curr_node is False:
+                last = stack.pop()
+                continue
+
+            # hitting a visited node while travelling down:
+            elif curr_node in new_nodes:
+                last = stack.pop()
+                continue
+
+            # hitting a leaf:
+            elif curr_node.is_leaf():
+                if type(curr_node) == VAR:
+                    try:
+                        new_nodes[curr_node] = input_map[curr_node.index]
+                    except (IndexError, KeyError):
+                        new_nodes[curr_node] = self.var(curr_node.index)
+                elif type(curr_node) == CONST:
+                    new_nodes[curr_node] = self.const(curr_node.value)
+                else:
+                    new_nodes[curr_node] = curr_node
+                last = stack.pop()
+                continue
+
+            # moving up the tree after finishing children:
+            elif last is False:
+                new_nodes[curr_node] = self._build(curr_node, new_nodes)
+                last = stack.pop()
+                continue
+
+            # before moving down to children:
+            else:
+                stack.append(False) # sentinel value
+                for child in reversed(curr_node.args):
+                    stack.append(child)
+                continue
+
+        return [new_nodes[fn] for fn in fns]
+
+    def initial_state(self,
+        size: int,
+        known: dict[int, Any] | None = None
+    ) -> list[BooleanFunction]:
+        """The symbolic state before any rounds: `VAR(i)` for each bit, or a known value.
+
+        :param size: The number of bits in the state.
+        :type size: int
+        :param known: A dict mapping bit indices to 0/1 values (e.g. for IV bits or
+            fixed key bits), or to BooleanFunctions of other variables. Defaults to None.
+        :type known: dict[int, Any] | None, optional
+        :return: A list with one node for each bit.
+        :rtype: list[BooleanFunction]
+        """
+        known = {} if known == None else known
+        state: list[BooleanFunction] = []
+        for i in range(size):
+            value = known.get(i)
+            if value is None:
+                state.append(self.var(i))
+            elif isinstance(value, BooleanFunction):
+                state.append(self.compose([value], {})[0])
+            else:
+                state.append(self.const(int(value)))
+        return state
+
+
+def degree_bound(
+    fns: list[BooleanFunction],
+    max_degree: int | None = None
+) -> list[int]:
+    """Compute an upper bound on the algebraic degree of functions, without computing their ANF.
+
+    Bounds are propagated through the DAG: constants have degree 0, variables degree 1,
+    XOR and negation take the largest degree of their arguments, and every other gate
+    the sum. The bound is exact for many unrolled registers in their first rounds,
+    and is the usual way to find how many rounds an ANF computation is feasible for.
+
+    :param fns: The functions to bound.
+    :type fns: list[BooleanFunction]
+    :param max_degree: An optional cap on the bounds, for example the number of
+        variables, defaults to None
+    :type max_degree: int | None, optional
+    :return: A bound for each function, in the same order.
+    :rtype: list[int]
+    """
+    degrees: dict[BooleanFunction, int] = {}
+    stack: list[Any] = list(reversed(fns))
+    last = None
+
+    while stack:
+        curr_node = stack[-1]
+
+        # dont interact with sentinel values
+        if curr_node is False:
+            last = stack.pop()
+            continue
+
+        # hitting a visited node while travelling down:
+        elif curr_node in degrees:
+            last = stack.pop()
+            continue
+
+        # hitting a leaf:
+        elif curr_node.is_leaf():
+            degrees[curr_node] = 0 if type(curr_node) == CONST else 1
+            last = stack.pop()
+            continue
+
+        # moving up the tree after finishing children:
+        elif last is False:
+            arg_degrees = [degrees[arg] for arg in curr_node.args]
+            if type(curr_node) in (XOR, XNOR, NOT):
+                degree = max(arg_degrees, default = 0)
+            else:
+                degree = sum(arg_degrees)
+            if max_degree != None:
+                degree = min(degree, max_degree)
+            degrees[curr_node] = degree
+            last = stack.pop()
+            continue
+
+        # before moving down to children:
+        else:
+            stack.append(False) # sentinel value
+            for child in reversed(curr_node.args):
+                stack.append(child)
+            continue
+
+    return [degrees[fn] for fn in fns]
@@ -1,5 +1,37 @@
 from PyPR.BooleanLogic.BooleanFunction import BooleanFunction
+from PyPR.BooleanLogic.Instrumentation import Instrumentation, PassRecord
 from PyPR.BooleanLogic.BooleanANF import BooleanANF
 from PyPR.BooleanLogic.Gates import *
 from PyPR.BooleanLogic.FunctionInputs import *
-from PyPR.BooleanLogic.SAT import *
\ No newline at end of file
+from PyPR.BooleanLogic.BinaryFormat import generate_binary, parse_binary, BinaryFunctionFile
+from PyPR.BooleanLogic.Unrolling import Unroller, degree_bound
+from PyPR.BooleanLogic.BDD import BDDManager, BDD
+from PyPR.BooleanLogic.ParallelANF import translate_ANF_parallel, encode_ANF, decode_ANF
+from PyPR.BooleanLogic.ExternalANF import ExternalANF
+from PyPR.BooleanLogic.CNFWriter import ClauseSink, SolverSink, DIMACSWriter, read_cnf, read_variable_map
+from PyPR.BooleanLogic.CNFEncoding import CNFEncoding
+from PyPR.BooleanLogic.Portfolio import solve_portfolio, fork_is_safe, DEFAULT_PORTFOLIO, AUTO_PORTFOLIO_CLAUSES
+from PyPR.BooleanLogic.CubeAndConquer import cube_and_conquer, generate_cubes, solve_cubes
+
+# SAT (pysat), Netlist and Spectrum (numba) are imported on first use. The SAT methods
+# of BooleanFunction import SAT.py themselves when they are first called.
+from PyPR.LazyImports import lazy_exports
+lazy_exports(__name__, {
+    'tseytin': 'PyPR.BooleanLogic.SAT',
+    'tseytin_labels': 'PyPR.BooleanLogic.SAT',
+    'tseytin_clauses': 'PyPR.BooleanLogic.SAT',
+    'satisfiable': 'PyPR.BooleanLogic.SAT',
+    'enumerate_models': 'PyPR.BooleanLogic.SAT',
+    'functionally_equivalent': 'PyPR.BooleanLogic.SAT',
+    'SATSession': 'PyPR.BooleanLogic.SAT',
+    'enumerate_projected': 'PyPR.BooleanLogic.SAT',
+    'count_projected': 'PyPR.BooleanLogic.SAT',
+    'enumerate_preimages': 'PyPR.BooleanLogic.SAT',
+    'unpack_cube': 'PyPR.BooleanLogic.SAT',
+    'Netlist': 'PyPR.BooleanLogic.Netlist',
+    'Fraig': 'PyPR.BooleanLogic.Fraig',
+    'fraig_equivalent': 'PyPR.BooleanLogic.Fraig',
+    'WalshSpectrum': 'PyPR.BooleanLogic.Spectrum',
+    'walsh_spectra': 'PyPR.BooleanLogic.Spectrum',
+    'truth_tables': 'PyPR.BooleanLogic.Spectrum',
+})
@@ -0,0 +1,237 @@
+from PyPR import FeedbackRegister
+
+from PyPR.BooleanLogic import CNFEncoding, solve_portfolio
+
+from pysat.solvers import Solver
+
+from itertools import product
+from collections import Counter
+from math import log2
+import random
+import time
+
+# small helper function to help pretty-print:
+def indent(n):
+    return ("|   " * n)
+
+
+
+# Unroll the register and output function over the keystream as one shared DAG
+# (known bits, e.g. IVs, are propagated as constants), and encode every keystream
+# bit into a single CNF. This doesn't depend on the keystream, so it can be reused
+# for any number of online phases on the same register.
+def SAT_offline(
+    feedback_fn, output_fn, keystream_len,
+    init_rounds = 0, known = None, cut_size = 4,
+    verbose = False, print_depth = 0
+):
+    if verbose:
+        print(f"{indent(print_depth)}Starting offline phase (SAT Attack):")
+        print(f"{indent(print_depth+1)}Unrolling {init_rounds + keystream_len} rounds:")
+    start_time = time.time()
+
+    outputs = []
+    for t, out in enumerate(feedback_fn.unroll_iterator(
+        init_rounds + keystream_len - 1, outputs = output_fn, known = known
+    )):
+        if t >= init_rounds:
+            outputs.append(out)
+
+    if verbose:
+        print(f"{indent(print_depth+1)}Time: {time.time() - start_time} s")
+        print(f"{indent(print_depth+1)}\n{indent(print_depth+1)}Encoding to CNF:")
+        encode_time = time.time()
+
+    encoding = CNFEncoding(cut_size = cut_size)
+    output_literals = [encoding.encode(out) for out in outputs]
+
+    if verbose:
+        print(f"{indent(print_depth+1)}Variables: {encoding.num_vars}, Clauses: {len(encoding.clauses)}")
+        print(f"{indent(print_depth+1)}Time: {time.time() - encode_time} s")
+        print(f"Offline phase complete -- Total time: ", time.time() - start_time)
+
+    output = {}
+    output['clauses'] = encoding.clauses
+    output['output literals'] = output_literals
+    output['variable labels'] = encoding.variable_labels
+    output['known bits'] = dict(known) if known != None else {}
+    output['init rounds'] = init_rounds
+    output['keystream needed'] = keystream_len
+    output['num variables'] = encoding.num_vars
+    output['num clauses'] = len(encoding.clauses)
+
+    return output
+
+
+
+# Pick the unknown state bits which appear in the most clauses as guess bits,
+# since fixing them simplifies the most constraints.
+def choose_guess_bits(attack_data, num_guesses):
+    labels = attack_data['variable labels']
+    occurrences = Counter(abs(lit) for clause in attack_data['clauses'] for lit in clause)
+    ranked = sorted(labels, key = lambda bit: -occurrences[labels[bit]])
+    return ranked[:num_guesses]
+
+
+# Build a solver over the offline clauses, with the keystream bits fixed.
+def keystream_solver(attack_data, keystream, solver_name = "cadical195"):
+    solver = Solver(name = solver_name, bootstrap_with = attack_data['clauses'])
+    for lit, bit in zip(attack_data['output literals'], keystream):
+        solver.add_clause([lit if bit else -lit])
+    return solver
+
+
+def model_to_state(feedback_fn, attack_data, model):
+    state = [0] * feedback_fn.size
+    for bit, value in attack_data['known bits'].items():
+        state[bit] = int(value)
+    for bit, label in attack_data['variable labels'].items():
+        state[bit] = int(label <= len(model) and model[label-1] > 0)
+    return state
+
+
+# test a candidate initial state against the keystream, by simulation
+def check_state(feedback_fn, output_fn, state, keystream, init_rounds, test_length):
+    F = FeedbackRegister(list(state), feedback_fn)
+    for t, register in enumerate(F.run(init_rounds + test_length)):
+        if t >= init_rounds and output_fn.eval(register) != keystream[t - init_rounds]:
+            return False
+    return True
+
+
+
+# Guess and determine: for each assignment of the guess bits, solve (incrementally,
+# so clauses learned under one guess help with the next) with the guess as
+# assumptions. With no guess bits, this is a single solver call.
+# Models which don't match the keystream (the keystream was too short to determine
+# the state) are blocked, and solving continues.
+def SAT_online(
+    feedback_fn, output_fn, keystream, attack_data,
+    guess_bits = None, num_guesses = 0,
+    solver_name = "cadical195", time_limit = None,
+    test_length = 1000, verbose = False, print_depth = 0
+):
+    if verbose:
+        print(f"{indent(print_depth)}Starting online phase (SAT Attack):")
+    start_time = time.time()
+
+    keystream = [int(bit) for bit in keystream]
+    init_rounds = attack_data['init rounds']
+    test_length = min(test_length, len(keystream))
+    labels = attack_data['variable labels']
+    if guess_bits == None:
+        guess_bits = choose_guess_bits(attack_data, num_guesses)
+
+    if verbose:
+        print(f"{indent(print_depth+1)}Keystream bits fixed: {min(len(keystream), len(attack_data['output literals']))}")
+        print(f"{indent(print_depth+1)}Guess bits: {list(guess_bits)} (2^{len(guess_bits)} guesses)")
+
+    guess_count = 0
+    spurious = 0
+    with keystream_solver(attack_data, keystream, solver_name) as solver:
+        for guess in product((0,1), repeat = len(guess_bits)):
+            guess_count += 1
+            assumptions = [labels[b] if v else -labels[b] for b, v in zip(guess_bits, guess)]
+
+            if verbose:
+                print(f"\r{indent(print_depth+2)}Guess count: {guess_count} / {2**len(guess_bits)}", end='')
+
+            while solver.solve(assumptions = assumptions):
+                state = model_to_state(feedback_fn, attack_data, solver.get_model())
+                if check_state(feedback_fn, output_fn, state, keystream, init_rounds, test_length):
+                    if verbose:
+                        print(f"\n{indent(print_depth+1)}Solution Found! (spurious models blocked: {spurious})")
+                        print(f"{indent(print_depth)}Online phase complete -- Total time: ", time.time() - start_time)
+                    return state
+
+                spurious += 1
+                solver.add_clause([-label if state[bit] else label for bit, label in labels.items()])
+
+            # the time limit is checked between solver calls
+            if time_limit and (time.time() - start_time >= time_limit):
+                if verbose:
+                    print(f"\n{indent(print_depth)}Time limit reached!")
+                return None
+
+    # no state matches the keystream:
+    if verbose:
+        print(f"\n{indent(print_depth)}Online phase complete (no solution) -- Total time: ", time.time() - start_time)
+    return None
+
+
+
+# Estimate the guess-and-determine complexity for several numbers of guess bits:
+# time a few solver calls under random guesses, and scale by the number of guesses.
+# Most guesses are wrong, so the samples mostly measure the time to refute a guess,
+# which is what the full attack spends almost all of its time on.
+# Without a sample time limit, the samples share one incremental solver, like the
+# online phase. With a limit, each sample runs in a worker process which is stopped
+# at the limit (pysat can't interrupt every solver), and samples which hit the limit
+# are counted at the limit, so those estimates are lower bounds.
+def SAT_estimate(
+    feedback_fn, output_fn, keystream, attack_data,
+    guess_counts = None, samples = 8, sample_time_limit = None,
+    solver_name = "cadical195", verbose = False, print_depth = 0
+):
+    if verbose:
+        print(f"{indent(print_depth)}Estimating guess and determine complexity (SAT Attack):")
+    start_time = time.time()
+
+    labels = attack_data['variable labels']
+    if guess_counts == None:
+        guess_counts = list(range(0, len(labels) + 1, max(1, len(labels) // 8)))
+
+    output = {}
+    for num_guesses in guess_counts:
+        guess_bits = choose_guess_bits(attack_data, num_guesses)
+        times = []
+        timeouts = 0
+
+        guesses = [
+            [labels[b] if random.randrange(2) else -labels[b] for b in guess_bits]
+            for _ in range(samples if num_guesses else 1)
+        ]
+        if sample_time_limit == None:
+            # a fresh solver for each size, so learned clauses don't leak between sizes
+            with keystream_solver(attack_data, keystream, solver_name) as solver:
+                for assumptions in guesses:
+                    sample_start = time.time()
+                    solver.solve(assumptions = assumptions)
+                    times.append(time.time() - sample_start)
+        else:
+            clauses = attack_data['clauses'] + [
+                (lit if bit else -lit,) for lit, bit in zip(attack_data['output literals'], keystream)
+            ]
+            for assumptions in guesses:
+                sample_start = time.time()
+                result, _, _ = solve_portfolio(
+                    clauses, assumptions, [solver_name], time_limit = sample_time_limit
+                )
+                if result == None:
+                    timeouts += 1
+                times.append(min(time.time() - sample_start, sample_time_limit))
+
+        mean_time = sum(times) / len(times)
+        estimate = {}
+        estimate['guess bits'] = guess_bits
+        estimate['mean time'] = mean_time
+        estimate['timeouts'] = timeouts
+        estimate['estimated time'] = 2**num_guesses * mean_time
+        estimate['log2 estimated time'] = num_guesses + log2(mean_time) if mean_time > 0 else float('-inf')
+        output[num_guesses] = estimate
+
+        if verbose:
+            bound = " (lower bound)" if timeouts else ""
+            print(
+                f"{indent(print_depth+1)}Guess bits: {num_guesses:>3}  --  Mean solve: {mean_time:.4f} s" +
+                f"  --  Estimated time: 2^{estimate['log2 estimated time']:.1f} s{bound}"
+            )
+
+    best = min(output, key = lambda g: output[g]['estimated time'])
+    output['best'] = best
+
+    if verbose:
+        print(f"{indent(print_depth+1)}Best number of guess bits: {best}")
+        print(f"Estimation complete -- Total time: ", time.time() - start_time)
+
+    return output
@@ -1,5 +1,5 @@
 from typing import Any
-from PyPR.BooleanLogic import BooleanFunction, CONST
+from PyPR.BooleanLogic import BooleanFunction, CONST, ExternalANF
 
 import numpy as np
 
@@ -20,7 +20,7 @@ class EqStore:
 
 
     def insert_equation(self, 
-        equation: BooleanFunction | np.ndarray, 
+        equation: BooleanFunction | ExternalANF | np.ndarray, 
         extra_const: int = 0, 
         identifier: Any = None, 
         translate_ANF = True
@@ -53,6 +53,15 @@ class EqStore:
                 comb = tuple(sorted([var.index for var in term.args])) #type: ignore
                 coef_vector[self.comb_to_idx[comb]] = 1
 
+        # stream the monomials of an out-of-core ANF, without building it in memory
+        elif isinstance(equation, ExternalANF):
+            coef_vector = np.zeros([self.num_vars], dtype=np.uint8)
+            for comb in equation.monomials():
+                if comb == tuple() and tuple() not in self.comb_to_idx:
+                    const_val ^= 1
+                    continue
+                coef_vector[self.comb_to_idx[comb]] = 1
+
 
         # expand number of equations as necessary:
         if self.num_eqs == self.equations.shape[0]:
@@ -1,4 +1,4 @@
-from PyPR.BooleanLogic import BooleanFunction
+from PyPR.BooleanLogic import BooleanFunction, ExternalANF
 from PyPR.BooleanLogic import CONST
 
 import numpy as np
@@ -65,7 +65,7 @@ class LUEqStore:
 
     def insert_equation(
         self, 
-        equation: BooleanFunction | list[int] | NDArray, 
+        equation: BooleanFunction | ExternalANF | list[int] | NDArray, 
         extra_const: int = 0, 
         identifier: Any = None, 
         translate_ANF: bool = True
@@ -97,6 +97,15 @@ class LUEqStore:
                 comb = tuple(sorted([var.index for var in term.args])) #type: ignore
                 coef_vector[self.comb_to_idx[comb]] = 1
 
+        # stream the monomials of an out-of-core ANF, without building it in memory
+        elif isinstance(equation, ExternalANF):
+            coef_vector = np.zeros([self.num_vars], dtype=np.uint8)
+            for comb in equation.monomials():
+                if comb == tuple() and tuple() not in self.comb_to_idx:
+                    const_val ^= 1
+                    continue
+                coef_vector[self.comb_to_idx[comb]] = 1
+
         linearly_independent, insertion_idx =  LU_reduction(
             self.upper_matrix,self.lower_matrix,self.constants,self.solved_for, self.num_vars,
             coef_vector,const_val,
@@ -10,16 +10,15 @@ from PyPR.FeedbackFunctions import MPR
 from PyPR.Tools.RootCounting.MonomialProfile import TermSet,MonomialProfile
 from PyPR.Tools.RootCounting.JordanSet import JordanSet
 from PyPR.Tools.RootCounting.RootExpression import RootExpression
-import PyPR.Tools.RootCounting.MeshOptimization as mesh_optimization
 
 # Other analysis
-import PyPR.Tools.ResolventSolving as ResolventSolving
+# (the mesh optimization, resolvent solving, galois, and numba imports are in the
+# methods which use them, since loading them is slow and most uses don't need them)
 from PyPR.Tools.MersenneTools import expected_period, expected_period_ratio, max_period, cycle_lengths
 
 # Other libs
 import random
 import numpy as np
-import galois as gl
 import time
 
 from functools import cached_property
@@ -40,6 +39,10 @@ class CMPR(FeedbackFunction):
         self.num_components = len(components)
         self.divisions = [] 
 
+        # (primitive, update) polynomials of each component, in the same order as
+        # divisions, used by the word-level engine. None for non-MPR components.
+        self.component_polynomials = []
+
         shift_amount = 0
         self.fn_list = []
 
@@ -49,9 +52,18 @@ class CMPR(FeedbackFunction):
                 self.divisions += [d + shift_amount for d in component.divisions[:-1]]
                 self.num_components += component.num_components-1
                 self.fn_list += [f.shift_indices(shift_amount) for f in component.fn_list]
+                self.component_polynomials += getattr(
+                    component, 'component_polynomials', [None] * (len(component.divisions)-1)
+                )
             else: 
                 self.divisions.append(shift_amount)
                 self.fn_list += [XOR(f.shift_indices(shift_amount)) for f in component.fn_list]
+                if isinstance(component, MPR):
+                    self.component_polynomials.append(
+                        (list(component.primitive_polynomial), list(component.update_polynomial))
+                    )
+                else:
+                    self.component_polynomials.append(None)
 
             shift_amount += len(component.fn_list)
     
@@ -117,6 +129,8 @@ class CMPR(FeedbackFunction):
 
     @cached_property
     def resolvent_matrices(self):
+        import PyPR.Tools.ResolventSolving as ResolventSolving
+
         resolvent_matrices = []
         for update_matrix in self.update_matrices:
 
@@ -271,6 +285,7 @@ class CMPR(FeedbackFunction):
 
     def _mp_mesh_optimization(self, verbose = False):
         if verbose: print("Running monomial profile algorithm with the mesh optimization")
+        import PyPR.Tools.RootCounting.MeshOptimization as mesh_optimization
                 
         expr_table: list[Any] = [None for i in range(self.size)]
 
@@ -433,6 +448,7 @@ class CMPR(FeedbackFunction):
     
     def _re_mesh_optimization(self, locked_list = None, verbose = False):
         if verbose: print("Running root expression algorithm with the mesh optimization")
+        import PyPR.Tools.RootCounting.MeshOptimization as mesh_optimization
                 
         expr_table: list[Any] = [None for i in range(self.size)]
 
@@ -539,6 +555,7 @@ class CMPR(FeedbackFunction):
 
     @property
     def fixpoint(self):
+        import galois as gl
         fixed_state = [0] * self.size
         for block_idx in range(self.num_components):
             # compute the matrix (U-I)
@@ -563,6 +580,7 @@ class CMPR(FeedbackFunction):
 
 
     def reverse_clock(self, state):
+        import galois as gl
         prev_state = [0] * self.size
         for block_idx in range(self.num_components):
             update_matrix = gl.GF2(self.update_matrices[block_idx])
@@ -582,6 +600,213 @@ class CMPR(FeedbackFunction):
         return prev_state
 
 
+    # Word-level compilation:
+    def _word_blocks(self):
+        # Describe the linear part of each block for the word-level engine.
+        # Blocks whose component is exactly multiplication by the update polynomial
+        # are clocked with shifts and reductions (POLYNOMIAL), other linear blocks
+        # with their matrix columns (MATRIX), and anything else bit by bit (GENERIC).
+        from PyPR.FeedbackFunctions.WordEngine import GENERIC, POLYNOMIAL, MATRIX
+        polynomials = getattr(self, 'component_polynomials', [None] * (len(self.divisions)-1))
+
+        word_blocks = []
+        word_start = 0
+        for d in range(len(self.divisions)-1):
+            offset = self.divisions[d]
+            size = self.divisions[d+1] - offset
+            num_words = (size + 63) // 64
+
+            # columns of the linear update (as ints), if the component is linear in the block:
+            columns = [0] * size
+            for bit in range(offset, offset + size):
+                fn = self.fn_list[bit]
+                if type(fn) != XOR or not fn.args:
+                    columns = None
+                    break
+
+                for term in BooleanANF.from_BooleanFunction(fn.args[0]).terms:
+                    if len(term) != 1 or not (offset <= next(iter(term)) < offset + size):
+                        columns = None
+                        break
+                    columns[next(iter(term)) - offset] ^= 1 << (bit - offset)
+
+                if columns == None:
+                    break
+
+            mode = GENERIC if columns == None else MATRIX
+
+            # check the component against multiplication by the update polynomial:
+            update_powers = []
+            reduction = 0
+            if mode == MATRIX and polynomials[d] != None:
+                primitive_poly, update_poly = polynomials[d]
+                reduction = sum(1 << i for i, c in enumerate(primitive_poly[:size]) if c)
+                update_powers = [i for i, c in enumerate(update_poly) if c]
+
+                expected = []
+                for i in range(size):
+                    value = 0
+                    power = 1 << i
+                    for k in range(max(update_powers, default = 0) + 1):
+                        if k in update_powers:
+                            value ^= power
+                        power <<= 1
+                        if power >> size:
+                            power ^= (1 << size) ^ reduction
+                    expected.append(value)
+
+                if expected == columns:
+                    mode = POLYNOMIAL
+
+            word_blocks.append({
+                'offset': offset,
+                'size': size,
+                'word_start': word_start,
+                'num_words': num_words,
+                'mode': mode,
+                'columns': columns,
+                'reduction': reduction,
+                'update_powers': update_powers
+            })
+            word_start += num_words
+
+        return word_blocks, word_start
+
+    def compile_words(self):
+        # Clock the register with each block packed into uint64 words. The linear
+        # part of each block is a GF(2^n) multiplication (or matrix product) on
+        # the words, and the chaining logic is computed from bits read out of
+        # the words and XORed back in.
+        from numba import njit
+        from PyPR.FeedbackFunctions.WordEngine import linear_step, GENERIC, POLYNOMIAL, MATRIX
+
+        word_blocks, num_words = self._word_blocks()
+        num_blocks = len(word_blocks)
+        max_words = max((b['num_words'] for b in word_blocks), default = 1)
+
+        word_of = [0] * self.size
+        shift_of = [0] * self.size
+        for block in word_blocks:
+            for i in range(block['size']):
+                word_of[block['offset'] + i] = block['word_start'] + i // 64
+                shift_of[block['offset'] + i] = i % 64
+
+        def to_words(value, n):
+            return [(value >> (64*w)) & (2**64 - 1) for w in range(n)]
+
+        # flatten the block descriptions for the kernel:
+        block_start = np.zeros(num_blocks, dtype = np.int64)
+        block_num_words = np.zeros(num_blocks, dtype = np.int64)
+        block_size = np.zeros(num_blocks, dtype = np.int64)
+        block_mode = np.zeros(num_blocks, dtype = np.int64)
+        reduction_words = np.zeros(num_blocks * max_words, dtype = np.uint64)
+        power_ptr = [0]
+        powers = []
+        column_ptr = [0]
+        column_words = []
+        for b, block in enumerate(word_blocks):
+            block_start[b] = block['word_start']
+            block_num_words[b] = block['num_words']
+            block_size[b] = block['size']
+            block_mode[b] = block['mode']
+            reduction_words[b*max_words:b*max_words + block['num_words']] = to_words(block['reduction'], block['num_words'])
+
+            powers += block['update_powers'] if block['mode'] == POLYNOMIAL else []
+            power_ptr.append(len(powers))
+            if block['mode'] == MATRIX:
+                for column in block['columns']:
+                    column_words += to_words(column, block['num_words'])
+            column_ptr.append(len(column_words))
+
+        layout = (
+            block_start, block_num_words, block_size, block_mode, reduction_words,
+            np.asarray(power_ptr, dtype = np.int64), np.asarray(powers, dtype = np.int64),
+            np.asarray(column_ptr, dtype = np.int64), np.asarray(column_words, dtype = np.uint64)
+        )
+
+        # the logic not covered by the word-level update of each bit:
+        residuals = {}
+        for block in word_blocks:
+            for bit in range(block['offset'], block['offset'] + block['size']):
+                fn = self.fn_list[bit]
+                if block['mode'] == GENERIC:
+                    residuals[bit] = fn
+                elif len(fn.args) > 1:
+                    residuals[bit] = XOR(*fn.args[1:])
+
+        overrides = {}
+        residual_lines = []
+        for bit in sorted(residuals, reverse = True):
+            residual_lines += residuals[bit].generate_python(
+                output_name = f"residual[{bit}]",
+                array_name = "curr_state",
+                subfunction_prefix = f"fn_{bit}",
+                overrides = overrides
+            )
+            for j, node in enumerate(residuals[bit].subfunctions()):
+                if node not in overrides:
+                    overrides[node] = f'fn_{bit}_{j+1}'
+
+        read_bits = sorted(set().union(*(fn.idxs_used() for fn in residuals.values())))
+        write_bits = sorted(residuals)
+
+        read_lines = [
+            f"curr_state[{i}] = (words[{word_of[i]}] >> np.uint64({shift_of[i]})) & np.uint64(1)"
+            for i in read_bits
+        ]
+        write_lines = [
+            f"next_words[{word_of[i]}] ^= np.uint64(residual[{i}]) << np.uint64({shift_of[i]})"
+            for i in write_bits
+        ]
+
+        exec_str = f"""
+@njit
+def _compiled_words(words, num_clocks, output_word, output_shift, output, layout):
+    curr_state = np.zeros({self.size}, dtype=np.uint8)
+    residual = np.zeros({self.size}, dtype=np.uint8)
+    next_words = np.zeros_like(words)
+    scratch = np.zeros({max_words}, dtype=np.uint64)
+    for clock in range(num_clocks):
+        if output_word >= 0:
+            output[clock] = (words[output_word] >> np.uint64(output_shift)) & np.uint64(1)
+
+        {(chr(10) + "        ").join(read_lines)}
+        {(chr(10) + "        ").join(residual_lines)}
+
+        linear_step(words, next_words, scratch, {max_words}, *layout)
+        {(chr(10) + "        ").join(write_lines)}
+        words, next_words = next_words, words
+    return words
+
+self._compiled_words = _compiled_words"""
+        # the kernel calls linear_step, so it has to be visible as a global
+        exec(exec_str, globals() | {'njit': njit, 'linear_step': linear_step, 'self': self})
+
+        self._compiled_words_layout = {
+            'arrays': layout,
+            'word_of': word_of,
+            'shift_of': shift_of,
+            'num_words': num_words
+        }
+        return self._compiled_words
+
+    def _pack_words(self, state):
+        layout = self._compiled_words_layout
+        words = np.zeros(layout['num_words'], dtype = np.uint64)
+        for i in range(self.size):
+            if state[i]:
+                words[layout['word_of'][i]] |= np.uint64(1) << np.uint64(layout['shift_of'][i])
+        return words
+
+    def _unpack_words(self, words, out = None):
+        layout = self._compiled_words_layout
+        if out is None:
+            out = np.zeros(self.size, dtype = 'uint8')
+        for i in range(self.size):
+            out[i] = (int(words[layout['word_of'][i]]) >> layout['shift_of'][i]) & 1
+        return out
+
+
     # writes a VHDL file (special formatting for CMPRs)
     # Credit: Anna Hemingway
     def write_VHDL(self, filename, include_mpr = True):
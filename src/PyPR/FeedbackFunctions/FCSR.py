@@ -2,7 +2,8 @@ from PyPR.BooleanLogic import BooleanFunction, XOR, AND, VAR, CONST
 from PyPR.FeedbackFunctions import FeedbackFunction
 from PyPR.Tools.RegisterSynthesis.fcsrSynthesis import BM_FCSR
 
-from math import ceil, floor, log2
+from math import ceil, floor, log2, gcd
+import numpy as np
 
 # Chosen layout:
 # carry feeding into the adder ([2*i]) = [2*i + 1]
@@ -41,6 +42,101 @@ class FCSR(FeedbackFunction):
 
         #self.fn_list[-1] = VAR(0)
 
+    # 2-adic integer arithmetic:
+    # With value bits a_i (at 2*i) and carry bits c_i (at 2*i+1), each clock is the
+    # digitwise sum a_i' + 2*c_i' = a_(i+1) + c_i + d_i*a_0, where d = (q+1)/2 are
+    # the taps. As integers A' + 2C' = (A >> 1) + C + a_0*d, so alpha = A + 2C
+    # becomes (alpha + a_0*q)/2, and bit 0 outputs the 2-adic expansion of -alpha/q.
+    @property
+    def diadic_complexity(self):
+        return self.size // 2 + 1
+
+    def _value_bits(self):
+        # Without a tap, the top value bit only feeds itself (adding 2^(k-2) each
+        # clock when set), which makes it act as a sign bit: alpha = A + 2C - 2^k.
+        if ((self.connection_int + 1) // 2).bit_length() == self.diadic_complexity:
+            return self.diadic_complexity
+        return self.diadic_complexity - 1
+
+    def state_integers(self, state):
+        values = sum(int(state[2*i]) << i for i in range(self.diadic_complexity))
+        carries = sum(int(state[2*i+1]) << i for i in range(self.diadic_complexity - 1))
+        return values, carries
+
+    def state_from_integers(self, values, carries):
+        state = np.zeros(self.size, dtype='uint8')
+        for i in range(self.diadic_complexity):
+            state[2*i] = (values >> i) & 1
+        for i in range(self.diadic_complexity - 1):
+            state[2*i+1] = (carries >> i) & 1
+        return state
+
+    def clock_integers(self, values, carries, num_clocks = 1):
+        # exact simulation of the register, using bitwise operations on whole words
+        taps = (self.connection_int + 1) // 2
+        top_loop = (values >> (self.diadic_complexity - 1)) << (self.diadic_complexity - 1)
+        if self._value_bits() == self.diadic_complexity:
+            top_loop = 0
+
+        for _ in range(num_clocks):
+            shifted = values >> 1
+            feed = taps if values & 1 else 0
+            values = (shifted ^ carries ^ feed) | top_loop
+            carries = (shifted & carries) | (shifted & feed) | (carries & feed)
+        return values, carries
+
+    def fraction(self, state):
+        # bit 0 of the register outputs the 2-adic expansion of p/q
+        values, carries = self.state_integers(state)
+        alpha = values + 2*carries
+        if self._value_bits() < self.diadic_complexity and state[self.size-1]:
+            alpha -= 1 << self.diadic_complexity
+        return -alpha, self.connection_int
+
+    def output_block(self, state, num_bits):
+        # the next num_bits outputs of bit 0 are the bits of (p * q^-1) mod 2^num_bits
+        p, q = self.fraction(state)
+        block = (p * pow(q, -1, 1 << num_bits)) % (1 << num_bits)
+        bits = np.frombuffer(block.to_bytes((num_bits + 7) // 8, 'little'), dtype = np.uint8)
+        return np.unpackbits(bits, bitorder = 'little')[:num_bits]
+
+    def jump(self, state, t):
+        # a state whose outputs are the outputs of `state`, starting t clocks later.
+        # The carries are not unique for a given output, so this is not always the
+        # state the register would actually reach, but it generates the same sequence.
+        p, q = self.fraction(state)
+
+        # leave the transient part (p/q is periodic when -q <= p <= 0):
+        while t > 0 and not (-q <= p <= 0):
+            p = (p - q*(p & 1)) // 2
+            t -= 1
+
+        if t > 0:
+            # 2^-t * p, taken as the representative in [-q, 0]
+            p = (p * pow(2, -t, q)) % q - q if p % q else (0 if p == 0 else -q)
+
+        alpha = -p
+        carries = max(0, (alpha - (1 << self._value_bits()) + 2) // 2)
+        values = alpha - 2*carries
+        if carries >> (self.diadic_complexity - 1):
+            raise ValueError("The jumped state can not be represented in this register")
+        return self.state_from_integers(values, carries)
+
+    def sequence_period(self, state):
+        # period of the (eventually periodic) output of bit 0: the order of 2 mod q/gcd(p,q)
+        p, q = self.fraction(state)
+        modulus = q // gcd(p, q)
+        if modulus == 1:
+            return 1
+
+        import galois as gl
+        order = int(gl.euler_phi(modulus))
+        primes, _ = gl.factors(order)
+        for prime in primes:
+            while order % prime == 0 and pow(2, order // prime, modulus) == 1:
+                order //= prime
+        return order
+
     @property
     def carries(self):
         return [self.fn_list[2*i + 1] for i in range(self.size//2)]
@@ -1,7 +1,11 @@
 from typing import Any
 
-from PyPR.BooleanLogic import BooleanFunction, VAR
+from PyPR.BooleanLogic import BooleanFunction, VAR, CONST, XOR, XNOR, AND, OR
 from PyPR.BooleanLogic.BooleanANF import BooleanANF
+from PyPR.BooleanLogic.BinaryFormat import generate_binary, BinaryFunctionFile, LazyFunctionList
+from PyPR.BooleanLogic.Unrolling import Unroller
+from PyPR.BooleanLogic.ParallelANF import translate_ANF_parallel
+from PyPR.BooleanLogic.Instrumentation import Instrumentation
 
 # for compiling to c to iterate faster
 import tempfile
@@ -11,10 +15,22 @@ import contextlib
 
 # for compiling to python
 import numpy as np
-from numba import njit
 
 # For Storing and loading as JSON files.
 import json
+import re
+
+# For reusing compiled kernels
+from collections import OrderedDict
+import hashlib
+
+# compiled kernels, by a hash of the functions they were compiled from (so
+# editing fn_list always gives a new key). Only the most recently used are kept.
+_kernel_cache = OrderedDict()
+_KERNEL_CACHE_SIZE = 32
+
+def _kernel_key(fn_list):
+    return hashlib.sha256(generate_binary(*fn_list)).hexdigest()
 
 class FeedbackFunction:
     def __init__(self, fn_list):
@@ -23,8 +39,9 @@ class FeedbackFunction:
         self.size = len(fn_list)
     
     def __copy__(self):
+        # (the copy gets its own pass counters)
         new_obj = object.__new__(type(self))
-        new_obj.__dict__ = self.__dict__
+        new_obj.__dict__ = {k: v for k, v in self.__dict__.items() if k != '_instrumentation'}
         new_obj.fn_list = [f.__copy__() for f in self.fn_list]
         return new_obj
 
@@ -71,11 +88,19 @@ class FeedbackFunction:
 
 
     # Storage:
+    def _stored_fields(self):
+        # the attributes which are saved, without the compiled versions and
+        # pass counters (not serializable)
+        return {
+            k: v for k, v in self.__dict__.items()
+            if not k.startswith('_compiled') and k != '_instrumentation'
+        }
+
     def to_JSON(self):
         # copy class name and non-nested data
         JSON_object = {
             'class': type(self).__name__,
-            'data': self.__dict__.copy()
+            'data': self._stored_fields()
         }
 
         # convert fn_list/nested data:
@@ -83,10 +108,6 @@ class FeedbackFunction:
             # JSON_object['data']['fn_list'] = [f.to_JSON() for f in self.fn_list]
             JSON_object['data']['fn_list'] = BooleanFunction.generate_JSON(*self.fn_list)
 
-        # ignore the compiled version (not serializable)
-        if '_compiled' in JSON_object['data']:
-            del JSON_object['data']['_compiled']
-
         return JSON_object
     
     @classmethod
@@ -94,7 +115,7 @@ class FeedbackFunction:
         # parse object class and data
         object_data = JSON_object['data']
         object_class = None
-        for subcls in cls.__subclasses__():
+        for subcls in [FeedbackFunction] + FeedbackFunction.__subclasses__():
             if subcls.__name__ == JSON_object['class']:
                 object_class = subcls
 
@@ -124,6 +145,33 @@ class FeedbackFunction:
         with open(filename, 'r') as f:
             return FeedbackFunction.from_JSON(json.loads(f.read()))
 
+    def to_binary(self, filename = None):
+        # compact binary format, with the other attributes stored as JSON metadata
+        metadata = {
+            'class': type(self).__name__,
+            'data': {k: v for k, v in self._stored_fields().items() if k != 'fn_list'}
+        }
+        data = generate_binary(*self.fn_list, metadata = metadata, cache_key = True)
+
+        if filename == None:
+            return data
+        with open(filename, 'wb') as f:
+            f.write(data)
+
+    @classmethod
+    def from_binary(cls, source, lazy = False):
+        # with lazy = True, the file stays memory mapped, and bits are decoded on first use
+        reader = BinaryFunctionFile(source)
+        JSON_object = reader.metadata
+        output = FeedbackFunction.from_JSON(JSON_object)
+
+        if lazy:
+            output.fn_list = LazyFunctionList(reader)
+        else:
+            output.fn_list = list(reader)
+            reader.close()
+        return output
+
 
     # text generation
     # TODO: rename to match BF naming
@@ -244,6 +292,16 @@ int main(int argc, char *argv[]) {{
         del self._data_store
 
     def compile(self):
+        # numba (and the other kernels) are imported on first use, to keep imports fast
+        from numba import njit
+
+        # reuse kernels compiled for the same functions
+        cache_key = _kernel_key(self.fn_list)
+        if cache_key in _kernel_cache:
+            _kernel_cache.move_to_end(cache_key)
+            self._compiled, self._compiled_inplace = _kernel_cache[cache_key]
+            return self._compiled
+
         self._compiled = None
         self._compiled_inplace = None
 
@@ -256,6 +314,11 @@ def _compiled(curr_state):
 """
         exec_str += "\n    "
         for i in range(self.size - 1, -1 , -1):
+            # output already computed as part of another bit:
+            if self.fn_list[i] in overrides:
+                exec_str += f"next_state[{i}] = {overrides[self.fn_list[i]]}\n    "
+                continue
+
             exec_str += ("\n    ".join(self.fn_list[i].generate_python(
                 output_name = f"next_state[{i}]",
                 array_name = "curr_state",
@@ -279,6 +342,11 @@ def _compiled_inplace(curr_state,output_buffer):
 """
         exec_str += ("    ")
         for i in range(self.size - 1, -1 , -1):
+            # output already computed as part of another bit:
+            if self.fn_list[i] in overrides:
+                exec_str += f"output_buffer[{i}] = {overrides[self.fn_list[i]]}\n    "
+                continue
+
             exec_str += ("\n    ".join(self.fn_list[i].generate_python(
                 output_name = f"output_buffer[{i}]",
                 array_name = "curr_state",
@@ -293,8 +361,425 @@ def _compiled_inplace(curr_state,output_buffer):
         exec_str += "self._compiled_inplace = _compiled_inplace"
         exec(exec_str)
 
+        _kernel_cache[cache_key] = (self._compiled, self._compiled_inplace)
+        if len(_kernel_cache) > _KERNEL_CACHE_SIZE:
+            _kernel_cache.popitem(last = False)
+        return self._compiled
+
+    # Level-scheduled compilation (for very large registers):
+    def compile_levels(self, parallel_threshold = 4096):
+        # instead of straight-line code, flatten all update functions into one
+        # netlist, where each dependency level is evaluated with parallel loops.
+        # the compiled functions have the same interface as compile(), so the
+        # usual compiled methods of FeedbackRegister use this path transparently
+        from PyPR.BooleanLogic.Netlist import Netlist
+        netlist = Netlist(self.fn_list, num_inputs = self.size)
+
+        def _compiled(curr_state):
+            return netlist.evaluate(curr_state, parallel_threshold = parallel_threshold)
+
+        def _compiled_inplace(curr_state, output_buffer):
+            netlist.evaluate(curr_state, out = output_buffer, parallel_threshold = parallel_threshold)
+
+        self._compiled_netlist = netlist
+        self._compiled = _compiled
+        self._compiled_inplace = _compiled_inplace
         return self._compiled
 
+    # Shift-aware compilation:
+    @classmethod
+    def _shift_source(cls, fn):
+        # unwrap single argument gates (from_ANF produces XOR(AND(VAR(i))))
+        while type(fn) in (XOR, AND, OR) and len(fn.args) == 1:
+            fn = fn.args[0]
+
+        if type(fn) == VAR:
+            return fn.index
+        return None
+
+    def shift_chains(self):
+        # split the register into segments [start, end], where every bit
+        # in [start, end) is a pure shift of the bit above it (VAR(i+1))
+        # and only the head (end) needs to be computed each clock.
+        chains = []
+        start = 0
+        while start < self.size:
+            end = start
+            while end < self.size - 1 and self._shift_source(self.fn_list[end]) == end + 1:
+                end += 1
+            chains.append((start, end))
+            start = end + 1
+        return chains
+
+    def compile_rotating(self, min_length = 8, slack = 4):
+        # Each shift chain of at least `min_length` bits is kept in its own
+        # region of a flat buffer, read through a sliding offset, so a clock
+        # only writes the head bit of the chain. A region has `slack` times
+        # the chain's length of room to slide into, and is compacted back to
+        # its start when that runs out. Shorter chains are stored (and fully
+        # updated) in a plain array at the start of the buffer, so registers
+        # made of many short chains don't need a region each. Registers with
+        # no long chains are just compiled with compile().
+        from numba import njit
+
+        chains = self.shift_chains()
+        if all(end - start + 1 < min_length for start, end in chains):
+            self._compiled_rotating = None
+            self._compiled_rotating_layout = None
+            return self.compile()
+
+        # the plain array, then one region per rotating chain:
+        locations = [0] * self.size
+        rotating = [-1] * self.size
+        fixed = []
+        regions = []
+        region_start = 0
+        for start, end in chains:
+            if end - start + 1 < min_length:
+                for bit in range(start, end + 1):
+                    locations[bit] = region_start
+                    fixed.append(bit)
+                    region_start += 1
+
+        for start, end in chains:
+            length = end - start + 1
+            if length >= min_length:
+                for bit in range(start, end + 1):
+                    locations[bit] = region_start + (bit - start)
+                    rotating[bit] = len(regions)
+                regions.append((start, length, region_start, slack * length))
+                region_start += length + slack * length
+        buffer_size = region_start
+
+        # generate the updates (the heads of the rotating chains, and every
+        # bit of the plain array), reading the state through the offsets:
+        targets = [(start + length - 1, f"buffer[offsets[{c}] + {region + length}]") for c, (start, length, region, _) in enumerate(regions)]
+        targets += [(bit, f"new_{bit}") for bit in fixed]
+
+        overrides = {}
+        update_lines = []
+        for bit, output_name in targets:
+            update_lines += self.fn_list[bit].generate_python(
+                output_name = output_name,
+                array_name = "curr_state",
+                subfunction_prefix = f"fn_{bit}",
+                overrides = overrides
+            )
+
+            for j, node in enumerate(self.fn_list[bit].subfunctions()):
+                if node not in overrides:
+                    overrides[node] = f'fn_{bit}_{j+1}'
+
+        def read(bit):
+            if rotating[bit] >= 0:
+                return f"buffer[offsets[{rotating[bit]}] + {locations[bit]}]"
+            return f"buffer[{locations[bit]}]"
+
+        update_lines = [
+            re.sub(r"curr_state\[(\d+)\]", lambda m: read(int(m.group(1))), line)
+            for line in update_lines
+        ]
+
+        # the plain array is only overwritten once every bit has been read:
+        update_lines += [f"buffer[{locations[bit]}] = new_{bit}" for bit in fixed]
+
+        # move every chain one step, and back to the start of its region
+        # once its slack is used up:
+        advance_lines = []
+        for c, (_, length, region, chain_slack) in enumerate(regions):
+            advance_lines += [
+                f"offsets[{c}] += 1",
+                f"if offsets[{c}] == {chain_slack}:",
+                f"    buffer[{region}:{region + length}] = buffer[{region + chain_slack}:{region + chain_slack + length}]",
+                f"    offsets[{c}] = 0"
+            ]
+
+        exec_str = f"""
+@njit
+def _compiled_rotating(buffer, offsets, num_clocks, output_location, output_chain, output):
+    for clock in range(num_clocks):
+        if output_location >= 0:
+            if output_chain >= 0:
+                output[clock] = buffer[offsets[output_chain] + output_location]
+            else:
+                output[clock] = buffer[output_location]
+
+        {(chr(10) + "        ").join(update_lines)}
+        {(chr(10) + "        ").join(advance_lines)}
+
+self._compiled_rotating = _compiled_rotating"""
+        exec(exec_str)
+
+        self._compiled_rotating_layout = {
+            'regions': regions,
+            'fixed': fixed,
+            'locations': locations,
+            'rotating': rotating,
+            'buffer_size': buffer_size
+        }
+        return self._compiled_rotating
+
+    def _pack_rotating(self, state):
+        layout = self._compiled_rotating_layout
+        buffer = np.zeros(layout['buffer_size'], dtype='uint8')
+        for bit in layout['fixed']:
+            buffer[layout['locations'][bit]] = state[bit]
+        for start, length, region, _ in layout['regions']:
+            buffer[region:region + length] = state[start:start + length]
+        return buffer, np.zeros(len(layout['regions']), dtype=np.int64)
+
+    def _unpack_rotating(self, buffer, offsets, out = None):
+        layout = self._compiled_rotating_layout
+        if out is None:
+            out = np.zeros(self.size, dtype='uint8')
+        for bit in layout['fixed']:
+            out[bit] = buffer[layout['locations'][bit]]
+        for (start, length, region, _), offset in zip(layout['regions'], offsets):
+            out[start:start + length] = buffer[region + offset:region + offset + length]
+        return out
+
+    # Table-driven compilation (for linear registers):
+    def linear_matrix(self):
+        # the update matrix over GF(2): next_state = M @ curr_state
+        matrix = np.zeros((self.size, self.size), dtype='uint8')
+        for i, fn in enumerate(self.fn_list):
+            for term in BooleanANF.from_BooleanFunction(fn).terms:
+                if len(term) != 1:
+                    raise ValueError(f"Bit {i} is not a linear function of the state")
+                matrix[i, next(iter(term))] ^= 1
+        return matrix
+
+    def compile_table(self, output_bit = 0, stride = 64, slice_bits = 8):
+        # Advance `stride` clocks per table step, producing the values of
+        # output_bit over those clocks as packed bytes. Tables are built for
+        # slices of `slice_bits` bits of the state (2**slice_bits entries each).
+        if stride % 8 or not (8 <= stride <= 64):
+            raise ValueError("The stride must be a multiple of 8 between 8 and 64")
+        if 64 % slice_bits:
+            raise ValueError("The slice size must divide 64")
+
+        from PyPR.FeedbackFunctions.TableEngine import build_tables, table_run
+        state_table, output_table = build_tables(self.linear_matrix(), output_bit, stride, slice_bits)
+
+        self._compiled_table = table_run
+        self._compiled_table_layout = {
+            'state_table': state_table,
+            'output_table': output_table,
+            'output_bit': output_bit,
+            'stride': stride,
+            'slice_bits': slice_bits,
+            'num_words': state_table.shape[2]
+        }
+        return self._compiled_table
+
+    def _pack_table(self, state):
+        words = np.zeros(self._compiled_table_layout['num_words'], dtype=np.uint64)
+        for i in np.nonzero(state)[0]:
+            words[i // 64] |= np.uint64(1) << np.uint64(i % 64)
+        return words
+
+    def _unpack_table(self, words, out = None):
+        if out is None:
+            out = np.zeros(self.size, dtype='uint8')
+        bits = np.unpackbits(words.astype('<u8').view(np.uint8), bitorder='little')
+        out[:] = bits[:self.size]
+        return out
+
+    # Inversion:
+    def inverse(self, verify = True, max_table_bits = 12):
+        # Derive the update which maps the next state back to the current one.
+        # Each new bit y_j = f_j(x) is split (in ANF) into the terms which are
+        # linear in unknown bits of x, and the terms which only use bits of x
+        # already recovered. Solving the linear parts (over GF(2)) recovers more
+        # bits of x as functions of y, and this is repeated until all bits are
+        # recovered. This covers Fibonacci-type NLFSRs (feedback linear in x_0),
+        # Galois/MPR registers (one linear solve) and CMPRs (block by block).
+        # When no bit can be recovered linearly, but the update is invertible,
+        # the smallest group of unknown bits which only appear together is
+        # recovered from its truth table (see _recover_by_table), which has
+        # 2**(group size) entries, so groups are limited to max_table_bits.
+        rows = []
+        for fn in self.fn_list:
+            rows.append(list(BooleanANF.from_BooleanFunction(fn).terms))
+
+        solution = {}
+        unknown = set(range(self.size))
+        while unknown:
+            # collect rows which are linear in the unknown bits:
+            linear_rows = []
+            originals = []
+            for j, terms in enumerate(rows):
+                mask = 0
+                known_terms = []
+                usable = True
+                for term in terms:
+                    unknown_vars = term & unknown
+                    if not unknown_vars:
+                        known_terms.append(term)
+                    elif len(term) == 1:
+                        mask ^= 1 << next(iter(term))
+                    else:
+                        usable = False
+                        break
+                if usable and mask:
+                    linear_rows.append([mask, 1 << len(linear_rows)])
+                    originals.append((j, known_terms))
+
+            # gaussian elimination (reduced echelon form) on the linear rows,
+            # tracking which original rows are combined into each reduced row
+            pivot_row = 0
+            for var in sorted(unknown):
+                bit = 1 << var
+                for r in range(pivot_row, len(linear_rows)):
+                    if linear_rows[r][0] & bit:
+                        linear_rows[pivot_row], linear_rows[r] = linear_rows[r], linear_rows[pivot_row]
+                        break
+                else:
+                    continue
+
+                for r in range(len(linear_rows)):
+                    if r != pivot_row and linear_rows[r][0] & bit:
+                        linear_rows[r][0] ^= linear_rows[pivot_row][0]
+                        linear_rows[r][1] ^= linear_rows[pivot_row][1]
+                pivot_row += 1
+
+            # reduced rows with a single unknown bit determine that bit:
+            recovered = {}
+            for mask, combination in linear_rows[:pivot_row]:
+                if mask & (mask - 1):
+                    continue
+                var = mask.bit_length() - 1
+
+                new_bits = []
+                known_terms = set()
+                for r, (j, terms) in enumerate(originals):
+                    if (combination >> r) & 1:
+                        new_bits.append(VAR(j))
+                        known_terms ^= set(terms)
+
+                args = new_bits
+                for term in known_terms:
+                    if term:
+                        args.append(AND(*(solution[v] for v in sorted(term))))
+                    else:
+                        args.append(CONST(1))
+                recovered[var] = XOR(*args)
+
+            if not recovered:
+                if self._collision_exists():
+                    raise ValueError("The feedback function is not invertible")
+                recovered = self._recover_by_table(rows, unknown, solution, max_table_bits)
+
+            solution.update(recovered)
+            unknown -= set(recovered)
+
+        inverse_fn = FeedbackFunction([solution[i] for i in range(self.size)])
+
+        # check every bit of the inverse undoes the update:
+        if verify:
+            for i in range(self.size):
+                if not inverse_fn.fn_list[i].compose(self.fn_list).functionally_equivalent(VAR(i)):
+                    raise ValueError(f"Derived inverse is incorrect for bit {i}")
+
+        return inverse_fn
+
+    @staticmethod
+    def _recover_by_table(rows, unknown, solution, max_table_bits):
+        # group the unknown bits which appear in the same rows (union-find)
+        parent = {var: var for var in unknown}
+        def find(var):
+            while parent[var] != var:
+                parent[var] = parent[parent[var]]
+                var = parent[var]
+            return var
+
+        row_vars = {}
+        for j, terms in enumerate(rows):
+            used = set().union(*terms) & unknown if terms else set()
+            if used:
+                row_vars[j] = used
+                first = find(min(used))
+                for var in used:
+                    parent[find(var)] = first
+
+        groups = {}
+        for var in unknown:
+            groups.setdefault(find(var), []).append(var)
+        group = min(groups.values(), key = len)
+        if len(group) > max_table_bits:
+            raise ValueError(f"Unable to derive an inverse: {len(group)} bits can only be recovered together (more than max_table_bits = {max_table_bits})")
+
+        # Given the recovered bits, the rows of the group only depend on the
+        # bits of the group, and (as the update is invertible) exactly one
+        # assignment a of them matches y. So each bit of the group is the OR
+        # of the match conditions of the assignments where it is 1.
+        group = sorted(group)
+        group_rows = [j for j, used in row_vars.items() if used <= set(group)]
+        matches = []
+        for a in range(2**len(group)):
+            ones = {var for i, var in enumerate(group) if (a >> i) & 1}
+            conditions = []
+            for j in group_rows:
+                # y_j == f_j(a, recovered bits)  <=>  y_j ^ f_j ^ 1
+                args = [VAR(j), CONST(1)]
+                for term in rows[j]:
+                    if term & set(group) <= ones:
+                        known = sorted(term - set(group))
+                        args.append(AND(*(solution[v] for v in known)) if known else CONST(1))
+                conditions.append(XOR(*args))
+            matches.append(AND(*conditions))
+
+        return {
+            var: OR(*(matches[a] for a in range(2**len(group)) if (a >> i) & 1))
+            for i, var in enumerate(group)
+        }
+
+    def _collision_exists(self):
+        # SAT check for two distinct states with the same successor
+        other_fns = [f.shift_indices(self.size) for f in self.fn_list]
+        collision = AND(
+            *(XNOR(f, g) for f, g in zip(self.fn_list, other_fns)),
+            OR(*(XOR(VAR(i), VAR(i + self.size)) for i in range(self.size)))
+        )
+        return collision.sat() != None
+
+    def compile_inverse(self, verify = True, max_table_bits = 12):
+        inverse_fn = self.inverse(verify = verify, max_table_bits = max_table_bits)
+        inverse_fn.compile()
+
+        self._compiled_inverse = inverse_fn
+        self._compiled_reverse = inverse_fn._compiled
+        self._compiled_reverse_inplace = inverse_fn._compiled_inplace
+        return self._compiled_reverse
+
+    # Instrumentation
+    @contextlib.contextmanager
+    def instrumented(self):
+        # Record the DAG passes (compose, merge_redundant, translate_ANF, tseytin, ...)
+        # which run inside the block, adding to the records of previous blocks, so
+        # the cost of a pipeline on this register can be broken down by pass.
+        # see BooleanLogic/Instrumentation.py
+        if getattr(self, '_instrumentation', None) == None:
+            self._instrumentation = Instrumentation(label = type(self).__name__)
+
+        if self._instrumentation.is_active:
+            yield self._instrumentation
+        else:
+            with self._instrumentation:
+                yield self._instrumentation
+
+    def pass_summary(self):
+        # counters aggregated per pass, over every instrumented block so far
+        if getattr(self, '_instrumentation', None) == None:
+            return {}
+        return self._instrumentation.summary()
+
+    def pass_records(self):
+        # every recorded pass, as dicts
+        if getattr(self, '_instrumentation', None) == None:
+            return []
+        return self._instrumentation.to_records()
+
     # Function unrolling (possibly remove)
     def iterator(self, n):
         fns = [VAR(i) for i in range(self.size)]
@@ -304,6 +789,55 @@ def _compiled_inplace(curr_state,output_buffer):
             fns = [self.fn_list[b].compose(fns) for b in range(self.size)]
             yield fns
 
+    def unroll_iterator(self, rounds, outputs = None, known = None, structural_hashing = True):
+        # Symbolically clock the register `rounds` times, building every round into
+        # one shared DAG (see BooleanLogic/Unrolling.py). Known bits (e.g. IV bits)
+        # are propagated as constants, and with structural hashing equal gates are
+        # only built once. Yields the state (or the outputs) for t = 0, ..., rounds.
+        # outputs can be a bit index, a BooleanFunction of the state, or a list of them
+        unroller = Unroller(structural_hashing)
+        state = unroller.initial_state(self.size, known)
+
+        single = outputs != None and not isinstance(outputs, (list, tuple))
+        if outputs == None:
+            output_fns = None
+        else:
+            output_fns = [
+                VAR(out) if isinstance(out, int) else out
+                for out in ([outputs] if single else outputs)
+            ]
+
+        for t in range(rounds + 1):
+            if output_fns == None:
+                yield state
+            else:
+                result = unroller.compose(output_fns, state)
+                yield result[0] if single else result
+
+            if t < rounds:
+                state = unroller.compose(self.fn_list, state)
+
+    def unroll(self, rounds, outputs = None, known = None, structural_hashing = True):
+        # the state (or the outputs) after `rounds` clocks, as a shared DAG
+        for result in self.unroll_iterator(rounds, outputs, known, structural_hashing):
+            pass
+        return result
+
+    def parallel_anf(self, rounds, bits = None, known = None, max_workers = None, memory_limit = None):
+        # ANFs of the given bits for t = 0, ..., rounds, computed in worker processes.
+        # The rounds are unrolled into a shared DAG first (no ANF needed), and then
+        # each (round, bit) pair is translated independently, sharded across workers.
+        # memory_limit caps the memory of each worker (see BooleanLogic/ParallelANF.py)
+        if bits == None:
+            bits = list(range(self.size))
+
+        fns = []
+        for state in self.unroll_iterator(rounds, known = known):
+            fns += [state[b] for b in bits]
+
+        anfs = translate_ANF_parallel(fns, max_workers = max_workers, memory_limit = memory_limit)
+        return [anfs[t*len(bits):(t+1)*len(bits)] for t in range(rounds + 1)]
+
     # Probably remove
     def anf_iterator_1(
         self,
@@ -36,7 +36,7 @@ class Fibonacci(FeedbackFunction):
             #reverse taps:
             self.fn_list = self._from_poly(self.size,self.primitive_polynomial[::-1])
             #flip bit labelling:
-            # TODO: FIX THIS LINE-> self.flip()
+            self.flip()
             self.is_inverted = True
         else:
             #remake anf:
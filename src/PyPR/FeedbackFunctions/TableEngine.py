@@ -0,0 +1,80 @@
+import numpy as np
+from numba import njit
+
+# Kernels for advancing linear registers several clocks at a time with lookup
+# tables. The state is packed into uint64 words (bit i in word i // 64 at shift
+# i % 64) and split into slices of `slice_bits` bits. Since the register is linear,
+# the state `stride` clocks later (and the output bits produced in between) is the
+# XOR of one table entry per slice.
+
+def linear_power(matrix, power):
+    # matrix ** power over GF(2), by repeated squaring
+    # (float products are exact for the sizes we can store tables for)
+    result = np.eye(matrix.shape[0])
+    base = matrix.astype(float)
+    while power:
+        if power & 1:
+            result = (result @ base) % 2
+        base = (base @ base) % 2
+        power >>= 1
+    return result.astype('uint8')
+
+def build_tables(matrix, output_bit, stride, slice_bits):
+    size = matrix.shape[0]
+    num_words = (size + 63) // 64
+    num_slices = (size + slice_bits - 1) // slice_bits
+    entries = 1 << slice_bits
+
+    # column i of M^stride is the state reached from the unit vector e_i
+    jump = linear_power(matrix, stride)
+    columns = np.zeros((num_slices * slice_bits, num_words), dtype=np.uint64)
+    for i in range(size):
+        for j in np.nonzero(jump[:, i])[0]:
+            columns[i, j // 64] |= np.uint64(1) << np.uint64(j % 64)
+
+    # the output at clock m is row `output_bit` of M^m. Bits are placed so the
+    # little endian bytes of each output word are in np.packbits order.
+    output_columns = np.zeros(num_slices * slice_bits, dtype=np.uint64)
+    row = np.zeros(size, dtype='uint8')
+    row[output_bit] = 1
+    for m in range(stride):
+        position = np.uint64(8*(m // 8) + 7 - m % 8)
+        for i in np.nonzero(row)[0]:
+            output_columns[i] |= np.uint64(1) << position
+        row = (row.astype(float) @ matrix % 2).astype('uint8')
+
+    # table[slice, value] = XOR of the columns for the set bits of value
+    state_table = np.zeros((num_slices, entries, num_words), dtype=np.uint64)
+    output_table = np.zeros((num_slices, entries), dtype=np.uint64)
+    for s in range(num_slices):
+        for value in range(1, entries):
+            low = (value & -value).bit_length() - 1
+            rest = value & (value - 1)
+            state_table[s, value] = state_table[s, rest] ^ columns[s*slice_bits + low]
+            output_table[s, value] = output_table[s, rest] ^ output_columns[s*slice_bits + low]
+
+    return state_table, output_table
+
+@njit
+def table_run(words, num_steps, slice_bits, state_table, output_table, output):
+    num_slices = state_table.shape[0]
+    num_words = state_table.shape[2]
+    mask = np.uint64((1 << slice_bits) - 1)
+    slices_per_word = 64 // slice_bits
+
+    next_words = np.zeros_like(words)
+    for step in range(num_steps):
+        out = np.uint64(0)
+        for w in range(num_words):
+            next_words[w] = 0
+
+        for s in range(num_slices):
+            shift = np.uint64((s % slices_per_word) * slice_bits)
+            value = (words[s // slices_per_word] >> shift) & mask
+            out ^= output_table[s, value]
+            for w in range(num_words):
+                next_words[w] ^= state_table[s, value, w]
+
+        output[step] = out
+        words, next_words = next_words, words
+    return words
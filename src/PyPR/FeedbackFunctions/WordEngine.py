@@ -0,0 +1,64 @@
+import numpy as np
+from numba import njit
+
+# Kernels for clocking the linear part of CMPR blocks on packed uint64 words.
+# Bit i of a block is the coefficient of x^i, stored in word i // 64 at shift i % 64.
+
+# block modes:
+GENERIC = 0     # no linear part, every bit is handled by the residual logic
+POLYNOMIAL = 1  # multiplication by the update polynomial mod the primitive polynomial
+MATRIX = 2      # any other linear update, stored as matrix columns
+
+
+@njit(inline='always')
+def _mul_x(scratch, num_words, size, reduction_words, reduction_start):
+    # multiply the block in scratch by x, modulo the primitive polynomial
+    top_word = (size - 1) // 64
+    top_shift = np.uint64((size - 1) % 64)
+    carry = (scratch[top_word] >> top_shift) & np.uint64(1)
+
+    for w in range(num_words - 1, 0, -1):
+        scratch[w] = (scratch[w] << np.uint64(1)) | (scratch[w-1] >> np.uint64(63))
+    scratch[0] = scratch[0] << np.uint64(1)
+
+    if size % 64:
+        scratch[num_words-1] &= (np.uint64(1) << np.uint64(size % 64)) - np.uint64(1)
+
+    if carry:
+        for w in range(num_words):
+            scratch[w] ^= reduction_words[reduction_start + w]
+
+@njit
+def linear_step(
+    words, next_words, scratch, max_words,
+    block_start, block_num_words, block_size, block_mode, reduction_words,
+    power_ptr, powers, column_ptr, column_words
+):
+    for b in range(len(block_start)):
+        start = block_start[b]
+        num_words = block_num_words[b]
+        size = block_size[b]
+
+        for w in range(num_words):
+            next_words[start + w] = 0
+
+        if block_mode[b] == POLYNOMIAL:
+            # horner-style: add x^k * state for every power k in the update polynomial
+            for w in range(num_words):
+                scratch[w] = words[start + w]
+            current_power = 0
+            for p in range(power_ptr[b], power_ptr[b+1]):
+                while current_power < powers[p]:
+                    _mul_x(scratch, num_words, size, reduction_words, b * max_words)
+                    current_power += 1
+                for w in range(num_words):
+                    next_words[start + w] ^= scratch[w]
+
+        elif block_mode[b] == MATRIX:
+            # add the column of every set bit
+            column = column_ptr[b]
+            for i in range(size):
+                if (words[start + i // 64] >> np.uint64(i % 64)) & np.uint64(1):
+                    for w in range(num_words):
+                        next_words[start + w] ^= column_words[column + w]
+                column += num_words
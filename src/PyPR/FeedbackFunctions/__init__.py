@@ -1,8 +1,13 @@
-from PyPR.FeedbackFunctions.FeedbackFunction import FeedbackFunction
-from PyPR.FeedbackFunctions.MPR import MPR
-from PyPR.FeedbackFunctions.CMPR import CMPR
-from PyPR.FeedbackFunctions.Fibonacci import Fibonacci
-from PyPR.FeedbackFunctions.Galois import Galois
-from PyPR.FeedbackFunctions.CrossJoin import CrossJoin
-from PyPR.FeedbackFunctions.TFunction import TFunction
-from PyPR.FeedbackFunctions.FCSR import FCSR
\ No newline at end of file
+from PyPR.LazyImports import lazy_exports
+
+# register families are imported on first use, since some need numba or galois
+lazy_exports(__name__, {
+    'FeedbackFunction': 'PyPR.FeedbackFunctions.FeedbackFunction',
+    'MPR': 'PyPR.FeedbackFunctions.MPR',
+    'CMPR': 'PyPR.FeedbackFunctions.CMPR',
+    'Fibonacci': 'PyPR.FeedbackFunctions.Fibonacci',
+    'Galois': 'PyPR.FeedbackFunctions.Galois',
+    'CrossJoin': 'PyPR.FeedbackFunctions.CrossJoin',
+    'TFunction': 'PyPR.FeedbackFunctions.TFunction',
+    'FCSR': 'PyPR.FeedbackFunctions.FCSR',
+})
@@ -2,7 +2,6 @@ from PyPR.FeedbackFunctions import FeedbackFunction
 
 import numpy as np
 import subprocess
-from numba import jit, njit
 import json
 
 #import system
@@ -76,6 +75,88 @@ class FeedbackRegister:
         self._state, self._prev_state = self._prev_state, self._state
         self._state = self.fn._compiled(self._prev_state)
 
+    def clock_rotating(self, num_clocks = 1, output_bit = None):
+        if not hasattr(self.fn, "_compiled_rotating"):
+            print("Compile first!")
+            return
+
+        # optionally record a bit of the state before each clock (like run())
+        output = np.zeros(0 if output_bit == None else num_clocks, dtype='uint8')
+
+        # no long shift chains, so compile_rotating() fell back to compile()
+        if self.fn._compiled_rotating == None:
+            for clock in range(num_clocks):
+                if output_bit != None:
+                    output[clock] = self._state[output_bit]
+                self.clock_compiled()
+            if output_bit != None:
+                return output
+            return
+
+        layout = self.fn._compiled_rotating_layout
+        if output_bit == None:
+            output_location, output_chain = -1, -1
+        else:
+            output_location = layout['locations'][output_bit]
+            output_chain = layout['rotating'][output_bit]
+
+        buffer, offsets = self.fn._pack_rotating(self._state)
+        self.fn._compiled_rotating(buffer, offsets, num_clocks, output_location, output_chain, output)
+        self.fn._unpack_rotating(buffer, offsets, out = self._state)
+
+        if output_bit != None:
+            return output
+
+    def clock_words(self, num_clocks = 1, output_bit = None):
+        if not hasattr(self.fn, "_compiled_words"):
+            print("Compile first!")
+            return
+
+        # optionally record a bit of the state before each clock (like run())
+        layout = self.fn._compiled_words_layout
+        if output_bit == None:
+            output_word, output_shift = -1, 0
+            output = np.zeros(0, dtype='uint8')
+        else:
+            output_word = layout['word_of'][output_bit]
+            output_shift = layout['shift_of'][output_bit]
+            output = np.zeros(num_clocks, dtype='uint8')
+
+        words = self.fn._pack_words(self._state)
+        words = self.fn._compiled_words(words, num_clocks, output_word, output_shift, output, layout['arrays'])
+        self.fn._unpack_words(words, out = self._state)
+
+        if output_bit != None:
+            return output
+
+    def clock_table(self, num_clocks):
+        if not hasattr(self.fn, "_compiled_table"):
+            print("Compile first!")
+            return
+
+        # returns the output bit before each clock, packed in np.packbits order
+        layout = self.fn._compiled_table_layout
+        stride = layout['stride']
+        if num_clocks % stride:
+            raise ValueError(f"The number of clocks must be a multiple of the stride ({stride})")
+
+        output = np.zeros(num_clocks // stride, dtype=np.uint64)
+        words = self.fn._pack_table(self._state)
+        words = self.fn._compiled_table(
+            words, num_clocks // stride, layout['slice_bits'],
+            layout['state_table'], layout['output_table'], output
+        )
+        self.fn._unpack_table(words, out = self._state)
+
+        return output.astype('<u8').view(np.uint8).reshape(-1, 8)[:, :stride // 8].ravel()
+
+    def reverse_clock_compiled(self):
+        if not hasattr(self.fn, "_compiled_reverse"):
+            print("Compile the inverse first!")
+            return
+        self._state, self._prev_state = self._prev_state, self._state
+        self._state = self.fn._compiled_reverse(self._prev_state)
+
     #generate a sequence of states, in order
     def run(self, limit = None):
         #number of iterations to run
@@ -118,6 +199,27 @@ class FeedbackRegister:
 
                 
 
+    # generate a sequence of states, backwards in time
+    def run_reverse_compiled(self, arg = None):
+        if not hasattr(self.fn, "_compiled_reverse"):
+            print("Compile the inverse first!")
+            return
+
+        update_fn = self.fn._compiled_reverse_inplace
+        # number of iterations to run
+        if type(arg) == int:
+            for _ in range(arg):
+                yield self
+                self._state, self._prev_state = self._prev_state, self._state
+                update_fn(self._prev_state,self._state)
+
+        #no limit
+        elif arg == None:
+            while True:
+                yield self
+                self._state, self._prev_state = self._prev_state, self._state
+                update_fn(self._prev_state,self._state)
+
     #DIAGNOSTIC AND EXTRA INFO     
     #return the period of the register:
     def period(self, lim = 2**18):
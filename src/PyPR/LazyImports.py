@@ -0,0 +1,37 @@
+import importlib
+import types
+import sys
+
+# Packages use this to import their exports on first use (through the module
+# __getattr__ hook), so that importing PyPR does not pull in numba, galois or pysat.
+class LazyModule(types.ModuleType):
+    def __getattr__(self, name):
+        exports = self.__dict__.get('_lazy_exports', {})
+        if name not in exports:
+            raise AttributeError(f"module '{self.__name__}' has no attribute '{name}'")
+
+        value = getattr(importlib.import_module(exports[name]), name)
+        self.__dict__[name] = value
+        return value
+
+    def __setattr__(self, name, value):
+        # importing a submodule sets it as an attribute of the package. If an export
+        # has the same name (e.g. CMPR in CMPR.py), keep the export instead.
+        exports = self.__dict__.get('_lazy_exports', {})
+        if isinstance(value, types.ModuleType) and exports.get(name) == value.__name__:
+            value = getattr(value, name, value)
+        super().__setattr__(name, value)
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | set(self.__dict__.get('_lazy_exports', {})))
+
+
+def lazy_exports(module_name, exports):
+    # exports maps each exported name to the module which defines it
+    module = sys.modules[module_name]
+    module.__dict__['_lazy_exports'] = exports
+    module.__dict__['__all__'] = [
+        name for name in module.__dict__
+        if not name.startswith('_') and name != 'lazy_exports'
+    ] + list(exports)
+    module.__class__ = LazyModule
@@ -0,0 +1,104 @@
+from PyPR.FeedbackRegister import FeedbackRegister
+
+import numpy as np
+from math import ceil
+
+# Stores the (bit-packed) state of a register every `interval` clocks, so that the
+# state at any time t can be recovered with at most `interval - 1` clocks, instead
+# of simulating from the seed. Works for any register (including nonlinear ones,
+# which have no jump-ahead), trading memory for time.
+class CheckpointStore:
+    def __init__(self, register, num_clocks, interval = None, memory_budget = 2**28, path = None):
+        # attributes
+        self.fn = register.fn
+        self.size = register.size
+        self.num_clocks = num_clocks
+        self.row_bytes = ceil(self.size / 8)
+
+        # pick the smallest interval which fits the memory budget (in bytes)
+        if interval == None:
+            interval = max(1, ceil((num_clocks + 1) * self.row_bytes / memory_budget))
+        self.interval = interval
+        self.num_checkpoints = num_clocks // interval + 1
+
+        # store checkpoints in memory, or in a memory mapped file
+        shape = (self.num_checkpoints, self.row_bytes)
+        if path == None:
+            self.checkpoints = np.zeros(shape, dtype = np.uint8)
+        else:
+            self.checkpoints = np.memmap(path, dtype = np.uint8, mode = 'w+', shape = shape)
+        self.path = path
+
+        # last recovered state, so sequential access doesn't replay from a checkpoint
+        self._cursor = None
+        self._cursor_time = None
+
+        self._record(register)
+
+    def __len__(self): return self.num_clocks + 1
+
+    def _record(self, register):
+        # one forward pass from the current state of the register (without changing it)
+        reg = FeedbackRegister(register._state.copy(), self.fn)
+        if hasattr(self.fn, "_compiled_inplace"):
+            states = reg.run_compiled(self.num_clocks + 1)
+        else:
+            states = reg.run(self.num_clocks + 1)
+
+        for t, state in enumerate(states):
+            if t % self.interval == 0:
+                self.checkpoints[t // self.interval] = np.packbits(state._state, bitorder = 'little')
+
+        if self.path != None:
+            self.checkpoints.flush()
+
+    def _step(self, state):
+        if hasattr(self.fn, "_compiled"):
+            return self.fn._compiled(state)
+        return np.asarray([f.eval(state) for f in self.fn.fn_list], dtype = 'uint8')
+
+    def state_at(self, t):
+        if t < 0 or t > self.num_clocks:
+            raise IndexError(f"Time {t} is outside of the recorded range [0, {self.num_clocks}]")
+
+        # start from the closest known state before t:
+        checkpoint_time = (t // self.interval) * self.interval
+        if self._cursor_time != None and checkpoint_time <= self._cursor_time <= t:
+            state = self._cursor
+            current_time = self._cursor_time
+        else:
+            row = self.checkpoints[t // self.interval]
+            state = np.unpackbits(row, count = self.size, bitorder = 'little')
+            current_time = checkpoint_time
+
+        while current_time < t:
+            state = self._step(state)
+            current_time += 1
+
+        self._cursor = state
+        self._cursor_time = t
+        return state.copy()
+
+    def states(self, start = 0, stop = None):
+        # sequential states in [start, stop), replaying from one checkpoint only
+        if stop == None:
+            stop = self.num_clocks + 1
+        if stop <= start:
+            return
+
+        # the cursor follows the last state produced, so it stays correct if the
+        # generator is abandoned partway
+        state = self.state_at(start)
+        for t in range(start, stop):
+            self._cursor = state
+            self._cursor_time = t
+            yield state
+            if t + 1 < stop:
+                state = self._step(state)
+
+    def keystream(self, bit, start = 0, stop = None):
+        return np.asarray([state[bit] for state in self.states(start, stop)], dtype = 'uint8')
+
+    def register_at(self, t):
+        # a new FeedbackRegister, set to the state at time t
+        return FeedbackRegister(self.state_at(t), self.fn)
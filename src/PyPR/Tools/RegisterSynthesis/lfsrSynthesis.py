@@ -1,10 +1,13 @@
 from numba import njit
+from itertools import islice
 import numpy as np
 
-def berlekamp_massey(seq):
+def berlekamp_massey(seq, packed = True):
     N = len(seq)
     if type(seq) != np.ndarray:
         seq = np.asarray(seq, dtype='uint8')
+    if packed:
+        return _berlekamp_massey_packed(N,seq)
     return _berlekamp_massey(N,seq)
 
 @njit
@@ -88,7 +91,11 @@ def _bm_iterator_core(
                 last_update = n
     return arr, curr_guess, prev_guess, linear_complexity, last_update
 
-def berlekamp_massey_iterator(seq, yield_rate = 1000):
+def berlekamp_massey_iterator(seq, yield_rate = 1000, packed = True):
+    if packed:
+        yield from _berlekamp_massey_packed_iterator(seq, yield_rate)
+        return
+
     arr_size = 2**10
     arr = np.zeros(arr_size, dtype='uint8')
 
@@ -138,4 +145,144 @@ def berlekamp_massey_iterator(seq, yield_rate = 1000):
 
         # update the index and yield
         start_idx += yield_rate
-        yield(linear_complexity, curr_guess[:linear_complexity + 1])
\ No newline at end of file
+        yield(linear_complexity, curr_guess[:linear_complexity + 1])
+
+
+
+
+# Bit-packed Berlekamp-Massey:
+# Both connection polynomials are packed into uint64 words (bit i of the array is
+# the coefficient of x^i), and the sequence is packed in *reverse*: bit cap-1-j of
+# the array is seq[j], for a capacity of cap bits. Then the bits seq[n], seq[n-1],
+# ..., seq[n-L] which the discrepancy at n multiplies by the coefficients are the
+# consecutive bits starting at cap-1-n, so the discrepancy is the parity of
+# (window & polynomial), one word at a time, and the update is a shifted XOR of
+# whole words. Both cost about L/64 word operations per bit, instead of L.
+# Appending bits to the sequence fills lower positions, so the iterator can grow
+# the capacity by moving the words up.
+
+@njit(inline='always')
+def _parity(x):
+    x ^= x >> np.uint64(32)
+    x ^= x >> np.uint64(16)
+    x ^= x >> np.uint64(8)
+    x ^= x >> np.uint64(4)
+    x ^= x >> np.uint64(2)
+    x ^= x >> np.uint64(1)
+    return x & np.uint64(1)
+
+@njit
+def _bm_packed_core(start, stop, rev_seq, cap, curr_guess, prev_guess, temp, L, m, prev_L):
+    # curr_guess has degree <= L and prev_guess has degree <= prev_L, so bits
+    # above them are always 0 and only the low words are touched
+    for n in range(start, stop):
+
+        # discrepancy: parity of the polynomial and the window starting at cap-1-n
+        offset = cap - 1 - n
+        q = offset >> 6
+        r = np.uint64(offset & 63)
+        acc = np.uint64(0)
+        if r == 0:
+            for k in range((L >> 6) + 1):
+                acc ^= curr_guess[k] & rev_seq[q + k]
+        else:
+            rr = np.uint64(64) - r
+            for k in range((L >> 6) + 1):
+                acc ^= curr_guess[k] & ((rev_seq[q + k] >> r) | (rev_seq[q + k + 1] << rr))
+
+        if _parity(acc):
+            # store a copy of the current guess if it will become prev_guess
+            update = 2*L <= n
+            if update:
+                for k in range((L >> 6) + 1):
+                    temp[k] = curr_guess[k]
+
+            # curr_guess ^= x**(n-m) * prev_guess, word by word
+            shift = n - m
+            sq = shift >> 6
+            sr = np.uint64(shift & 63)
+            if sr == 0:
+                for k in range((prev_L >> 6) + 1):
+                    curr_guess[k + sq] ^= prev_guess[k]
+            else:
+                srr = np.uint64(64) - sr
+                for k in range((prev_L >> 6) + 1):
+                    curr_guess[k + sq] ^= prev_guess[k] << sr
+                    curr_guess[k + sq + 1] ^= prev_guess[k] >> srr
+
+            if update:
+                prev_L = L
+                L = n + 1 - L
+                m = n
+                prev_guess, temp = temp, prev_guess
+
+    return curr_guess, prev_guess, temp, L, m, prev_L
+
+@njit
+def _set_reversed(rev_seq, cap, start, bits):
+    for j in range(len(bits)):
+        if bits[j]:
+            p = cap - 1 - (start + j)
+            rev_seq[p >> 6] |= np.uint64(1) << np.uint64(p & 63)
+
+def _unpack_poly(words, L):
+    return np.unpackbits(words.view(np.uint8), count = L + 1, bitorder = 'little')
+
+def _berlekamp_massey_packed(N, seq):
+    # capacity rounded up to whole words, with spare words for unaligned reads
+    cap = 64 * (N // 64 + 1)
+    num_words = cap // 64 + 3
+    rev_seq = np.zeros(num_words, dtype=np.uint64)
+    _set_reversed(rev_seq, cap, 0, seq)
+
+    curr_guess = np.zeros(num_words, dtype=np.uint64)
+    curr_guess[0] = 1
+    prev_guess = np.zeros(num_words, dtype=np.uint64)
+    prev_guess[0] = 1
+    temp = np.zeros(num_words, dtype=np.uint64)
+
+    curr_guess, _, _, L, _, _ = _bm_packed_core(
+        0, N, rev_seq, cap, curr_guess, prev_guess, temp, 0, -1, 0
+    )
+    return (L, _unpack_poly(curr_guess, L))
+
+def _berlekamp_massey_packed_iterator(seq, yield_rate):
+    seq = iter(seq)
+    cap = 2**10
+    rev_seq = np.zeros(cap // 64 + 3, dtype=np.uint64)
+    curr_guess = np.zeros(cap // 64 + 3, dtype=np.uint64)
+    curr_guess[0] = 1
+    prev_guess = np.zeros(cap // 64 + 3, dtype=np.uint64)
+    prev_guess[0] = 1
+    temp = np.zeros(cap // 64 + 3, dtype=np.uint64)
+
+    L, m, prev_L = 0, -1, 0
+    start_idx = 0
+    while True:
+        chunk = np.fromiter(islice(seq, yield_rate), dtype=np.uint8)
+
+        # if it's time to resize (powers of 2): the sequence words move up,
+        # the polynomials keep their low words
+        if start_idx + len(chunk) > cap:
+            new_cap = cap
+            while start_idx + len(chunk) > new_cap:
+                new_cap *= 2
+            new_rev_seq = np.zeros(new_cap // 64 + 3, dtype=np.uint64)
+            new_rev_seq[(new_cap - cap) // 64 : new_cap // 64] = rev_seq[:cap // 64]
+            rev_seq = new_rev_seq
+            curr_guess, prev_guess, temp = (
+                np.concatenate([arr, np.zeros((new_cap - cap) // 64, dtype=np.uint64)])
+                for arr in (curr_guess, prev_guess, temp)
+            )
+            cap = new_cap
+
+        _set_reversed(rev_seq, cap, start_idx, chunk)
+        curr_guess, prev_guess, temp, L, m, prev_L = _bm_packed_core(
+            start_idx, start_idx + len(chunk), rev_seq, cap,
+            curr_guess, prev_guess, temp, L, m, prev_L
+        )
+
+        start_idx += len(chunk)
+        yield (L, _unpack_poly(curr_guess, L))
+        if len(chunk) < yield_rate:
+            return